@@ -1,33 +1,215 @@
+import os
+import threading
+import time
 import tkinter as tk
-from views.menu_view import MenuView
-from views.calibration_view import CalibrationView
-from views.connection_view import ConnectionView
-from views.run_view import RunView
+from tkinter import messagebox
 
 class App(tk.Tk):
-    def __init__(self):
+    # Views are imported and built the first time they are shown, so only
+    # the menu's cost is paid at boot
+    VIEW_NAMES = (
+        "CalibrationView", "ConnectionView", "DashboardView", "MenuView", "RunView"
+    )
+    # Views that talk to a board's connection directly; unavailable while
+    # the daemon owns the ports
+    SERIAL_VIEWS = ("CalibrationView", "ConnectionView")
+    # Views usable before, or without, an incubator: calibration history and
+    # the connection status
+    OFFLINE_VIEWS = ("CalibrationView", "ConnectionView", "MenuView")
+    DEVICE_CHECK_MS = 50  # How often startup checks whether the incubators are open
+
+    def __init__(self, profile_startup=False):
+        start = time.perf_counter()
         super().__init__()
         self.title("Incubator")
         self.minsize(1920, 1080)
         self.maxsize(1920, 1080)
 
-        container = tk.Frame(self)
-        container.pack(fill="both", expand=True)  # Make container fill the window
+        # INCUBATOR_PROFILE_STARTUP=1 (or main.py --profile-startup) prints
+        # where boot time goes
+        self.profile_startup = profile_startup or bool(
+            os.environ.get("INCUBATOR_PROFILE_STARTUP")
+        )
+        self.startup_times = []
+        self._mark("Tk window", start)
+
+        # The incubators are found on a thread once the menu is up, since
+        # probing every port takes seconds; the device views wait until
+        # they are open
+        self.devices = None
+        self.connection = None
+        self.attached = False
+        self._device_result = None
+        self._calibrations = None
+
+        self.container = tk.Frame(self)
+        self.container.pack(fill="both", expand=True)  # Make container fill the window
 
-        container.grid_rowconfigure(0, weight=1)
-        container.grid_columnconfigure(0, weight=1)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
 
         self.frames = {}
 
-        for F in (CalibrationView, ConnectionView, MenuView, RunView):
-            page_name = F.__name__
-            frame = F(parent=container, controller=self)
+        self.show_frame("MenuView")
+
+        if self.profile_startup:
+            self.update_idletasks()
+            self._mark("First frame", start)
+        self.after_idle(self._start_device_thread, start)
+
+    @property
+    def calibrations(self):
+        """ Versioned calibration history shared by the calibration and run views """
+        if self._calibrations is None:
+            started = time.perf_counter()
+            # numpy comes with it, so it is loaded on first use
+            from util.calibration.calibration_registry import CalibrationRegistry
+
+            self._calibrations = CalibrationRegistry()
+            self._mark("Calibration registry", started)
+        return self._calibrations
+
+    def _mark(self, label, started):
+        if self.profile_startup:
+            self.startup_times.append((label, time.perf_counter() - started))
+
+    def _start_device_thread(self, start):
+        threading.Thread(target=self._open_devices, daemon=True).start()
+        self.after(self.DEVICE_CHECK_MS, self._check_devices, start, time.perf_counter())
+
+    def _open_devices(self):
+        # If the acquisition daemon (daemon.py) is running it owns the
+        # incubators and the GUI attaches to it; otherwise the GUI opens one
+        # connection per incubator and the views that drive a single board
+        # share the primary one. Imported here: numpy, pyserial and the
+        # ingest stack come with them
+        from util.acquisition_client import AcquisitionClient, RemoteDeviceManager
+        from util.device_manager import DeviceManager
+
+        client = None
+        try:
+            client = AcquisitionClient.connect()
+            if client is not None:
+                self._device_result = (True, RemoteDeviceManager(client), None)
+            else:
+                self._device_result = (False, DeviceManager(), None)
+        except (OSError, RuntimeError) as e:
+            if client is not None:
+                client.close()
+            self._device_result = (client is not None, None, e)
+
+    def _check_devices(self, start, started):
+        """ Finish startup on the Tk thread once the incubators are open """
+        if self._device_result is None:
+            self.after(self.DEVICE_CHECK_MS, self._check_devices, start, started)
+            return
+        attached, devices, error = self._device_result
+        self._mark("Serial connections", started)
+        if error is not None:
+            if attached:
+                messagebox.showerror(
+                    "Acquisition Daemon",
+                    f"Could not attach to the acquisition daemon:\n{error}",
+                )
+                self.destroy()
+                return
+            # No board: calibration history and the menu stay usable
+            messagebox.showerror(
+                "No Incubator Found",
+                f"{error}\nConnect an incubator and restart to run reactions or calibrations.",
+            )
+        else:
+            self.attached = attached
+            self.devices = devices
+            if not attached:
+                self.connection = devices.primary.connection
+            self._poll_connection()
+
+            # A run interrupted by a power cut must be offered for recovery at
+            # boot; building the run view schedules that check
+            if not self.attached and self._has_recovery_data():
+                self.get_frame("RunView")
+
+        if self.profile_startup:
+            self.after_idle(self._report_startup, start)
+
+    def _has_recovery_data(self):
+        try:
+            return bool(os.listdir(self.devices.primary.data_dir))
+        except OSError:
+            return False
+
+    def _view_class(self, page_name):
+        """ Import a view's module on first use; matplotlib and pandas come with it """
+        if page_name == "CalibrationView":
+            from views.calibration_view import CalibrationView as view
+        elif page_name == "ConnectionView":
+            from views.connection_view import ConnectionView as view
+        elif page_name == "DashboardView":
+            from views.dashboard_view import DashboardView as view
+        elif page_name == "MenuView":
+            from views.menu_view import MenuView as view
+        elif page_name == "RunView":
+            from views.run_view import RunView as view
+        else:
+            raise KeyError(page_name)
+        return view
+
+    def get_frame(self, page_name):
+        """ Return a view, building it the first time it is needed """
+        frame = self.frames.get(page_name)
+        if frame is None:
+            started = time.perf_counter()
+            F = self._view_class(page_name)
+            self._mark(f"{page_name} import", started)
+
+            started = time.perf_counter()
+            frame = F(parent=self.container, controller=self)
             self.frames[page_name] = frame
             frame.grid(row=0, column=0, sticky="nsew")  # Make frames expand
+            self._mark(f"{page_name} construction", started)
+        return frame
 
-        self.show_frame("MenuView")
+    def _view_available(self, page_name):
+        if self.devices is None:
+            return page_name in self.OFFLINE_VIEWS
+        return not (self.attached and page_name in self.SERIAL_VIEWS)
 
     def show_frame(self, page_name):
         """ Show a frame of the App """
-        frame = self.frames[page_name]
-        frame.tkraise()
\ No newline at end of file
+        if self.devices is None and page_name not in self.OFFLINE_VIEWS:
+            if self._device_result is None:
+                messagebox.showinfo("Incubators", "Still looking for incubators, try again in a moment.")
+            else:
+                messagebox.showerror("No Incubator Found", "This view needs a connected incubator.")
+            return
+        if self.attached and page_name in self.SERIAL_VIEWS:
+            messagebox.showinfo(
+                "Acquisition Daemon",
+                "The incubators are run by the acquisition daemon.\nCalibration and connection tests need the daemon stopped.",
+            )
+            page_name = "DashboardView"
+        frame = self.get_frame(page_name)
+        frame.tkraise()
+
+    def _report_startup(self, start):
+        # Build the remaining views too, so every view's cost is reported
+        for page_name in self.VIEW_NAMES:
+            if self._view_available(page_name):
+                self.get_frame(page_name)
+        self.frames["MenuView"].tkraise()
+        self._mark("All views", start)
+
+        print("Startup profile:")
+        for label, seconds in self.startup_times:
+            print(f"  {label:<28} {seconds * 1000:8.1f} ms")
+
+    def _poll_connection(self):
+        """ Route inbound serial lines, or the daemon's events, to the views and devices """
+        self.devices.poll()
+        self.after(20, self._poll_connection)
+
+    def destroy(self):
+        if self.devices is not None:
+            self.devices.close()
+        super().destroy()
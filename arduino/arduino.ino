@@ -29,6 +29,12 @@ bool previousPaused = false;
 int odone = 0;
 int odtwo = 0;
 
+// Binary telemetry (enabled by CMD:TELEMETRY_BINARY)
+bool binaryTelemetry = false;
+uint16_t telemetrySequence = 0;
+const uint8_t FRAME_TYPE_SAMPLE = 0x01;
+const int FRAME_SIZE = 10;
+
 enum SuperState {
   IDLE,
   TEST_CONNECTION,
@@ -112,6 +118,9 @@ void checkSuperStateSerial() {
         targetAgitations = superStateInputBuffer.substring(11).toInt();
       } else if (superStateInputBuffer == "CMD:RUNREACTION") {
         currentState = RUN_REACTION;
+      } else if (superStateInputBuffer == "CMD:TELEMETRY_BINARY") {
+        binaryTelemetry = true;
+        Serial.println("TELEMETRY:BINARY");
       } else if (superStateInputBuffer == "CMD:IDLE") {
         currentState = IDLE;
       } else if (superStateInputBuffer == "CMD:PLAY_REACTION" || superStateInputBuffer == "CMD:RESUME_REACTION") {
@@ -129,6 +138,56 @@ void checkSuperStateSerial() {
   }
 }
 
+uint16_t crc16(const uint8_t* data, int length) {
+  // CRC-16/CCITT-FALSE
+  uint16_t crc = 0xFFFF;
+  for (int i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+int cobsEncode(const uint8_t* input, int length, uint8_t* output) {
+  int codeIndex = 0;
+  int outIndex = 1;
+  uint8_t code = 1;
+  for (int i = 0; i < length; i++) {
+    if (input[i] == 0) {
+      output[codeIndex] = code;
+      codeIndex = outIndex++;
+      code = 1;
+    } else {
+      output[outIndex++] = input[i];
+      code++;
+    }
+  }
+  output[codeIndex] = code;
+  return outIndex;
+}
+
+void sendTelemetryFrame(uint8_t channel, float value) {
+  // Payload: u8 type, u8 channel, u16 sequence, f32 value, u16 crc (little-endian)
+  uint8_t payload[FRAME_SIZE];
+  payload[0] = FRAME_TYPE_SAMPLE;
+  payload[1] = channel;
+  payload[2] = telemetrySequence & 0xFF;
+  payload[3] = telemetrySequence >> 8;
+  memcpy(&payload[4], &value, sizeof(float));
+  uint16_t crc = crc16(payload, FRAME_SIZE - 2);
+  payload[8] = crc & 0xFF;
+  payload[9] = crc >> 8;
+  telemetrySequence++;
+
+  uint8_t encoded[FRAME_SIZE + 2];
+  int encodedLength = cobsEncode(payload, FRAME_SIZE, encoded);
+  Serial.write((uint8_t)0);
+  Serial.write(encoded, encodedLength);
+  Serial.write((uint8_t)0);
+}
+
 void runIdleState() {
   checkSuperStateSerial();
   if (paused && !previousPaused) {
@@ -376,10 +435,14 @@ void runReactionState() {
       reactionState = REACT_TRANSMIT_DATA;
       break;
     case REACT_TRANSMIT_DATA:
-      Serial.print("OD:");
-      Serial.print(currentOD);
-      Serial.print("CH:");
-      Serial.println(channelIterator);
+      if (binaryTelemetry) {
+        sendTelemetryFrame(channelIterator, (float)currentOD);
+      } else {
+        Serial.print("OD:");
+        Serial.print(currentOD);
+        Serial.print("CH:");
+        Serial.println(channelIterator);
+      }
 
       channelIterator++;
       if (channelIterator > 50) {
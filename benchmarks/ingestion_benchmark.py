@@ -0,0 +1,346 @@
+"""
+End-to-end benchmark of the host-side ingestion path.
+
+Feeds scripted OD:<raw>CH:<n> lines through the same code a Device uses:
+UARTReader line framing and ReactionIngest.parse_line per read, then the
+device's IngestWorker thread for conversion, smoothing and the
+ReactionCSVLog and RunJournal persistence, while the main thread stores
+the finished batches (ReactionData.extend) and updates a ReactionPlot on
+an Agg canvas. Each scenario runs in a fresh process so peak RSS is per
+scenario.
+
+The plot stage calls ReactionPlot.update directly every --render-every
+samples. It does not go through RunView's poll loop and RenderScheduler,
+which need a Tk display, so it measures the drawing cost but not the
+coalescing of redraws between Tk frames.
+
+With --devices, every scenario is repeated for N incubators, each with
+its own reader, ingest, worker, CSV logs and journal; a summary reports
+samples/s against N, with the share of one CPU the process used. Paced
+runs (--rates, per device) show whether every board keeps its rate;
+unpaced ones are bounded by the cores available.
+
+    python -m benchmarks.ingestion_benchmark                 # 1h, 24h, 7d x 50 channels
+    python -m benchmarks.ingestion_benchmark --scenarios 1h --rates 200,2000
+    python -m benchmarks.ingestion_benchmark --scenarios 1h --devices 1,2,4,8
+    python -m benchmarks.ingestion_benchmark --save-baseline
+    python -m benchmarks.ingestion_benchmark --compare       # exit 1 on regression
+
+benchmarks/baseline.json holds the default scenarios (1h, 24h, 7d, unpaced,
+one device) measured on a single-CPU Linux machine. Throughput and
+latencies depend on the host, so re-record it with --save-baseline when
+--compare starts running on different hardware.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DURATIONS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600}
+STAGES = ("frame", "parse", "convert", "store", "persist", "journal", "plot")
+
+
+def _timed(function, samples):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        result = function(*args, **kwargs)
+        samples.append(time.perf_counter_ns() - start)
+        return result
+
+    return wrapper
+
+
+def _script(duration, channels, channel_period, lines_per_read, seed):
+    """Pre-generates the byte chunks a serial read would return, and the sample times."""
+    rng = np.random.default_rng(seed)
+    n = int(duration / channel_period * channels)
+    channel = np.arange(n) % channels + 1
+    hours = np.arange(n) * (channel_period / channels) / 3600.0
+    # Logistic growth seen through an inverse log calibration, plus sensor noise
+    od = 1.8 / (1.0 + 35.0 * np.exp(-0.8 * np.maximum(hours - 2.0, 0.0)))
+    raw = np.clip(np.round(10 ** ((od - 4.5) / -1.5) + rng.normal(0, 2.0, n)), 1, 1023)
+
+    lines = [f"OD:{int(r)}CH:{c}\r\n" for r, c in zip(raw.tolist(), channel.tolist())]
+    chunks = [
+        "".join(lines[i:i + lines_per_read]).encode()
+        for i in range(0, n, lines_per_read)
+    ]
+    t0 = np.datetime64("2025-01-01T00:00:00", "ms")
+    offsets = (np.arange(n) * (channel_period / channels) * 1000).astype("timedelta64[ms]")
+    return chunks, t0 + offsets
+
+
+def run_scenario(name, duration, rate, options, devices=1):
+    """
+    Runs one scenario in the current process and returns its metrics. With
+    several devices the rate is per device and only the first is plotted,
+    as RunView shows the primary device.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from util.plot.reaction_plot import ReactionPlot
+    from util.reaction.ingest_worker import IngestWorker
+    from util.reaction.outliers import RollingMadDetector
+    from util.reaction.reaction_ingest import ReactionIngest
+    from util.reaction.run_journal import RunJournal
+    from util.reaction.smoothing import SavitzkyGolayFilter
+    from util.uart_reader import UARTReader
+
+    samples = {stage: [] for stage in STAGES}
+    csv_dir = tempfile.mkdtemp(prefix="incubator_bench_")
+
+    pipelines = []
+    for device in range(devices):
+        chunks, times = _script(
+            duration,
+            options.channels,
+            options.channel_period,
+            options.lines_per_read,
+            options.seed + device,
+        )
+        device_dir = os.path.join(csv_dir, str(device))
+        os.makedirs(device_dir)
+        ingest = ReactionIngest(options.channels)
+        ingest.set_calibration(-1.5, 4.5)
+        ingest.set_filter(SavitzkyGolayFilter(options.channels))
+        ingest.set_outlier_detector(RollingMadDetector(options.channels), exclude=True)
+        ingest.start(device_dir, journal=RunJournal(os.path.join(device_dir, "run.journal")))
+
+        # Instrument the real objects in place; the code path itself is unchanged
+        ingest.convert = _timed(ingest.convert, samples["convert"])
+        for rd in ingest.data:
+            rd.extend = _timed(rd.extend, samples["store"])
+        ingest.csv_log.append = _timed(ingest.csv_log.append, samples["persist"])
+        ingest.journal.append_samples = _timed(ingest.journal.append_samples, samples["journal"])
+        worker = IngestWorker(ingest, name=f"ingest-{device}")
+        worker.start()
+        pipelines.append((chunks, times, ingest, UARTReader(None), worker))
+
+    fig, ax = plt.subplots(figsize=(12, 6), dpi=100)
+    plot = ReactionPlot(ax)
+    plot.set_selection(range(1, options.plot_channels + 1))
+    fig.canvas.draw()
+
+    interval = 0.0 if not rate else options.lines_per_read / rate
+    next_tick = time.perf_counter()
+    indices = [0] * devices
+    stored = [0] * devices
+
+    def store_finished(device, ingest, worker):
+        # Like Device.poll: the worker's finished batches are stored here
+        for batch in worker.drain():
+            previous = stored[device]
+            ingest.append_processed(*batch)
+            stored[device] += len(batch[1])
+            if device == 0 and (
+                stored[0] // options.render_every > previous // options.render_every
+            ):
+                t = time.perf_counter_ns()
+                plot.update(ingest.data)
+                if plot._background is None:
+                    fig.canvas.draw()
+                samples["plot"].append(time.perf_counter_ns() - t)
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for read in range(len(pipelines[0][0])):
+        if interval:
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        for device, (chunks, times, ingest, reader, worker) in enumerate(pipelines):
+            t = time.perf_counter_ns()
+            reader._buffer += chunks[read]
+            reader._split_buffer(0.0)
+            lines = reader.drain()
+            samples["frame"].append(time.perf_counter_ns() - t)
+
+            # Like Device, the lines of one read go to the worker as one batch
+            parsed = []
+            for _, line in lines:
+                t = time.perf_counter_ns()
+                parsed.append(ingest.parse_line(line))
+                samples["parse"].append(time.perf_counter_ns() - t)
+            index = indices[device]
+            if parsed:
+                channels, raw_values = zip(*parsed)
+                worker.submit(times[index:index + len(parsed)], channels, raw_values)
+            indices[device] = index + len(parsed)
+            store_finished(device, ingest, worker)
+    bytes_written = 0
+    for device, (_, _, ingest, _, worker) in enumerate(pipelines):
+        worker.wait()
+        store_finished(device, ingest, worker)
+        bytes_written += ingest.csv_log.bytes_written
+        ingest.stop()
+        worker.stop()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    index = sum(stored)
+
+    plt.close(fig)
+    shutil.rmtree(csv_dir, ignore_errors=True)
+
+    result = {
+        "scenario": name,
+        "devices": devices,
+        "samples": index,
+        "seconds": elapsed,
+        "throughput": index / elapsed,
+        "cpu_busy": cpu / elapsed,
+        "cpus": os.cpu_count(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "bytes_written": bytes_written,
+        "latency_us": {},
+    }
+    for stage, values in samples.items():
+        if values:
+            p50, p95, p99 = np.percentile(np.array(values) / 1000.0, [50, 95, 99])
+            result["latency_us"][stage] = {"p50": p50, "p95": p95, "p99": p99}
+    return result
+
+
+def _child(connection, name, duration, rate, options, devices):
+    connection.send(run_scenario(name, duration, rate, options, devices))
+    connection.close()
+
+
+def run_isolated(name, duration, rate, options, devices=1):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_child, args=(child, name, duration, rate, options, devices)
+    )
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def print_result(result):
+    print(
+        f"\n{result['scenario']}: {result['samples']} samples in {result['seconds']:.2f} s "
+        f"-> {result['throughput']:.0f} samples/s, peak RSS {result['peak_rss_mb']:.1f} MB, "
+        f"{result['bytes_written'] / 1e6:.1f} MB written"
+    )
+    print(f"  {'stage':<8} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for stage, p in result["latency_us"].items():
+        print(f"  {stage:<8} {p['p50']:>10.1f} {p['p95']:>10.1f} {p['p99']:>10.1f}")
+
+
+def print_scaling(results):
+    """
+    Prints aggregate samples/s against device count for each scenario, and
+    the CPU the process used as a share of one core (of `cpus`).
+    """
+    single = {}
+    for result in results:
+        if result["devices"] == 1:
+            single[result["scenario"]] = result["throughput"]
+    print(f"\n  {'scenario':<20} {'devices':>7} {'samples/s':>12} {'per device':>12} "
+          f"{'vs 1':>6} {'cpu':>6}")
+    for result in results:
+        base = single.get(result["scenario"].rsplit(" x", 1)[0])
+        ratio = f"{result['throughput'] / base:.2f}" if base else "-"
+        print(
+            f"  {result['scenario']:<20} {result['devices']:>7} {result['throughput']:>12.0f} "
+            f"{result['throughput'] / result['devices']:>12.0f} {ratio:>6} "
+            f"{result['cpu_busy']:>6.0%}"
+        )
+    print(f"  ({results[0]['cpus']} CPUs)")
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions against the stored baseline."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result["scenario"])
+        if base is None:
+            continue
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: throughput {result['throughput']:.0f} < "
+                f"baseline {base['throughput']:.0f} samples/s"
+            )
+        for stage, p in result["latency_us"].items():
+            base_p95 = base["latency_us"].get(stage, {}).get("p95")
+            if base_p95 and p["p95"] > base_p95 * (1 + tolerance):
+                regressions.append(
+                    f"{result['scenario']}: {stage} p95 {p['p95']:.1f} us > "
+                    f"baseline {base_p95:.1f} us"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default="1h,24h,7d",
+                        help=f"comma-separated run lengths from {', '.join(DURATIONS)}")
+    parser.add_argument("--rates", default="0",
+                        help="comma-separated line rates per second; 0 means unpaced")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--channel-period", type=float, default=60.0,
+                        help="simulated seconds between readings of one channel")
+    parser.add_argument("--lines-per-read", type=int, default=50,
+                        help="lines delivered per simulated serial read")
+    parser.add_argument("--render-every", type=int, default=250,
+                        help="samples between plot updates")
+    parser.add_argument("--plot-channels", type=int, default=4)
+    parser.add_argument("--devices", default="1",
+                        help="comma-separated incubator counts; rates are per device")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression when comparing")
+    options = parser.parse_args()
+
+    results = []
+    device_counts = [int(n) for n in options.devices.split(",")]
+    for scenario in options.scenarios.split(","):
+        for rate in (float(r) for r in options.rates.split(",")):
+            for devices in device_counts:
+                name = scenario if not rate else f"{scenario}@{rate:g}/s"
+                if devices > 1:
+                    name = f"{name} x{devices}"
+                result = run_isolated(name, DURATIONS[scenario], rate, options, devices)
+                print_result(result)
+                results.append(result)
+    if device_counts != [1]:
+        print_scaling(results)
+
+    if options.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({r["scenario"]: r for r in results}, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if options.compare:
+        if not os.path.isfile(BASELINE_PATH):
+            print(f"\nNo baseline at {BASELINE_PATH}; run with --save-baseline first.")
+            return 1
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
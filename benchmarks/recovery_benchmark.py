@@ -0,0 +1,184 @@
+"""
+Benchmark of run-journal recovery after a power cut.
+
+Writes a synthetic RunJournal for each run length (the same record stream
+ReactionIngest produces: 50 channels, one reading per channel period),
+appends a torn half-record as a power cut would leave, then measures what
+RunView does on boot: RunJournal.recover and ReactionIngest.resume, which
+rebuilds every channel's ReactionData. Each scenario runs in a fresh
+process so peak RSS is per scenario.
+
+    python -m benchmarks.recovery_benchmark                   # 1h, 24h, 7d x 50 channels
+    python -m benchmarks.recovery_benchmark --scenarios 30d --channel-period 5
+    python -m benchmarks.recovery_benchmark --save-baseline
+    python -m benchmarks.recovery_benchmark --compare         # exit 1 on regression
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "recovery_baseline.json"
+)
+DURATIONS = {"1h": 3600, "24h": 24 * 3600, "7d": 7 * 24 * 3600, "30d": 30 * 24 * 3600}
+
+
+def run_scenario(name, duration, options):
+    """Writes, tears and recovers one journal in the current process."""
+    from util.reaction.outliers import RollingMadDetector
+    from util.reaction.reaction_ingest import ReactionIngest
+    from util.reaction.smoothing import SavitzkyGolayFilter
+    from util.reaction.run_journal import RunJournal
+
+    work_dir = tempfile.mkdtemp(prefix="incubator_recovery_")
+    path = os.path.join(work_dir, "run.journal")
+    n = int(duration / options.channel_period * options.channels)
+
+    # Write phase: one group commit per `commit_every` samples
+    start = time.perf_counter()
+    journal = RunJournal(path, sync_interval=0.0)
+    journal.write_metadata({"calibration_version": 1, "agitations": 5, "selected": ["1"]})
+    t0 = np.datetime64("2025-01-01T00:00:00", "ms").astype(np.int64)
+    step_ms = options.channel_period / options.channels * 1000
+    syncs = 0
+    for first in range(0, n, options.commit_every):
+        index = np.arange(first, min(first + options.commit_every, n))
+        times = (t0 + index * step_ms).astype("datetime64[ms]")
+        channels = index % options.channels + 1
+        raw = np.full(len(index), 300.0)
+        journal.append_samples(times, channels, raw, -1.5 * np.log10(raw) + 4.5)
+        journal.sync()
+        syncs += 1
+    journal.close()
+    write_seconds = time.perf_counter() - start
+    journal_bytes = os.path.getsize(path)
+
+    # Power cut in the middle of the next record
+    with open(path, "ab") as f:
+        f.write(RunJournal.HEADER.pack(b"S", 1000) + b"\0" * 17)
+
+    start = time.perf_counter()
+    metadata, samples = RunJournal.recover(path)
+    read_seconds = time.perf_counter() - start
+
+    ingest = ReactionIngest(options.channels)
+    ingest.set_filter(SavitzkyGolayFilter(options.channels))
+    ingest.set_outlier_detector(RollingMadDetector(options.channels), exclude=True)
+    start = time.perf_counter()
+    ingest.resume(work_dir, RunJournal(path), samples)
+    rebuild_seconds = time.perf_counter() - start
+    ingest.stop()
+
+    recovered = sum(len(rd) for rd in ingest.data)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    if recovered != n or metadata.get("calibration_version") != 1:
+        raise RuntimeError(f"{name}: recovered {recovered} of {n} samples")
+
+    return {
+        "scenario": name,
+        "samples": n,
+        "journal_mb": journal_bytes / 1e6,
+        "write_seconds": write_seconds,
+        "syncs": syncs,
+        "read_seconds": read_seconds,
+        "rebuild_seconds": rebuild_seconds,
+        "recovery_seconds": read_seconds + rebuild_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def _child(connection, name, duration, options):
+    connection.send(run_scenario(name, duration, options))
+    connection.close()
+
+
+def run_isolated(name, duration, options):
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child, name, duration, options))
+    process.start()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def print_result(result):
+    print(
+        f"\n{result['scenario']}: {result['samples']} samples, "
+        f"{result['journal_mb']:.1f} MB journal written in {result['write_seconds']:.2f} s "
+        f"({result['syncs']} fsyncs), peak RSS {result['peak_rss_mb']:.1f} MB"
+    )
+    print(
+        f"  recovery {result['recovery_seconds'] * 1000:.1f} ms "
+        f"(read+verify {result['read_seconds'] * 1000:.1f} ms, "
+        f"rebuild {result['rebuild_seconds'] * 1000:.1f} ms) -> "
+        f"{result['samples'] / result['recovery_seconds']:.0f} samples/s"
+    )
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions against the stored baseline."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result["scenario"])
+        if base is None:
+            continue
+        if result["recovery_seconds"] > base["recovery_seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{result['scenario']}: recovery {result['recovery_seconds'] * 1000:.1f} ms > "
+                f"baseline {base['recovery_seconds'] * 1000:.1f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default="1h,24h,7d",
+                        help=f"comma-separated run lengths from {', '.join(DURATIONS)}")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--channel-period", type=float, default=60.0,
+                        help="simulated seconds between readings of one channel")
+    parser.add_argument("--commit-every", type=int, default=50,
+                        help="samples per group commit")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression when comparing")
+    options = parser.parse_args()
+
+    results = []
+    for scenario in options.scenarios.split(","):
+        result = run_isolated(scenario, DURATIONS[scenario], options)
+        print_result(result)
+        results.append(result)
+
+    if options.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({r["scenario"]: r for r in results}, f, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+
+    if options.compare:
+        if not os.path.isfile(BASELINE_PATH):
+            print(f"\nNo baseline at {BASELINE_PATH}; run with --save-baseline first.")
+            return 1
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
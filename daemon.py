@@ -0,0 +1,22 @@
+import argparse
+import signal
+
+from util.acquisition_protocol import SOCKET_PATH
+from util.acquisition_service import AcquisitionService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the incubators headless; the GUI attaches over a Unix socket."
+    )
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket to listen on")
+    parser.add_argument(
+        "--ports",
+        nargs="+",
+        help="Serial ports to open (default: every incubator found)",
+    )
+    args = parser.parse_args()
+
+    service = AcquisitionService(args.socket, args.ports)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: service.stop())
+    service.serve_forever()
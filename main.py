@@ -1,5 +1,12 @@
+import sys
+import time
+
+start = time.perf_counter()
 from app import App
+import_time = time.perf_counter() - start
 
 if __name__ == "__main__":
-    app = App()
+    app = App(profile_startup="--profile-startup" in sys.argv)
+    if app.profile_startup:
+        app.startup_times.insert(0, ("App import", import_time))
     app.mainloop()
@@ -0,0 +1,98 @@
+import os
+import stat
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("serial")
+
+from util.acquisition_client import AcquisitionClient, RemoteDevice, RemoteDeviceManager
+from util.acquisition_protocol import decode_samples
+from util.acquisition_service import AcquisitionService
+from util.calibration.calibration_registry import CalibrationRegistry
+from util.reaction.reaction_data import ReactionData
+from util.simulator.arduino_simulator import ArduinoSimulator
+
+T0 = np.datetime64("2025-01-01T00:00:00", "ms")
+
+
+def stored_samples(n, channel_count=3):
+    """n samples spread over the channels, as append_processed takes them."""
+    index = np.arange(n)
+    timestamps = T0 + (index * 1000).astype("timedelta64[ms]")
+    channels = index % channel_count + 1
+    ods = 0.1 + index * 1e-3
+    return timestamps, channels, ods, ods - 1e-4, index % 7 == 0
+
+
+@pytest.fixture
+def service(tmp_path):
+    simulator = ArduinoSimulator(channels=3, sample_interval=0.05, agitation_time=0.0, seed=0)
+    port = simulator.start()
+    registry = CalibrationRegistry(str(tmp_path / "calibrations.jsonl"), 50)
+    socket_path = str(tmp_path / "daemon" / "acquisition.sock")
+    service = AcquisitionService(socket_path, [port], str(tmp_path / "devices"), registry)
+    thread = threading.Thread(target=service.serve_forever)
+    thread.start()
+    try:
+        # Wait until the socket is listening
+        for _ in range(100):
+            client = AcquisitionClient.connect(socket_path)
+            if client is not None:
+                client.close()
+                break
+            time.sleep(0.02)
+        yield service
+    finally:
+        service.stop()
+        thread.join()
+        simulator.stop()
+
+
+def test_get_slice_matches_get_arrays(monkeypatch):
+    monkeypatch.setattr(ReactionData, "CHUNK_SIZE", 7)
+    data = ReactionData(0)
+    times, _, ods, filtered, outliers = stored_samples(50, channel_count=1)
+    data.extend(times, ods, None, filtered, outliers)
+    arrays = data.get_arrays()
+    for start, stop in [(0, 0), (0, 5), (3, 20), (14, 21), (40, 100), (60, 70), (49, 50)]:
+        for got, want in zip(data.get_slice(start, stop), arrays):
+            np.testing.assert_array_equal(got, want[start:stop])
+            assert got.dtype == want.dtype
+
+
+def test_socket_is_private_to_its_owner(service):
+    assert stat.S_IMODE(os.stat(service.socket_path).st_mode) == 0o600
+
+
+def test_history_pages_cover_each_channel_once(service, monkeypatch):
+    device = service.devices.devices[0]
+    samples = stored_samples(100)
+    device.ingest.append_processed(*samples)
+
+    client = AcquisitionClient.connect(service.socket_path)
+    try:
+        page = client.request("history", device=device.name, channel=2, offset=10, limit=8)
+        times, channels, ods, filtered, outliers = decode_samples(page["samples"])
+        expected = samples[1] == 2
+        np.testing.assert_array_equal(times, samples[0][expected][10:18])
+        assert (channels == 2).all()
+        np.testing.assert_array_equal(ods, samples[2][expected][10:18])
+        np.testing.assert_array_equal(outliers, samples[4][expected][10:18])
+
+        # Past the end of the channel
+        page = client.request("history", device=device.name, channel=2, offset=40, limit=8)
+        assert len(decode_samples(page["samples"])[0]) == 0
+        with pytest.raises(RuntimeError):
+            client.request("history", device=device.name, channel=99, offset=0)
+
+        # Attaching pages the whole history in, a few samples per request
+        monkeypatch.setattr(RemoteDevice, "HISTORY_PAGE", 7)
+        mirror = RemoteDeviceManager(client).devices[0]
+        for local, remote in zip(device.ingest.data, mirror.ingest.data):
+            for got, want in zip(remote.get_arrays(), local.get_arrays()):
+                np.testing.assert_array_equal(got, want)
+    finally:
+        client.close()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from util.binary_telemetry import TelemetryDecoder, encode_sample
+
+
+def frame(channel, sequence, value):
+    # decode() takes the COBS blocks between the delimiters
+    return encode_sample(channel, sequence, value)[1:-1]
+
+
+def test_decodes_samples():
+    decoder = TelemetryDecoder()
+    samples = decoder.decode([frame(1, 0, 0.5), frame(2, 1, 1.25)])
+    assert samples["channel"].tolist() == [1, 2]
+    assert samples["sequence"].tolist() == [0, 1]
+    np.testing.assert_allclose(samples["value"], [0.5, 1.25])
+    assert (decoder.corrupt, decoder.dropped) == (0, 0)
+
+
+def test_bad_crc_counts_as_corrupt_not_dropped():
+    decoder = TelemetryDecoder()
+    bad = bytearray(frame(1, 1, 2.0))
+    bad[3] ^= 0x01  # A flipped bit in the value
+    samples = decoder.decode([frame(1, 0, 1.0), bytes(bad), frame(1, 2, 3.0)])
+    assert samples["sequence"].tolist() == [0, 2]
+    assert (decoder.corrupt, decoder.dropped) == (1, 0)
+
+
+def test_malformed_cobs_and_wrong_size_are_corrupt():
+    decoder = TelemetryDecoder()
+    samples = decoder.decode([b"\x09\x01", frame(1, 0, 1.0)[:-2]])
+    assert len(samples) == 0
+    assert decoder.corrupt == 2
+
+
+def test_sequence_gaps_count_as_dropped():
+    decoder = TelemetryDecoder()
+    decoder.decode([frame(1, 0, 1.0), frame(1, 3, 1.0)])
+    assert (decoder.corrupt, decoder.dropped) == (0, 2)
+
+
+def test_corrupt_frames_across_batches_are_not_counted_twice():
+    decoder = TelemetryDecoder()
+    decoder.decode([frame(1, 10, 1.0)])
+    # A batch of nothing but garbage, then the frame after the lost one
+    decoder.decode([b"\x00"])
+    decoder.decode([frame(1, 12, 1.0)])
+    assert (decoder.corrupt, decoder.dropped) == (1, 0)
+
+
+def test_sequence_wraps_around():
+    decoder = TelemetryDecoder()
+    decoder.decode([frame(1, 65534, 1.0), frame(1, 65535, 1.0), frame(1, 1, 1.0)])
+    assert decoder.dropped == 1
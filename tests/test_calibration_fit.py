@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from util.calibration.calibration_fit import fit_log_calibration
+
+X = np.array([12.0, 40.0, 95.0, 210.0, 480.0, 900.0])
+
+
+def test_recovers_exact_coefficients():
+    fit = fit_log_calibration(X, -1.5 * np.log10(X) + 4.5)
+    assert fit.a == pytest.approx(-1.5)
+    assert fit.b == pytest.approx(4.5)
+    assert fit.r_squared == pytest.approx(1.0)
+
+
+def test_matches_polyfit_with_noise():
+    rng = np.random.default_rng(0)
+    y = -1.2 * np.log10(X) + 3.9 + rng.normal(0, 0.02, len(X))
+    fit = fit_log_calibration(X, y)
+    a, b = np.polyfit(np.log10(X), y, 1)
+    assert (fit.a, fit.b) == (pytest.approx(a), pytest.approx(b))
+
+
+def test_matches_curve_fit_covariance():
+    optimize = pytest.importorskip("scipy.optimize")
+    rng = np.random.default_rng(1)
+    y = -1.2 * np.log10(X) + 3.9 + rng.normal(0, 0.02, len(X))
+    sigma = np.linspace(0.01, 0.05, len(X))
+    fit = fit_log_calibration(X, y, sigma=sigma)
+    popt, pcov = optimize.curve_fit(
+        lambda x, a, b: a * np.log10(x) + b, X, y, sigma=sigma
+    )
+    np.testing.assert_allclose([fit.a, fit.b], popt, rtol=1e-6)
+    np.testing.assert_allclose(fit.covariance, pcov, rtol=1e-6)
+
+
+def test_batches_ignore_nan_padding_and_non_positive_x():
+    y = -1.5 * np.log10(X) + 4.5
+    xs = np.stack([X, np.where(np.arange(len(X)) < 4, X, np.nan)])
+    ys = np.stack([2 * y, y])
+    xs[0, 0] = 0.0  # log10 undefined; the point is skipped
+    fit = fit_log_calibration(xs, ys)
+    np.testing.assert_allclose(fit.a, [-3.0, -1.5])
+    np.testing.assert_allclose(fit.b, [9.0, 4.5])
+    assert fit.covariance.shape == (2, 2, 2)
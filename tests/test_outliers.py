@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from util.reaction.outliers import RollingMadDetector
+
+CHANNELS = 3
+
+
+def noisy_runs(samples_per_channel, seed=0):
+    """Interleaved growth curves with spikes and gaps; returns the spike indices too."""
+    rng = np.random.default_rng(seed)
+    n = samples_per_channel * CHANNELS
+    channels = np.arange(n) % CHANNELS + 1
+    values = 0.1 + np.arange(n) * 1e-4 + rng.normal(0, 0.005, n)
+    spikes = rng.choice(np.arange(60, n), 12, replace=False)
+    values[spikes] += 0.5
+    values[rng.choice(n, 6, replace=False)] = np.nan
+    return channels, values, spikes
+
+
+def reference_flags(detector, channels, values):
+    """Median and MAD of each channel's previous window, computed directly."""
+    flags = np.zeros(len(values), dtype=bool)
+    history = {c: [] for c in range(1, CHANNELS + 1)}
+    for i, (c, value) in enumerate(zip(channels.tolist(), values.tolist())):
+        if np.isnan(value):
+            continue
+        window = np.array(history[c][-detector.window:])
+        if len(window) >= detector.MIN_SAMPLES:
+            median = np.median(window)
+            mad = max(np.median(np.abs(window - median)), detector.MIN_MAD)
+            flags[i] = abs(value - median) > detector.threshold * detector.MAD_SCALE * mad
+        history[c].append(value)
+    return flags
+
+
+def test_flags_spikes_against_the_rolling_window():
+    channels, values, spikes = noisy_runs(150)
+    detector = RollingMadDetector(CHANNELS)
+    flags = np.concatenate([
+        detector.update(channels[i:i + 10], values[i:i + 10])
+        for i in range(0, len(values), 10)
+    ])
+    np.testing.assert_array_equal(flags, reference_flags(detector, channels, values))
+    valid_spikes = spikes[np.isfinite(values[spikes])]
+    assert flags[valid_spikes].all()
+
+
+@pytest.mark.parametrize("size", [1, 9, 64])
+def test_chunked_matches_one_shot(size):
+    # 150 samples per channel: the one-shot batch takes the bulk path
+    channels, values, _ = noisy_runs(150)
+    one_shot = RollingMadDetector(CHANNELS).update(channels, values)
+    detector = RollingMadDetector(CHANNELS)
+    chunked = np.concatenate([
+        detector.update(channels[i:i + size], values[i:i + size])
+        for i in range(0, len(values), size)
+    ])
+    np.testing.assert_array_equal(chunked, one_shot)
+
+
+def test_bulk_path_continues_an_existing_window():
+    channels, values, _ = noisy_runs(150)
+    expected = RollingMadDetector(CHANNELS).update(channels, values)
+    detector = RollingMadDetector(CHANNELS)
+    split = 3 * 20  # Part-filled windows, then a replay-sized batch
+    flags = np.concatenate([
+        detector.update(channels[:split], values[:split]),
+        detector.update(channels[split:], values[split:]),
+    ])
+    np.testing.assert_array_equal(flags, expected)
+
+
+def test_nothing_is_flagged_before_min_samples():
+    detector = RollingMadDetector(1)
+    values = [0.1] * (RollingMadDetector.MIN_SAMPLES - 1) + [5.0]
+    assert not detector.update(np.ones(len(values)), values).any()
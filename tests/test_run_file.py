@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from util.reaction.reaction_data import ReactionData
+from util.reaction.run_file import ColumnarRunFile, csv_to_run_file, run_file_to_csv
+
+T0 = np.datetime64("2025-01-01T00:00:00", "ms")
+
+
+def rows(n, start=0):
+    index = np.arange(start, start + n)
+    times = T0 + (index * 1000).astype("timedelta64[ms]")
+    ods = 0.1 + index * 0.01
+    temps = np.where(index % 3 == 0, np.nan, 37.0)
+    filtered = ods - 0.001
+    outliers = index % 5 == 0
+    return times, ods, temps, filtered, outliers
+
+
+def assert_columns_equal(actual, expected):
+    for got, want in zip(actual, expected):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_round_trip_through_a_reopened_file(tmp_path):
+    run_file = ColumnarRunFile(str(tmp_path), 3)
+    first, second = rows(10), rows(5, start=10)
+    run_file.append(*first)
+    run_file.append(*second)
+    run_file.close()
+
+    reopened = ColumnarRunFile(str(tmp_path), 3)
+    assert len(reopened) == 15
+    columns = reopened.columns()
+    assert columns[0].dtype == np.dtype("datetime64[ms]")
+    assert columns[4].dtype == np.dtype(bool)
+    assert_columns_equal(
+        columns, [np.concatenate(pair) for pair in zip(first, second)]
+    )
+
+    times, ods = reopened.get_range(T0 + np.timedelta64(12, "s"))
+    assert len(times) == 3
+    np.testing.assert_array_equal(ods, second[1][2:])
+
+
+def test_defaults_for_filtered_and_outliers(tmp_path):
+    run_file = ColumnarRunFile(str(tmp_path), 1)
+    times, ods, temps, _, _ = rows(4)
+    run_file.append(times, ods, temps)
+    _, _, _, filtered, outliers = run_file.columns()
+    np.testing.assert_array_equal(filtered, ods)
+    assert not outliers.any()
+
+
+def test_short_column_after_a_crash_is_ignored(tmp_path):
+    run_file = ColumnarRunFile(str(tmp_path), 1)
+    run_file.append(*rows(6))
+    run_file.close()
+    # Only part of the last row reached the time column
+    with open(run_file.paths[0], "r+b") as f:
+        f.truncate(ColumnarRunFile.HEADER.size + 5 * 8 + 3)
+    assert len(ColumnarRunFile(str(tmp_path), 1)) == 5
+
+
+def test_rejects_a_foreign_column(tmp_path):
+    run_file = ColumnarRunFile(str(tmp_path), 1)
+    run_file.append(*rows(2))
+    run_file.close()
+    with open(run_file.paths[1], "r+b") as f:
+        f.write(b"NOTACOLM")
+    with pytest.raises(ValueError):
+        ColumnarRunFile(str(tmp_path), 1).columns()
+
+
+def test_reaction_data_spills_sealed_chunks_to_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReactionData, "CHUNK_SIZE", 8)
+    data = ReactionData(0, ColumnarRunFile(str(tmp_path), 1))
+    expected = rows(30)
+    data.extend(*expected[:2], *expected[2:])
+    assert len(data.run_file) == 24  # The three sealed chunks
+    assert_columns_equal(data.get_arrays(), expected)
+
+    data.sync_run_file()
+    data.run_file.close()
+    reopened = ReactionData.open(ColumnarRunFile(str(tmp_path), 1), 0)
+    assert_columns_equal(reopened.get_arrays(), expected)
+
+
+def test_csv_round_trip(tmp_path):
+    run_file = ColumnarRunFile(str(tmp_path / "a"), 1)
+    run_file.append(*rows(12))
+    csv_path = str(tmp_path / "channel_1.csv")
+    run_file_to_csv(run_file, csv_path)
+
+    copy = ColumnarRunFile(str(tmp_path / "b"), 1)
+    csv_to_run_file(csv_path, copy)
+    # pandas parses the decimal text to within an ulp
+    times, ods, temps, filtered, outliers = copy.columns()
+    expected = run_file.columns()
+    np.testing.assert_array_equal(times, expected[0])
+    for got, want in zip((ods, temps, filtered), expected[1:4]):
+        np.testing.assert_allclose(got, want, rtol=1e-15)
+    np.testing.assert_array_equal(outliers, expected[4])
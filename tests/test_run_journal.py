@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+from util.reaction.run_journal import RunJournal
+
+T0 = np.datetime64("2025-01-01T00:00:00", "ms")
+
+
+def write_run(path, batches=3, rows=4):
+    journal = RunJournal(path)
+    journal.write_metadata({"calibration_version": 2, "paused": False})
+    for batch in range(batches):
+        times = T0 + np.arange(batch * rows, (batch + 1) * rows).astype("timedelta64[s]")
+        journal.append_samples(times, np.arange(rows) + 1, np.full(rows, 100.0), np.full(rows, 0.5))
+        journal.sync()
+    journal.write_metadata({"paused": True})
+    journal.close()
+    return os.path.getsize(path)
+
+
+def test_recover_reads_metadata_and_samples(tmp_path):
+    path = str(tmp_path / "run.journal")
+    write_run(path)
+    metadata, samples = RunJournal.recover(path)
+    assert metadata == {"calibration_version": 2, "paused": True}
+    assert len(samples) == 12
+    assert samples["channel"].tolist() == [1, 2, 3, 4] * 3
+
+
+def test_recover_truncates_a_torn_tail(tmp_path):
+    path = str(tmp_path / "run.journal")
+    intact = write_run(path)
+    # A power cut in the middle of the next sample record
+    with open(path, "ab") as f:
+        f.write(RunJournal.HEADER.pack(b"S", 1000) + b"\0" * 17)
+
+    metadata, samples = RunJournal.recover(path)
+    assert metadata["paused"] is True
+    assert len(samples) == 12
+    assert os.path.getsize(path) == intact
+
+    # The journal can be appended to again and recovers the new record too
+    journal = RunJournal(path)
+    journal.write_metadata({"resumed": True})
+    journal.close()
+    metadata, samples = RunJournal.recover(path)
+    assert metadata["resumed"] is True
+    assert len(samples) == 12
+
+
+def record_offsets(data):
+    position = len(RunJournal.MAGIC)
+    while position < len(data):
+        kind, length = RunJournal.HEADER.unpack_from(data, position)
+        yield kind, position
+        position += RunJournal.HEADER.size + length + RunJournal.CRC.size
+
+
+def test_recover_stops_at_a_corrupt_record(tmp_path):
+    path = str(tmp_path / "run.journal")
+    write_run(path)
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    # Flip a byte inside the second sample record's payload
+    second = [offset for kind, offset in record_offsets(data) if kind == b"S"][1]
+    data[second + RunJournal.HEADER.size + 2] ^= 0xFF
+    with open(path, "wb") as f:
+        f.write(data)
+
+    metadata, samples = RunJournal.recover(path)
+    assert metadata == {"calibration_version": 2, "paused": False}
+    assert len(samples) == 4
+
+
+def test_read_leaves_the_file_alone(tmp_path):
+    path = str(tmp_path / "run.journal")
+    intact = write_run(path)
+    with open(path, "ab") as f:
+        f.write(b"torn")
+    metadata, samples, length = RunJournal.read(path)
+    assert length == intact
+    assert os.path.getsize(path) == intact + 4
+    assert RunJournal.truncate(path, length) == 4
+    assert RunJournal.truncate(path, length) == 0
+
+
+def test_missing_or_foreign_file(tmp_path):
+    assert RunJournal.recover(str(tmp_path / "missing.journal")) == (None, None)
+    foreign = tmp_path / "foreign.journal"
+    foreign.write_bytes(b"not a journal")
+    assert RunJournal.recover(str(foreign)) == (None, None)
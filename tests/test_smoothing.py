@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from util.reaction.smoothing import EwmaFilter, SavitzkyGolayFilter, channel_rounds
+
+CHANNELS = 4
+
+
+def interleaved(samples_per_channel, seed=0):
+    """Round-robin readings of CHANNELS channels with noise and a few gaps."""
+    rng = np.random.default_rng(seed)
+    n = samples_per_channel * CHANNELS
+    channels = np.arange(n) % CHANNELS + 1
+    values = 0.1 + np.arange(n) * 1e-3 + rng.normal(0, 0.01, n)
+    values[rng.choice(n, 10, replace=False)] = np.nan
+    return channels, values
+
+
+def filter_in_chunks(stream_filter, channels, values, size):
+    return np.concatenate([
+        stream_filter.update(channels[i:i + size], values[i:i + size])
+        for i in range(0, len(values), size)
+    ])
+
+
+def test_channel_rounds_never_repeat_a_channel():
+    channels = np.array([1, 2, 1, 1, 3, 2])
+    rounds = channel_rounds(channels)
+    assert [r.tolist() for r in rounds] == [[0, 1, 4], [2, 5], [3]]
+
+
+@pytest.mark.parametrize("make", [EwmaFilter, SavitzkyGolayFilter])
+@pytest.mark.parametrize("size", [1, 7, 50])
+def test_chunked_matches_one_shot(make, size):
+    # 200 samples per channel: the one-shot batch takes the replay path
+    channels, values = interleaved(200)
+    one_shot = make(CHANNELS).update(channels, values)
+    chunked = filter_in_chunks(make(CHANNELS), channels, values, size)
+    np.testing.assert_allclose(chunked, one_shot, rtol=1e-9, atol=1e-12)
+    assert np.array_equal(np.isnan(one_shot), np.isnan(values))
+
+
+def test_ewma_matches_its_recurrence():
+    values = np.array([1.0, 2.0, np.nan, 4.0, 3.0])
+    smoothed = EwmaFilter(1, alpha=0.5).update(np.ones(5), values)
+    np.testing.assert_allclose(smoothed, [1.0, 1.5, np.nan, 2.75, 2.875])
+
+
+def test_savitzky_golay_is_exact_on_its_polynomial_degree():
+    # A quadratic is reproduced exactly once the window has three points
+    x = np.arange(30.0)
+    values = 0.5 + 0.02 * x + 0.001 * x ** 2
+    smoothed = SavitzkyGolayFilter(1, window=7, order=2).update(np.ones(30), values)
+    np.testing.assert_allclose(smoothed[2:], values[2:], rtol=1e-9)
+
+
+def test_reset_forgets_the_state():
+    channels, values = interleaved(20)
+    stream_filter = SavitzkyGolayFilter(CHANNELS)
+    first = stream_filter.update(channels, values)
+    stream_filter.reset()
+    np.testing.assert_allclose(stream_filter.update(channels, values), first)
@@ -0,0 +1,280 @@
+import itertools
+import queue
+import socket
+import threading
+
+from util.acquisition_protocol import (
+    SOCKET_PATH,
+    decode_message,
+    decode_samples,
+    encode_message,
+)
+from util.reaction.reaction_ingest import ReactionIngest
+
+
+class AcquisitionClient:
+    """
+    Connection to the acquisition daemon (daemon.py). A reader thread
+    splits the socket into replies, handed to the request() waiting for
+    them, and events, queued for poll_events() on the Tk thread.
+    """
+
+    TIMEOUT = 10.0  # Seconds to wait for a reply
+    # Seconds to wait for a stop's reply, which comes once the daemon has
+    # written the run's archive
+    ARCHIVE_TIMEOUT = 300.0
+
+    def __init__(self, socket_path=SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._replies = {}
+        self._reply_ready = threading.Condition()
+        self._send_lock = threading.Lock()
+        self.closed = False
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    @classmethod
+    def connect(cls, socket_path=SOCKET_PATH):
+        """Returns a client if a daemon is listening on socket_path, else None."""
+        try:
+            return cls(socket_path)
+        except OSError:
+            return None
+
+    def _read_loop(self):
+        buffer = b""
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    message = decode_message(line)
+                    if "event" in message:
+                        self.events.put(message)
+                    else:
+                        with self._reply_ready:
+                            self._replies[message.get("id")] = message
+                            self._reply_ready.notify_all()
+        except OSError:
+            pass
+        with self._reply_ready:
+            self.closed = True
+            self._reply_ready.notify_all()
+
+    def request(self, cmd, timeout=None, **params):
+        """
+        Sends a command and returns the daemon's reply, waiting up to
+        `timeout` seconds (TIMEOUT by default). Raises RuntimeError with the
+        daemon's message if it failed, ConnectionError if the daemon went
+        away.
+        """
+        request_id = next(self._ids)
+        with self._send_lock:
+            self.sock.sendall(encode_message(dict(params, id=request_id, cmd=cmd)))
+        with self._reply_ready:
+            if not self._reply_ready.wait_for(
+                lambda: request_id in self._replies or self.closed,
+                self.TIMEOUT if timeout is None else timeout,
+            ):
+                raise TimeoutError(f"No reply to {cmd} from the acquisition daemon")
+            reply = self._replies.pop(request_id, None)
+        if reply is None:
+            raise ConnectionError("Acquisition daemon closed the connection")
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def poll_events(self):
+        """Returns the events received since the last call."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class RemoteDevice:
+    """
+    A device run by the daemon, seen through an AcquisitionClient, with the
+    interface of a local Device. Its ingest mirrors the daemon's data and
+    its directories are the daemon's, on the same host, so RunView and the
+    dashboard drive it like a local one.
+    """
+
+    HISTORY_PAGE = 50000  # Samples per history request
+
+    def __init__(self, client, status):
+        self.client = client
+        self.name = status["name"]
+        self.port = status["port"]
+        self.ingest = ReactionIngest(status["channels"])
+        self._on_error = None
+        self._apply_status(status)
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def paused(self):
+        return self.status["paused"]
+
+    @property
+    def data_dir(self):
+        return self.status["data_dir"]
+
+    @property
+    def archive_dir(self):
+        return self.status["archive_dir"]
+
+    def _apply_status(self, status):
+        self._running = status["running"]
+        self.status = status
+
+    def _command_failed(self, event):
+        if self._on_error is not None:
+            self._on_error(event["command"], event["reason"])
+
+    def channel_id(self, channel_number):
+        return f"{self.name}:{channel_number}"
+
+    def _clear(self):
+        for rd in self.ingest.data:
+            rd.clear()
+        self.ingest.analytics.reset()
+
+    def append_samples(self, payload):
+        samples = decode_samples(payload)
+        if len(samples[0]):
+            self.ingest.append_processed(*samples)
+
+    def load_history(self, counts):
+        """
+        Fetches the samples the daemon stored before attach, a page at a
+        time, so no single reply grows with the length of the run.
+        """
+        for channel, count in enumerate(counts, start=1):
+            for offset in range(0, count, self.HISTORY_PAGE):
+                reply = self.client.request(
+                    "history",
+                    device=self.name,
+                    channel=channel,
+                    offset=offset,
+                    limit=min(self.HISTORY_PAGE, count - offset),
+                )
+                self.append_samples(reply["samples"])
+
+    def interrupted(self):
+        return self.client.request("interrupted", device=self.name)["interrupted"]
+
+    def resume_interrupted(self, calibration):
+        """Has the daemon resume the interrupted run; it picks the calibration version the run used."""
+        reply = self.client.request("resume", device=self.name)
+        self._apply_status(reply["status"])
+
+    def discard_interrupted(self):
+        self.client.request("discard", device=self.name)
+
+    def start(self, calibration, agitations=5, **metadata):
+        # Samples of the previous run still queued carry its run id and are
+        # dropped by RemoteDeviceManager.poll()
+        reply = self.client.request(
+            "start",
+            device=self.name,
+            agitations=agitations,
+            calibration_version=calibration.version,
+            metadata=metadata,
+        )
+        self._clear()
+        self._apply_status(reply["status"])
+
+    def set_paused(self, paused, on_error=None):
+        """
+        Asks the daemon to pause or resume sampling. `paused` follows the
+        state event sent on the firmware's acknowledgement; on_error(command,
+        reason) runs from poll() if none comes.
+        """
+        self._on_error = on_error
+        self.client.request("pause", device=self.name, paused=paused)
+
+    def write_metadata(self, **metadata):
+        self.client.request("metadata", device=self.name, metadata=metadata)
+
+    def snapshot(self):
+        return self.client.request("snapshot", device=self.name)["sizes"]
+
+    def stop(self):
+        """Stops the reaction; returns the archive path the daemon wrote, or None."""
+        reply = self.client.request(
+            "stop", timeout=self.client.ARCHIVE_TIMEOUT, device=self.name
+        )
+        self._apply_status(reply["status"])
+        return reply["archive"]
+
+
+class RemoteDeviceManager:
+    """
+    DeviceManager counterpart for a GUI attached to the acquisition daemon.
+    The daemon lists the devices in DeviceManager's order, so the primary
+    one is the same board RunView drives without the daemon.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        reply = client.request("attach")
+        self.devices = []
+        for status in reply["devices"]:
+            counts = status.pop("counts")
+            device = RemoteDevice(client, status)
+            # Events queue up meanwhile and are applied by the first poll()
+            device.load_history(counts)
+            self.devices.append(device)
+        self.primary = self.devices[0]
+
+    def find(self, name):
+        for device in self.devices:
+            if device.name == name:
+                return device
+        raise KeyError(name)
+
+    def poll(self):
+        """Applies the samples and state changes the daemon streamed since the last call."""
+        for event in self.client.poll_events():
+            device = self.find(event["device"])
+            if event["event"] == "samples":
+                if event["run"] == device.status["run"]:
+                    device.append_samples(event["samples"])
+            elif event["event"] == "state":
+                if "counts" in event:
+                    # A resumed run, rebuilt from its journal by the daemon
+                    device._clear()
+                    device.load_history(event["counts"])
+                elif event["status"]["run"] != device.status["run"]:
+                    # Another client started a run
+                    device._clear()
+                device._apply_status(event["status"])
+            elif event["event"] == "error":
+                device._command_failed(event)
+
+    def close(self):
+        """Detaches; the daemon keeps acquiring."""
+        if not self.client.closed:
+            try:
+                self.client.request("detach")
+            except (OSError, RuntimeError):
+                pass
+        self.client.close()
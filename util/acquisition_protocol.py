@@ -0,0 +1,72 @@
+"""
+Wire format between the acquisition daemon (daemon.py) and its clients.
+
+Messages are JSON objects, one per line, over a Unix stream socket.
+Requests carry an "id" and a "cmd"; the daemon answers each with
+{"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": "..."}.
+Attached clients also receive unsolicited {"event": ...} messages:
+
+    samples  newly stored samples of one device (see encode_samples),
+             tagged with the "run" they belong to
+    state    a device's status after it started or stopped
+
+Every status carries the device's "run" id, which changes whenever a run
+starts or is resumed, so a client can drop samples of an earlier run that
+were still queued when it started a new one.
+
+Sample arrays travel as base64 of their little-endian bytes, which keeps
+long histories compact and cheap to decode.
+"""
+
+import base64
+import json
+
+import numpy as np
+
+SOCKET_PATH = "/var/tmp/incubator/acquisition.sock"
+
+SAMPLE_FIELDS = (
+    ("time", "<i8"),  # ms since the epoch
+    ("channel", "<u2"),
+    ("optical_density", "<f8"),
+    ("filtered_od", "<f8"),
+    ("outlier", "|u1"),
+)
+
+
+def encode_message(message):
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode_message(line):
+    return json.loads(line)
+
+
+def encode_samples(timestamps, channels, optical_densities, filtered, outliers):
+    """Packs a batch of processed samples (see ReactionIngest.append_processed)."""
+    values = (
+        np.asarray(timestamps, dtype="datetime64[ms]").astype(np.int64),
+        channels,
+        optical_densities,
+        filtered,
+        outliers,
+    )
+    return {
+        name: base64.b64encode(np.ascontiguousarray(column, dtype=dtype).tobytes()).decode()
+        for (name, dtype), column in zip(SAMPLE_FIELDS, values)
+    }
+
+
+def decode_samples(payload):
+    """Inverse of encode_samples: (timestamps, channels, ods, filtered, outliers)."""
+    columns = [
+        np.frombuffer(base64.b64decode(payload[name]), dtype=dtype)
+        for name, dtype in SAMPLE_FIELDS
+    ]
+    return (
+        columns[0].astype("datetime64[ms]"),
+        columns[1].astype(np.int64),
+        columns[2],
+        columns[3],
+        columns[4].astype(bool),
+    )
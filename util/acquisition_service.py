@@ -0,0 +1,398 @@
+import os
+import queue
+import selectors
+import socket
+import threading
+import time
+
+import numpy as np
+
+from util.acquisition_protocol import (
+    SOCKET_PATH,
+    decode_message,
+    encode_message,
+    encode_samples,
+)
+from util.calibration.calibration_registry import CalibrationRegistry
+from util.device_manager import DeviceManager
+
+
+# Returned by a command handler that replies later, from the loop
+_DEFERRED = object()
+
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.inbox = b""
+        self.outbox = bytearray()
+        self.attached = False
+
+
+class AcquisitionService:
+    """
+    Headless owner of the incubators: serial ports, conversion, journals and
+    storage, with no Tk in the process. A single loop polls every device
+    and serves clients on a Unix socket (see util.acquisition_protocol), so
+    a client that stalls or exits never delays a serial read.
+
+    Commands:
+
+        status                      every device's status
+        attach                      statuses plus each device's per-channel
+                                    sample counts; samples and state events
+                                    follow
+        history device channel offset [limit]
+                                    up to MAX_HISTORY_PAGE of a channel's
+                                    stored samples, for catching up after
+                                    attach
+        detach                      stop receiving events
+        start   device [agitations] [calibration_version] [metadata]
+        stop    device              -> archive path; the reply follows
+                                    once the archive is written, and the
+                                    loop keeps serving meanwhile
+        pause   device paused       the state event follows the firmware's
+                                    acknowledgement; an error event is sent
+                                    to the client if none comes
+        metadata device metadata    journal run metadata, e.g. the selection
+        snapshot device             -> sizes of the run's files to export
+        interrupted device          -> metadata of an unstopped run, or null
+        resume  device              resume it with its calibration version;
+                                    the state event carries the channel
+                                    counts to fetch with history
+        discard device              mark it stopped
+
+    Runs left unstopped by a crash or power cut are resumed from their
+    journals when the service starts. The GUI keeps its data in the same
+    directories (see DeviceManager), so it exports files directly. Clients are written to without
+    blocking; one that falls more than MAX_OUTBOX bytes behind is dropped.
+    """
+
+    POLL_INTERVAL = 0.02  # Seconds between device polls
+    MAX_OUTBOX = 64 << 20
+    MAX_HISTORY_PAGE = 50000  # Samples per history reply, about 2 MB encoded
+
+    def __init__(self, socket_path=SOCKET_PATH, ports=None, base_dir=None, registry=None):
+        self.socket_path = socket_path
+        self.calibrations = registry or CalibrationRegistry()
+        self.devices = DeviceManager(ports, base_dir)
+        self.clients = {}
+        self.selector = selectors.DefaultSelector()
+        self._stopping = False
+        # Archives being written on worker threads, by device name, and the
+        # finished ones waiting to be replied to from the loop
+        self._archiving = {}
+        self._archived = queue.Queue()
+        # Each device's run id (see util.acquisition_protocol)
+        self._runs = {device.name: 0 for device in self.devices.devices}
+
+        for device in self.devices.devices:
+            device.ingest.on_store = (
+                lambda *samples, device=device: self._on_store(device, samples)
+            )
+            self._resume(device)
+        self._paused = {device.name: device.paused for device in self.devices.devices}
+
+    def _resume(self, device):
+        metadata = device.interrupted()
+        if metadata is None:
+            return
+        calibration = self.calibrations.get(metadata.get("calibration_version"))
+        if calibration is None:
+            print(
+                f"{device.name}: calibration version {metadata.get('calibration_version')} "
+                "of the interrupted run was not found; not resuming"
+            )
+            return
+        device.resume_interrupted(calibration)
+
+    def _listen(self):
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        # A socket file left by a previous instance that is no longer running
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)
+            else:
+                raise RuntimeError(f"Acquisition service already running on {self.socket_path}")
+            finally:
+                probe.close()
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        # Any client can start and stop reactions, so only the owner may connect
+        os.chmod(self.socket_path, 0o600)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        print(f"Acquisition service listening on {self.socket_path}")
+
+    def serve_forever(self):
+        self._listen()
+        try:
+            next_poll = time.monotonic()
+            while not self._stopping:
+                timeout = max(next_poll - time.monotonic(), 0)
+                for key, mask in self.selector.select(timeout):
+                    if key.fileobj is self.server:
+                        self._accept()
+                        continue
+                    client = self.clients.get(key.fileobj)
+                    if client is None:
+                        continue
+                    if mask & selectors.EVENT_READ:
+                        self._read(client)
+                    if mask & selectors.EVENT_WRITE and client.sock in self.clients:
+                        self._write(client)
+                if time.monotonic() >= next_poll:
+                    self.devices.poll()
+                    self._broadcast_pauses()
+                    self._reply_archived()
+                    next_poll = time.monotonic() + self.POLL_INTERVAL
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        """Makes serve_forever return; safe to call from a signal handler."""
+        self._stopping = True
+
+    def _shutdown(self):
+        for client in list(self.clients.values()):
+            self._drop(client)
+        self.selector.unregister(self.server)
+        self.server.close()
+        os.remove(self.socket_path)
+        for thread in list(self._archiving.values()):
+            thread.join()
+        # Running reactions are left running and resumed on the next start
+        self.devices.close()
+        print("Acquisition service stopped")
+
+    def _accept(self):
+        sock, _ = self.server.accept()
+        sock.setblocking(False)
+        self.clients[sock] = _Client(sock)
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def _drop(self, client):
+        self.selector.unregister(client.sock)
+        del self.clients[client.sock]
+        client.sock.close()
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except ConnectionError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return
+        client.inbox += data
+        *lines, client.inbox = client.inbox.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self._handle(client, line)
+
+    def _send(self, client, message):
+        if client.sock not in self.clients:
+            return
+        if not client.outbox:
+            self.selector.modify(client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        client.outbox += encode_message(message)
+        if len(client.outbox) > self.MAX_OUTBOX:
+            print("Dropping an acquisition client that stopped reading")
+            self._drop(client)
+
+    def _write(self, client):
+        try:
+            sent = client.sock.send(client.outbox)
+        except BlockingIOError:
+            return
+        except ConnectionError:
+            self._drop(client)
+            return
+        del client.outbox[:sent]
+        if not client.outbox:
+            self.selector.modify(client.sock, selectors.EVENT_READ)
+
+    def _handle(self, client, line):
+        request = {}
+        try:
+            request = decode_message(line)
+            handler = getattr(self, f"_cmd_{request.get('cmd')}", None)
+            if handler is None:
+                raise ValueError(f"unknown command {request.get('cmd')!r}")
+            reply = handler(client, request) or {}
+            if reply is _DEFERRED:
+                return
+            reply.update(id=request.get("id"), ok=True)
+        except Exception as e:
+            reply = {"id": request.get("id"), "ok": False, "error": str(e)}
+        self._send(client, reply)
+
+    def _broadcast(self, message):
+        for client in list(self.clients.values()):
+            if client.attached:
+                self._send(client, message)
+
+    def _on_store(self, device, samples):
+        if any(client.attached for client in self.clients.values()):
+            self._broadcast(
+                {
+                    "event": "samples",
+                    "device": device.name,
+                    "run": self._runs[device.name],
+                    "samples": encode_samples(*samples),
+                }
+            )
+
+    def _status(self, device):
+        return dict(device.status(), run=self._runs[device.name])
+
+    def _broadcast_state(self, device, **extra):
+        status = self._status(device)
+        self._broadcast(dict(extra, event="state", device=device.name, status=status))
+        return status
+
+    def _broadcast_pauses(self):
+        # A pause takes effect when the firmware acknowledges it, during a poll
+        for device in self.devices.devices:
+            if device.paused != self._paused[device.name]:
+                self._paused[device.name] = device.paused
+                self._broadcast_state(device)
+
+    def _cmd_status(self, client, request):
+        return {"devices": [self._status(device) for device in self.devices.devices]}
+
+    def _cmd_attach(self, client, request):
+        client.attached = True
+        return {
+            "devices": [
+                dict(self._status(device), counts=[len(rd) for rd in device.ingest.data])
+                for device in self.devices.devices
+            ]
+        }
+
+    def _cmd_history(self, client, request):
+        device = self.devices.find(request["device"])
+        channel = int(request["channel"])
+        if not 1 <= channel <= len(device.ingest.data):
+            raise ValueError(f"{device.name} has no channel {channel}")
+        offset = int(request["offset"])
+        limit = min(int(request.get("limit", self.MAX_HISTORY_PAGE)), self.MAX_HISTORY_PAGE)
+        times, ods, _, filtered, outliers = device.ingest.data[channel - 1].get_slice(
+            offset, offset + limit
+        )
+        return {
+            "samples": encode_samples(
+                times, np.full(len(times), channel), ods, filtered, outliers
+            )
+        }
+
+    def _cmd_detach(self, client, request):
+        client.attached = False
+
+    def _check_archived(self, device):
+        # The archive thread reads the channel data until it finishes
+        if device.name in self._archiving:
+            raise ValueError(f"{device.name} is still writing its archive")
+
+    def _cmd_start(self, client, request):
+        device = self.devices.find(request["device"])
+        self._check_archived(device)
+        if device.running:
+            raise ValueError(f"{device.name} is already running")
+        version = request.get("calibration_version")
+        calibration = (
+            self.calibrations.get(version) if version else self.calibrations.latest()
+        )
+        if calibration is None:
+            raise ValueError("no calibration found")
+        self._runs[device.name] += 1
+        device.start(calibration, request.get("agitations", 5), **request.get("metadata", {}))
+        return {"status": self._broadcast_state(device)}
+
+    def _cmd_stop(self, client, request):
+        device = self.devices.find(request["device"])
+        self._check_archived(device)
+        if not device.running:
+            raise ValueError(f"{device.name} is not running")
+        device.halt()
+        # Closing the run files fsyncs them and the archive zips every
+        # channel, so both happen off the loop
+        thread = threading.Thread(
+            target=self._archive,
+            args=(device, client, request.get("id")),
+            name=f"archive-{device.name}",
+            daemon=True,
+        )
+        self._archiving[device.name] = thread
+        thread.start()
+        return _DEFERRED
+
+    def _archive(self, device, client, request_id):
+        try:
+            self._archived.put((device, client, request_id, device.archive(), None))
+        except Exception as e:
+            self._archived.put((device, client, request_id, None, e))
+
+    def _reply_archived(self):
+        while True:
+            try:
+                device, client, request_id, archive_path, error = self._archived.get_nowait()
+            except queue.Empty:
+                return
+            self._archiving.pop(device.name).join()
+            status = self._broadcast_state(device)
+            if error is not None:
+                reply = {"id": request_id, "ok": False, "error": str(error)}
+            else:
+                reply = {"id": request_id, "ok": True, "status": status, "archive": archive_path}
+            self._send(client, reply)
+
+    def _cmd_pause(self, client, request):
+        device = self.devices.find(request["device"])
+        if not device.running:
+            raise ValueError(f"{device.name} is not running")
+
+        def on_error(command, reason):
+            self._send(
+                client,
+                {"event": "error", "device": device.name, "command": command, "reason": reason},
+            )
+
+        device.set_paused(bool(request["paused"]), on_error=on_error)
+
+    def _cmd_metadata(self, client, request):
+        self.devices.find(request["device"]).write_metadata(**request["metadata"])
+
+    def _cmd_snapshot(self, client, request):
+        return {"sizes": self.devices.find(request["device"]).snapshot()}
+
+    def _cmd_interrupted(self, client, request):
+        return {"interrupted": self.devices.find(request["device"]).interrupted()}
+
+    def _cmd_resume(self, client, request):
+        device = self.devices.find(request["device"])
+        self._check_archived(device)
+        metadata = device.interrupted()
+        if metadata is None:
+            raise ValueError(f"{device.name} has no interrupted reaction")
+        version = metadata.get("calibration_version")
+        calibration = self.calibrations.get(version) if version else None
+        if calibration is None:
+            raise ValueError(f"calibration version {version} was not found")
+        # The rebuilt data would be one huge samples event; clients page it in instead
+        on_store, device.ingest.on_store = device.ingest.on_store, None
+        self._runs[device.name] += 1
+        try:
+            device.resume_interrupted(calibration)
+        finally:
+            device.ingest.on_store = on_store
+        counts = [len(rd) for rd in device.ingest.data]
+        return {"status": self._broadcast_state(device, counts=counts)}
+
+    def _cmd_discard(self, client, request):
+        self.devices.find(request["device"]).discard_interrupted()
@@ -0,0 +1,151 @@
+import struct
+
+import numpy as np
+
+# Binary reaction telemetry, negotiated with CMD:TELEMETRY_BINARY.
+#
+# Each sample is a 10-byte little-endian payload
+#     u8 type, u8 channel, u16 sequence, f32 value, u16 crc
+# where crc is CRC-16/CCITT-FALSE over the first 8 bytes. The payload is
+# COBS-encoded and sent as 0x00 <encoded> 0x00. Text lines never contain a
+# zero byte, so frames and text can share the port.
+
+FRAME_TYPE_SAMPLE = 0x01
+FRAME_FORMAT = "<BBHfH"
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+FRAME_DTYPE = np.dtype([
+    ("type", "u1"),
+    ("channel", "u1"),
+    ("sequence", "<u2"),
+    ("value", "<f4"),
+    ("crc", "<u2"),
+])
+SAMPLE_DTYPE = np.dtype([("channel", "u1"), ("sequence", "<u2"), ("value", "<f4")])
+DELIMITER = b"\x00"
+
+
+def _crc16_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16_TABLE = _crc16_table()
+_CRC16_TABLE_NP = np.array(_CRC16_TABLE, dtype=np.uint16)
+
+
+def crc16(data):
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ byte]
+    return crc
+
+
+def crc16_rows(rows):
+    """CRC-16/CCITT-FALSE of every row of a 2-D uint8 array at once."""
+    crc = np.full(rows.shape[0], 0xFFFF, dtype=np.uint16)
+    for column in rows.T:
+        crc = (crc << 8) ^ _CRC16_TABLE_NP[(crc >> 8) ^ column]
+    return crc
+
+
+def cobs_encode(data):
+    out = bytearray()
+    block = bytearray()
+    for byte in data:
+        if byte == 0:
+            out.append(len(block) + 1)
+            out += block
+            block.clear()
+        else:
+            block.append(byte)
+            if len(block) == 254:
+                out.append(255)
+                out += block
+                block.clear()
+    out.append(len(block) + 1)
+    out += block
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """Decodes one COBS block. Returns None if the block is malformed."""
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n:
+            return None
+        out += data[i + 1:i + code]
+        i += code
+        if code < 255 and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def encode_sample(channel, sequence, value):
+    """Returns a complete, delimited frame for one reaction sample."""
+    body = struct.pack("<BBHf", FRAME_TYPE_SAMPLE, channel, sequence & 0xFFFF, value)
+    payload = body + struct.pack("<H", crc16(body))
+    return DELIMITER + cobs_encode(payload) + DELIMITER
+
+
+class TelemetryDecoder:
+    """
+    Decodes batches of COBS frames into a structured array of samples.
+
+    Frames that fail COBS decoding, have the wrong size or type, or fail
+    the CRC are counted in `corrupt` and skipped. Gaps in the sequence
+    numbers between accepted frames that the corrupt frames do not account
+    for are counted in `dropped`, so each lost frame is counted once.
+    """
+
+    def __init__(self):
+        self.corrupt = 0
+        self.dropped = 0
+        self._last_sequence = None
+        self._unaccounted_corrupt = 0
+
+    def decode(self, frames):
+        payloads = []
+        corrupt = 0
+        for frame in frames:
+            payload = cobs_decode(frame)
+            if payload is None or len(payload) != FRAME_SIZE:
+                corrupt += 1
+            else:
+                payloads.append(payload)
+        if not payloads:
+            self.corrupt += corrupt
+            self._unaccounted_corrupt += corrupt
+            return np.empty(0, dtype=SAMPLE_DTYPE)
+
+        raw = np.frombuffer(b"".join(payloads), dtype=np.uint8).reshape(-1, FRAME_SIZE)
+        records = raw.view(FRAME_DTYPE).reshape(-1)
+        valid = (crc16_rows(raw[:, :FRAME_SIZE - 2]) == records["crc"]) & (
+            records["type"] == FRAME_TYPE_SAMPLE
+        )
+        corrupt += int(len(records) - valid.sum())
+        self.corrupt += corrupt
+        self._unaccounted_corrupt += corrupt
+        records = records[valid]
+        if not len(records):
+            return np.empty(0, dtype=SAMPLE_DTYPE)
+
+        sequence = records["sequence"].astype(np.int64)
+        previous = sequence[0] - 1 if self._last_sequence is None else self._last_sequence
+        gaps = int(((np.diff(sequence, prepend=previous) - 1) % 65536).sum())
+        # Corrupt frames since the last accepted one fill part of the gap
+        self.dropped += max(gaps - self._unaccounted_corrupt, 0)
+        self._unaccounted_corrupt = 0
+        self._last_sequence = int(sequence[-1])
+
+        samples = np.empty(len(records), dtype=SAMPLE_DTYPE)
+        for name in SAMPLE_DTYPE.names:
+            samples[name] = records[name]
+        return samples
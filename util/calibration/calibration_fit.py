@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class LogFit:
+    """
+    Result of fitting y = a*log10(x) + b. Every attribute has the batch
+    shape of the inputs (a scalar for a single dataset); covariance has two
+    extra trailing axes ordered (a, b).
+    """
+
+    def __init__(self, a, b, covariance, r_squared):
+        self.a = a
+        self.b = b
+        self.covariance = covariance
+        self.r_squared = r_squared
+
+
+def fit_log_calibration(x, y, sigma=None, absolute_sigma=False):
+    """
+    Fits y = a*log10(x) + b by (weighted) linear least squares in closed form.
+
+    x and y have shape (..., n): the last axis holds the points of one
+    dataset and any leading axes are fitted independently in one pass.
+    Points where x <= 0 or any input is NaN are ignored, so ragged batches
+    can be padded with NaN. sigma gives per-point standard deviations of y;
+    weights are 1/sigma^2. As with scipy's curve_fit, the covariance is
+    scaled by the reduced chi-square unless absolute_sigma is True.
+    R^2 is the ordinary (unweighted) coefficient of determination.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x, y = np.broadcast_arrays(x, y)
+
+    valid = np.isfinite(x) & np.isfinite(y) & (x > 0)
+    if sigma is None:
+        w = valid.astype(np.float64)
+    else:
+        sigma = np.broadcast_to(np.asarray(sigma, dtype=np.float64), x.shape)
+        valid &= np.isfinite(sigma) & (sigma > 0)
+        w = np.where(valid, 1.0 / np.where(valid, sigma, 1.0) ** 2, 0.0)
+
+    u = np.where(valid, np.log10(np.where(valid, x, 1.0)), 0.0)
+    y0 = np.where(valid, y, 0.0)
+
+    s = w.sum(axis=-1)
+    su = (w * u).sum(axis=-1)
+    suu = (w * u * u).sum(axis=-1)
+    sy = (w * y0).sum(axis=-1)
+    suy = (w * u * y0).sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = s * suu - su * su
+        a = (s * suy - su * sy) / det
+        b = (suu * sy - su * suy) / det
+
+        residuals = np.where(valid, y0 - (a[..., None] * u + b[..., None]), 0.0)
+        covariance = np.stack(
+            [np.stack([s, -su], axis=-1), np.stack([-su, suu], axis=-1)], axis=-2
+        ) / det[..., None, None]
+        if not absolute_sigma:
+            dof = valid.sum(axis=-1) - 2
+            chi2 = (w * residuals ** 2).sum(axis=-1)
+            covariance = covariance * (chi2 / dof)[..., None, None]
+
+        n = valid.sum(axis=-1)
+        y_mean = y0.sum(axis=-1) / n
+        ss_res = (residuals ** 2).sum(axis=-1)
+        ss_tot = (np.where(valid, y0 - y_mean[..., None], 0.0) ** 2).sum(axis=-1)
+        r_squared = 1 - ss_res / ss_tot
+
+    if a.ndim == 0:
+        return LogFit(float(a), float(b), covariance, float(r_squared))
+    return LogFit(a, b, covariance, r_squared)
@@ -0,0 +1,148 @@
+import numpy as np
+
+from util.calibration.calibration_fit import fit_log_calibration
+from util.calibration.calibration_table import CalibrationTable
+
+
+class CalibrationJob:
+    """
+    Multi-run calibration driven by serial events instead of a blocking loop.
+
+    Each run sends CMD:CALIBRATE + CHANNELS:n, collects one OD:<voltage>
+    reading per standard and ends at CMD:CALIBRATION_FINISHED. After every
+    run the per-channel voltage mean and variance are updated with Welford's
+    algorithm and the curve is refitted on the means, so callers can show
+    progress as it happens. The job ends after `runs` runs, or earlier once
+    at least `min_runs` have completed and no channel's standard deviation
+    moved by more than `convergence` (relative) in the last run.
+
+    standards is a list of (channel, OD) pairs, one per reading the firmware
+    will report, in order. on_run(job) is called after each run and
+    on_done(job) once the job leaves the RUNNING state.
+    """
+
+    RUNNING = "RUNNING"
+    FINISHED = "FINISHED"
+    CONVERGED = "CONVERGED"
+    CANCELLED = "CANCELLED"
+    FAILED = "FAILED"
+
+    PREFIXES = ("OD:", "CMD:CALIBRATION_FINISHED")
+
+    def __init__(
+        self,
+        connection,
+        standards,
+        runs=10,
+        min_runs=3,
+        convergence=0.1,
+        on_run=None,
+        on_done=None,
+    ):
+        self.connection = connection
+        self.channels = np.array([channel for channel, _ in standards], dtype=np.int64)
+        self.ods = np.array([od for _, od in standards], dtype=np.float64)
+        self.runs = runs
+        self.min_runs = max(min_runs, 2)
+        self.convergence = convergence
+        self.on_run = on_run
+        self.on_done = on_done
+
+        self.state = None
+        self.error = None
+        self.results = []  # Per run: a list of [channel, voltage, OD]
+
+        # Welford accumulators over runs, one slot per standard
+        self.count = 0
+        self.mean = np.zeros(len(self.channels))
+        self._m2 = np.zeros(len(self.channels))
+        self._previous_std = None
+
+        self.fit = None
+        self.table = None
+        self._readings = []
+
+    @property
+    def std(self):
+        """Sample standard deviation of each standard's voltage (NaN before two runs)."""
+        if self.count < 2:
+            return np.full(len(self.channels), np.nan)
+        return np.sqrt(self._m2 / (self.count - 1))
+
+    def start(self):
+        self.state = self.RUNNING
+        self.connection.subscribe(self.PREFIXES, self._on_line)
+        self._start_run()
+
+    def cancel(self):
+        if self.state != self.RUNNING:
+            return
+        self.connection.unsubscribe(self._on_line)
+        self.connection.send("CMD:CANCEL_CALIBRATION")
+        self._finish(self.CANCELLED)
+
+    def _start_run(self):
+        self._readings = []
+        self.connection.send("CMD:CALIBRATE")
+        self.connection.send("CHANNELS:" + str(len(self.channels)))
+
+    def _on_line(self, arrival, line):
+        if line.startswith("OD:"):
+            try:
+                self._readings.append(float(line[3:]))
+            except ValueError as ve:
+                print(f"ValueError: {ve}")
+        elif line.startswith("CMD:CALIBRATION_FINISHED"):
+            self._complete_run()
+
+    def _complete_run(self):
+        if len(self._readings) < len(self.channels):
+            self.connection.unsubscribe(self._on_line)
+            self.error = (
+                f"Run {self.count + 1} returned {len(self._readings)} readings "
+                f"for {len(self.channels)} standards."
+            )
+            self._finish(self.FAILED)
+            return
+
+        voltages = np.array(self._readings[:len(self.channels)], dtype=np.float64)
+        self.results.append(
+            [[int(c), float(v), float(od)] for c, v, od in zip(self.channels, voltages, self.ods)]
+        )
+        print(f"Calibration results for run {self.count + 1}: {self.results[-1]}")
+
+        # Welford's update of the running mean and sum of squared deviations
+        self.count += 1
+        delta = voltages - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (voltages - self.mean)
+
+        self._refit()
+        if self.on_run is not None:
+            self.on_run(self)
+
+        if self.count >= self.runs:
+            self.connection.unsubscribe(self._on_line)
+            self._finish(self.FINISHED)
+        elif self._converged():
+            self.connection.unsubscribe(self._on_line)
+            self._finish(self.CONVERGED)
+        else:
+            self._start_run()
+
+    def _refit(self):
+        self.fit = fit_log_calibration(self.mean, self.ods)
+        self.table = CalibrationTable.from_runs(self.results, self.fit.a, self.fit.b)
+
+    def _converged(self):
+        std = self.std
+        previous, self._previous_std = self._previous_std, std
+        if self.count < self.min_runs or previous is None:
+            return False
+        change = np.abs(std - previous)
+        return bool(np.all(change <= self.convergence * np.maximum(std, previous)))
+
+    def _finish(self, state):
+        self.state = state
+        if self.on_done is not None:
+            self.on_done(self)
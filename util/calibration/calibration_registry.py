@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from util.calibration.calibration_table import CalibrationTable
+
+
+class CalibrationRecord:
+    """One saved calibration: the global curve, its per-channel table and a version."""
+
+    def __init__(self, version, timestamp, a, b, r_squared, table):
+        self.version = version
+        self.timestamp = timestamp
+        self.a = a
+        self.b = b
+        self.r_squared = r_squared
+        self.table = table
+
+    def to_json(self):
+        return json.dumps({
+            "version": self.version,
+            "timestamp": self.timestamp,
+            "a": self.a,
+            "b": self.b,
+            "r_squared": self.r_squared,
+            "channel_a": self.table.slopes.tolist(),
+            "channel_b": self.table.intercepts.tolist(),
+        })
+
+    @classmethod
+    def from_json(cls, line):
+        fields = json.loads(line)
+        table = CalibrationTable(fields["a"], fields["b"], len(fields["channel_a"]))
+        table.slopes[:] = fields["channel_a"]
+        table.intercepts[:] = fields["channel_b"]
+        return cls(
+            fields["version"],
+            fields["timestamp"],
+            fields["a"],
+            fields["b"],
+            fields["r_squared"],
+            table,
+        )
+
+
+class CalibrationRegistry:
+    """
+    Versioned history of calibrations in a JSON-lines file, one record per line.
+
+    Every add() writes the whole history plus the new record to a temporary
+    file, fsyncs it and renames it over the old one, so a power cut leaves
+    either the old or the new history and never a torn record. The latest
+    record is cached in memory and re-read only when the file's inode, mtime
+    or size changes; it is read by seeking back from the end of the file, so
+    the cost does not grow with the history. A run pins the version it used
+    and can look it up again with get().
+    """
+
+    DEFAULT_PATH = "/var/tmp/incubator/calibrations.jsonl"
+    LEGACY_PATH = "/var/tmp/incubator/calibrations.csv"
+    READ_BLOCK = 4096
+
+    def __init__(self, path=DEFAULT_PATH, n_channels=50):
+        self.path = path
+        self.n_channels = n_channels
+        self._latest = None
+        self._latest_key = None
+        self._records = {}
+        self._migrate_legacy()
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def latest(self):
+        """Returns the newest CalibrationRecord, or None if there is none."""
+        key = self._stat_key()
+        if key != self._latest_key:
+            line = self._read_last_line() if key is not None else None
+            self._latest = CalibrationRecord.from_json(line) if line else None
+            if self._latest is not None:
+                self._records[self._latest.version] = self._latest
+            self._latest_key = key
+        return self._latest
+
+    def get(self, version):
+        """Returns the record with the given version, or None if it does not exist."""
+        record = self._records.get(version)
+        if record is None and os.path.isfile(self.path):
+            # Records never change once written, so a scan fills the cache for good
+            with open(self.path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        found = CalibrationRecord.from_json(line)
+                        self._records[found.version] = found
+            record = self._records.get(version)
+        return record
+
+    def add(self, a, b, r_squared, table=None, timestamp=None):
+        """Appends a new calibration as the next version and returns its record."""
+        if table is None:
+            table = CalibrationTable(a, b, self.n_channels)
+        latest = self.latest()
+        record = CalibrationRecord(
+            1 if latest is None else latest.version + 1,
+            timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            float(a),
+            float(b),
+            float(r_squared),
+            table,
+        )
+        self._append_line(record.to_json())
+        self._records[record.version] = record
+        return record
+
+    def _append_line(self, line):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            if os.path.isfile(self.path):
+                with open(self.path, "rb") as src:
+                    shutil.copyfileobj(src, out)
+            out.write(line.encode("utf-8") + b"\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _read_last_line(self):
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            # Step back a block at a time until a whole line is in view
+            while position > 0 and tail.rstrip(b"\n").count(b"\n") == 0:
+                step = min(self.READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                tail = f.read(step) + tail
+        lines = tail.rstrip(b"\n").split(b"\n")
+        return lines[-1].decode("utf-8") if lines[-1] else None
+
+    def _migrate_legacy(self):
+        """Imports the single calibration of the old calibrations.csv as version 1."""
+        if os.path.exists(self.path) or not os.path.isfile(self.LEGACY_PATH):
+            return
+        try:
+            with open(self.LEGACY_PATH, "r", newline="") as f:
+                rows = list(csv.DictReader(f))
+            if not rows:
+                return
+            # CSV format is: timestamp, a, b, r_squared
+            row = rows[-1]
+            a, b = float(row["a"]), float(row["b"])
+            r_squared = float(row["r_squared"]) if row.get("r_squared") else np.nan
+            self.add(a, b, r_squared, timestamp=row["timestamp"])
+            print(f"Migrated calibration from {self.LEGACY_PATH} to {self.path}")
+        except (IOError, KeyError, ValueError) as e:
+            print(f"Could not migrate legacy calibration file: {e}")
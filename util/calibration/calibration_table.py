@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class CalibrationTable:
+    """
+    Per-channel calibration curves OD = a[c]*log10(raw) + b[c], stored as
+    arrays indexed by channel - 1.
+
+    Channels without their own coefficients use the global curve. convert()
+    applies the curves to a whole batch of (channel, raw) readings at once.
+    """
+
+    def __init__(self, a, b, n_channels=50):
+        self.a = float(a)
+        self.b = float(b)
+        self.slopes = np.full(n_channels, self.a)
+        self.intercepts = np.full(n_channels, self.b)
+
+    @classmethod
+    def from_runs(cls, data, a, b, n_channels=50):
+        """
+        Builds a table from calibration runs (a list of runs, each a list of
+        [channel, voltage, OD] points) and the global fit (a, b).
+
+        Every channel holds a single standard, so its data cannot pin down a
+        slope of its own. The slope stays global and each channel gets its
+        own intercept: the mean over all runs of OD - a*log10(V), solved for
+        every channel in one pass.
+        """
+        table = cls(a, b, n_channels)
+        points = np.asarray(
+            [point for run in data for point in run], dtype=np.float64
+        ).reshape(-1, 3)
+        valid = np.isfinite(points).all(axis=1) & (points[:, 1] > 0)
+        channels = points[valid, 0].astype(np.int64)
+        valid_channel = (channels >= 1) & (channels <= n_channels)
+        channels = channels[valid_channel] - 1
+        voltages = points[valid, 1][valid_channel]
+        ods = points[valid, 2][valid_channel]
+
+        counts = np.bincount(channels, minlength=n_channels)
+        offsets = np.bincount(
+            channels, weights=ods - table.a * np.log10(voltages), minlength=n_channels
+        )
+        seen = counts > 0
+        table.intercepts[seen] = offsets[seen] / counts[seen]
+        return table
+
+    def convert(self, channels, raw_values):
+        """
+        Converts raw readings to OD. channels are 1-based; readings that are
+        not positive or belong to an unknown channel become NaN.
+        """
+        channels = np.asarray(channels, dtype=np.int64)
+        raw_values = np.asarray(raw_values, dtype=np.float64)
+        index = channels - 1
+        known = (index >= 0) & (index < len(self.slopes)) & (raw_values > 0)
+        index = np.where(known, index, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            od = self.slopes[index] * np.log10(raw_values) + self.intercepts[index]
+        return np.where(known, od, np.nan)
@@ -0,0 +1,446 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import serial
+
+from util.reaction.ingest_worker import IngestWorker
+from util.reaction.outliers import RollingMadDetector
+from util.reaction.reaction_ingest import ReactionIngest
+from util.reaction.run_journal import RunJournal
+from util.reaction.smoothing import SavitzkyGolayFilter
+from util.uart_connection import UARTConnection
+from util.uart_util import UARTUtil
+
+
+class Device:
+    """
+    One incubator board: its UARTConnection (with its own reader thread),
+    the ReactionIngest holding its channels, an IngestWorker thread that
+    converts, smooths and writes its readings, and a storage directory.
+    poll() only hands raw readings to the worker and stores the batches it
+    finished, so the boards' processing runs side by side.
+
+    Channel numbers are per device, so channel 12 on two boards is two
+    different cultures; channel_id() qualifies them, e.g. "ttyACM1:12".
+
+    A device runs its own reactions: start() and stop() keep the journal,
+    CSV logs and calibration pin in data_dir, the columnar history in
+    column_dir and the final archives in archive_dir. RunView drives the
+    primary device through this interface, the dashboard the others and
+    the acquisition daemon all of them.
+    """
+
+    EXCLUDE_OUTLIERS = True  # Keep flagged spikes out of the plot and growth metrics
+    JOURNAL_SYNC_INTERVAL = 1.0  # Seconds of samples a power cut may lose
+    # Inbound messages a running reaction consumes
+    REACTION_PREFIXES = ("OD:", "PAUSE SUCCESSFUL", "RESUME SUCCESSFUL", "odone")
+
+    def __init__(self, connection, directory, channels=50):
+        self.connection = connection
+        self.port = connection.ser.port
+        self.name = os.path.basename(self.port)
+        self.directory = directory
+        self.ingest = ReactionIngest(channels)
+        self.ingest.set_filter(SavitzkyGolayFilter(channels))
+        self.ingest.set_outlier_detector(
+            RollingMadDetector(channels), exclude=self.EXCLUDE_OUTLIERS
+        )
+        self.calibration = None
+        self.started = None
+        self.paused = False
+        self._pending_samples = []
+        # A run left unstopped, read from the journal once: (metadata, samples, length)
+        self._interrupted = self._read_interrupted()
+        self.worker = IngestWorker(self.ingest, name=f"ingest-{self.name}")
+        self.worker.start()
+
+    @property
+    def running(self):
+        return self.ingest.csv_log is not None
+
+    @property
+    def data_dir(self):
+        return os.path.join(self.directory, "tmp_data")
+
+    @property
+    def column_dir(self):
+        # Outside data_dir, so exports of it skip the history
+        return os.path.join(self.directory, "run_columns")
+
+    @property
+    def archive_dir(self):
+        return os.path.join(self.directory, "processedcsvs")
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.data_dir, "run.journal")
+
+    def channel_id(self, channel_number):
+        return f"{self.name}:{channel_number}"
+
+    def status(self):
+        """JSON-serialisable summary of the device and its run."""
+        return {
+            "name": self.name,
+            "port": self.port,
+            "channels": len(self.ingest.data),
+            "running": self.running,
+            "paused": self.paused,
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "calibration_version": self.calibration.version if self.calibration else None,
+            "samples": sum(len(rd) for rd in self.ingest.data),
+            "data_dir": self.data_dir,
+            "archive_dir": self.archive_dir,
+        }
+
+    def _read_interrupted(self):
+        metadata, samples, length = RunJournal.read(self.journal_path)
+        if not metadata or metadata.get("stopped"):
+            return None
+        return metadata, samples, length
+
+    def interrupted(self):
+        """
+        Returns the journaled metadata of a run this device left unstopped,
+        e.g. by a power cut, with its sample count under "samples"; None if
+        there is none. Such a run is resumed, or exported and discarded,
+        before a new one may start. The journal is read once, when the
+        device is opened, and only resuming or discarding the run changes it.
+        """
+        if self._interrupted is None:
+            return None
+        metadata, samples, _ = self._interrupted
+        return dict(metadata, samples=len(samples))
+
+    def resume_interrupted(self, calibration):
+        """Resumes the interrupted run with the calibration version it used."""
+        metadata, samples, length = self._interrupted
+        self._interrupted = None
+        self._truncate_journal(length)
+        self.resume(calibration, metadata, samples)
+
+    def _truncate_journal(self, length):
+        # Cut off a torn tail so the journal can be appended to again
+        dropped = RunJournal.truncate(self.journal_path, length)
+        if dropped:
+            print(f"{self.name}: dropped {dropped} bytes of torn run journal tail")
+
+    def discard_interrupted(self):
+        """Marks the interrupted run stopped; its files stay in data_dir until the next start."""
+        if self._interrupted is None:
+            return
+        self._truncate_journal(self._interrupted[2])
+        journal = RunJournal(self.journal_path)
+        journal.write_metadata({"stopped": True})
+        journal.close()
+        self._interrupted = None
+
+    def start(self, calibration, agitations=5, **metadata):
+        """
+        Starts a reaction converted with `calibration`, a CalibrationRecord.
+        Extra metadata, such as the channels selected for plotting, is
+        journaled with the run. Raises RuntimeError rather than delete an
+        interrupted run (see interrupted()).
+        """
+        if self.interrupted() is not None:
+            raise RuntimeError(
+                f"{self.name} has an interrupted reaction; resume or discard it first"
+            )
+        self.ingest.set_calibration_table(calibration.table)
+        self.calibration = calibration
+        self.started = datetime.now()
+        self.paused = False
+
+        if os.path.exists(self.data_dir):
+            shutil.rmtree(self.data_dir)
+        os.makedirs(self.data_dir)
+        journal = RunJournal(self.journal_path, sync_interval=self.JOURNAL_SYNC_INTERVAL)
+        with self.worker.lock:
+            journal.write_metadata(
+                dict(
+                    metadata,
+                    started=self.started.isoformat(timespec="seconds"),
+                    port=self.port,
+                    calibration_version=calibration.version,
+                    agitations=agitations,
+                    paused=False,
+                    stopped=False,
+                )
+            )
+            self.ingest.start(self.data_dir, journal=journal, column_dir=self.column_dir)
+        # Record the calibration version this run uses next to its data
+        with open(os.path.join(self.data_dir, "calibration.json"), "w") as f:
+            json.dump({"calibration_version": calibration.version}, f)
+        self._begin_acquisition(agitations)
+        print(f"{self.name}: reaction started")
+
+    def resume(self, calibration, metadata, samples):
+        """
+        Continues the run recorded in the device's journal (see
+        RunJournal.recover) after the process driving it was restarted.
+        """
+        self.ingest.set_calibration_table(calibration.table)
+        self.calibration = calibration
+        self.started = datetime.fromisoformat(metadata["started"])
+        self.paused = False
+
+        journal = RunJournal(self.journal_path, sync_interval=self.JOURNAL_SYNC_INTERVAL)
+        with self.worker.lock:
+            journal.write_metadata(
+                {"resumed": datetime.now().isoformat(timespec="seconds"), "paused": False}
+            )
+            torn_lines, backfilled = self.ingest.resume(
+                self.data_dir, journal, samples, column_dir=self.column_dir
+            )
+        self._begin_acquisition(metadata.get("agitations", 5))
+        print(f"{self.name}: resumed reaction with {len(samples)} samples")
+        if torn_lines or backfilled:
+            print(
+                f"{self.name}: cut {torn_lines} torn CSV lines and restored "
+                f"{backfilled} journal rows missing from the CSV logs"
+            )
+
+    def _begin_acquisition(self, agitations):
+        self.connection.subscribe(self.REACTION_PREFIXES, self._handle_line)
+        self.connection.subscribe_telemetry(self._handle_telemetry)
+        self.connection.send("AGITATIONS:" + str(agitations))
+        self.connection.send("CMD:RUNREACTION")
+
+    def set_paused(self, paused, on_error=None):
+        """
+        Asks the firmware to pause or resume sampling. `paused` follows the
+        firmware's acknowledgement; on_error(command, reason) runs if none
+        comes.
+        """
+        command = "CMD:PAUSE_REACTION" if paused else "CMD:RESUME_REACTION"
+        self.connection.send_command(command, on_error=on_error)
+
+    def write_metadata(self, **metadata):
+        """Journals run metadata, e.g. the channel selection, while running."""
+        with self.worker.lock:
+            if self.ingest.journal is not None:
+                self.ingest.journal.write_metadata(metadata)
+
+    def snapshot(self):
+        """
+        Flushes the run's files and returns {path: length in bytes} for the
+        growing ones, so data_dir can be exported while the run carries on.
+        """
+        sizes = {}
+        with self.worker.lock:
+            if self.ingest.csv_log is not None:
+                sizes.update(self.ingest.csv_log.snapshot())
+            if self.ingest.journal is not None:
+                sizes.update(self.ingest.journal.snapshot())
+        return sizes
+
+    def stop(self):
+        """
+        Stops the reaction and archives its data in archive_dir. Returns the
+        archive path, or None if no data was recorded.
+        """
+        self.halt()
+        return self.archive()
+
+    def halt(self):
+        """
+        The part of stop() that talks to the board: cancels the reaction,
+        stores the samples still queued and journals the stop. archive()
+        must follow; it only touches files, so it may run on another thread.
+        """
+        self.connection.send("CMD:CANCEL_REACTION")
+        self.connection.unsubscribe(self._handle_line)
+        self.connection.unsubscribe(self._handle_telemetry)
+        self.settle()
+        self.write_metadata(stopped=True)
+        self.paused = False
+
+    def archive(self):
+        """
+        Closes the halted run's files and zips its data into archive_dir.
+        Returns the archive path, or None if no data was recorded.
+        """
+        with self.worker.lock:
+            self.ingest.stop()
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archive_path = os.path.join(self.archive_dir, f"reaction_data_{timestamp}.zip")
+        if not self.ingest.write_archive(archive_path, self.calibration.to_json()):
+            return None
+        print(f"{self.name}: reaction stopped, data in {archive_path}")
+        return archive_path
+
+    def _handle_line(self, arrival, line):
+        if line.startswith("PAUSE SUCCESSFUL"):
+            self.paused = True
+            self.write_metadata(paused=True)
+        elif line.startswith("RESUME SUCCESSFUL"):
+            self.paused = False
+            self.write_metadata(paused=False)
+        elif line.startswith("odone"):
+            print(f"{self.name}: {line}")
+        elif "CH:" in line and not self.paused:
+            try:
+                channel_number, raw_value = self.ingest.parse_line(line)
+            except ValueError as e:
+                print(f"{self.name}: error parsing UART line: '{line}'. Error: {e}")
+                return
+            # Lines from one poll are converted and stored together
+            self._pending_samples.append((arrival, channel_number, raw_value))
+
+    def _handle_telemetry(self, arrival, samples):
+        # Binary frames carry the same channel/raw value pairs as OD:...CH:... lines
+        if self.paused:
+            return
+        self._record_samples(
+            np.full(len(samples), arrival), samples["channel"], samples["value"]
+        )
+
+    def record_pending(self):
+        """Hands the text readings received since the last call to the worker."""
+        if not self._pending_samples:
+            return
+        arrivals, channels, raw_values = zip(*self._pending_samples)
+        self._pending_samples = []
+        self._record_samples(np.array(arrivals), channels, raw_values)
+
+    def _record_samples(self, arrivals, channels, raw_values):
+        # Timestamp samples when they arrived, not when they were handled
+        timestamps = (self.connection.wall_time(arrivals) * 1000).astype("datetime64[ms]")
+        self.worker.submit(timestamps, channels, raw_values)
+
+    def _store_finished(self):
+        for batch in self.worker.drain():
+            self.ingest.append_processed(*batch)
+
+    def settle(self):
+        """Waits for the worker to process every reading received so far and stores them."""
+        self.record_pending()
+        self.worker.wait()
+        self._store_finished()
+
+    def poll(self):
+        """Dispatches inbound lines to the worker and stores the batches it finished."""
+        self.connection.poll()
+        self.record_pending()
+        self._store_finished()
+
+
+class DeviceManager:
+    """
+    Every incubator attached to this host, one Device per serial port.
+
+    Each device reads its port on its own thread and stores into its own
+    ReactionIngest and directory, so the boards run independently; poll()
+    services all of them from the Tk loop. Only ports whose firmware
+    answers a ping become devices. The first of them is the primary one,
+    the board RunView and the calibration screen talk to.
+
+    The primary device keeps its data directly in base_dir, the app's
+    original layout, and every other device in base_dir/devices/<port>.
+    The GUI and the acquisition daemon share that layout, so either one
+    finds the runs the other left unstopped.
+    """
+
+    BASE_DIR = "/var/tmp/incubator"
+    # The board resets when its port opens, so the ping gets time to boot
+    PROBE_TIMEOUT = 1.0
+    PROBE_RETRIES = 3
+
+    def __init__(self, ports=None, base_dir=None, channels=50):
+        ports = UARTUtil.list_ports() if ports is None else ports
+        base_dir = base_dir or self.BASE_DIR
+        connections = []
+        for port in ports:
+            try:
+                # Nothing but the ping is written until the firmware answers
+                connections.append(UARTConnection(port, binary_telemetry=False))
+            except serial.SerialException as e:
+                print(f"Could not open {port}: {e}")
+
+        self.devices = []
+        for connection in self._probe(connections):
+            connection.negotiate_binary_telemetry()
+            port = connection.ser.port
+            if self.devices:
+                directory = os.path.join(base_dir, "devices", os.path.basename(port))
+            else:
+                directory = base_dir
+            device = Device(connection, directory, channels)
+            self.devices.append(device)
+            print(f"Incubator connected on {port}")
+        if not self.devices:
+            raise serial.SerialException(
+                "No incubator found on " + (", ".join(ports) or "any serial port")
+            )
+
+    def _probe(self, connections):
+        """
+        Pings every port at once with CMD:TESTCONNECTION and returns the
+        connections whose firmware answered. A board that did not reset
+        when its port opened may still be running a reaction, which ignores
+        the ping, so streaming reaction data counts as an answer too. Other
+        serial adapters on the host are closed and never sent anything else.
+        """
+        answered = {}
+        streaming = {}
+        for connection in connections:
+            answered[connection] = None
+            streaming[connection] = lambda arrival, data, c=connection: answered.__setitem__(c, True)
+            connection.subscribe(("OD:", "odone"), streaming[connection])
+            connection.subscribe_telemetry(streaming[connection])
+            connection.send_command(
+                "CMD:TESTCONNECTION",
+                timeout=self.PROBE_TIMEOUT,
+                retries=self.PROBE_RETRIES,
+                on_complete=lambda reply, c=connection: answered.__setitem__(c, True),
+                on_error=lambda command, reason, c=connection: answered.__setitem__(c, bool(answered[c])),
+            )
+        while None in answered.values():
+            for connection in connections:
+                if answered[connection] is None:
+                    connection.poll()
+            time.sleep(0.01)
+
+        found = []
+        for connection in connections:
+            connection.unsubscribe(streaming[connection])
+            # A streaming board never answers; its ping would hold up the queue
+            connection.cancel("CMD:TESTCONNECTION")
+            if answered[connection]:
+                found.append(connection)
+            else:
+                print(f"No incubator answered on {connection.ser.port}; closing it")
+                connection.close()
+        return found
+
+    @property
+    def primary(self):
+        return self.devices[0]
+
+    def find(self, name):
+        for device in self.devices:
+            if device.name == name:
+                return device
+        raise KeyError(name)
+
+    def poll(self):
+        for device in self.devices:
+            device.poll()
+
+    def close(self):
+        """
+        Closes the ports without stopping running reactions. Their CSV logs,
+        run files and journals are flushed and closed, but the journals are
+        not marked stopped, so the runs can be resumed.
+        """
+        for device in self.devices:
+            device.settle()
+            with device.worker.lock:
+                device.ingest.stop()
+            device.worker.stop()
+            device.connection.close()
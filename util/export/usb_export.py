@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+import zipfile
+
+USB_MOUNT_BASE = "/media/incubator"
+
+
+def find_usb_drives(base=USB_MOUNT_BASE):
+    """Returns the mount points of the USB drives mounted under `base`."""
+    if not os.path.exists(base):
+        return []
+    return [
+        os.path.join(base, d)
+        for d in sorted(os.listdir(base))
+        if os.path.ismount(os.path.join(base, d))
+    ]
+
+
+class _HashingWriter:
+    """
+    Write-only file wrapper that hashes and counts what passes through.
+    It has no seek/tell, so zipfile streams entries with data descriptors
+    instead of seeking back to patch headers.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+        self.bytes_written = 0
+
+    def write(self, data):
+        self._f.write(data)
+        self.sha256.update(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        self._f.flush()
+
+
+class UsbExport(threading.Thread):
+    """
+    Background thread that writes archives and file copies to a USB drive.
+
+    Each output is streamed straight to `<destination>.part` on the drive
+    (no local temporary copy), hashed as it is written, fsynced, read back
+    and checked against the hash, and only then renamed to its final name.
+    A failed or interrupted export therefore never leaves a file that looks
+    complete. Source files are read up to the size they had when the export
+    was queued, so files that are still growing give a consistent snapshot.
+
+    The Tk loop polls progress() and done; nothing here touches Tk.
+    """
+
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._tasks = []
+        self.outputs = []
+        self.error = None
+        self.done = False
+        self.current = None
+        self.total_bytes = 0
+        self.done_bytes = 0
+
+    def add_archive(self, src_dir, dst_path, sizes=None):
+        """
+        Queues a ZIP_DEFLATED archive of every file under src_dir. sizes may
+        map absolute file paths to the number of bytes to include, e.g. a
+        ReactionCSVLog.snapshot() taken while the files are still growing.
+        """
+        files = []
+        for root, _, names in os.walk(src_dir):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                size = os.path.getsize(path)
+                if sizes is not None:
+                    size = min(size, sizes.get(os.path.abspath(path), size))
+                files.append((path, os.path.relpath(path, src_dir), size))
+        self._tasks.append(("archive", files, dst_path))
+        self.total_bytes += sum(size for _, _, size in files)
+
+    def add_copy(self, src_path, dst_path):
+        size = os.path.getsize(src_path)
+        self._tasks.append(("copy", (src_path, size), dst_path))
+        self.total_bytes += size
+
+    def progress(self):
+        """Fraction of the source bytes written so far, from 0.0 to 1.0."""
+        if not self.total_bytes:
+            return 1.0 if self.done else 0.0
+        return min(self.done_bytes / self.total_bytes, 1.0)
+
+    def run(self):
+        try:
+            for kind, source, dst_path in self._tasks:
+                self.current = os.path.basename(dst_path)
+                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                part_path = dst_path + ".part"
+                try:
+                    with open(part_path, "wb") as f:
+                        out = _HashingWriter(f)
+                        if kind == "archive":
+                            self._write_archive(out, source)
+                        else:
+                            self._write_copy(out, source)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._verify(part_path, out.sha256.hexdigest())
+                    os.replace(part_path, dst_path)
+                    self._fsync_dir(os.path.dirname(dst_path))
+                except BaseException:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+                self.outputs.append(dst_path)
+                print(f"Exported {dst_path} (sha256 {out.sha256.hexdigest()})")
+        except Exception as e:
+            print(f"USB export failed: {e}")
+            self.error = e
+        finally:
+            self.done = True
+
+    def _write_archive(self, out, files):
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zipf:
+            for path, arcname, size in files:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(path, "rb") as src, zipf.open(
+                    info, "w", force_zip64=size > zipfile.ZIP64_LIMIT
+                ) as dst:
+                    self._copy(src, dst, size)
+
+    def _write_copy(self, out, source):
+        path, size = source
+        with open(path, "rb") as src:
+            self._copy(src, out, size)
+
+    def _copy(self, src, dst, size):
+        remaining = size
+        while remaining > 0:
+            chunk = src.read(min(self.CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"{src.name} shrank while it was being exported")
+            dst.write(chunk)
+            remaining -= len(chunk)
+            self.done_bytes += len(chunk)
+
+    def _verify(self, path, expected):
+        with open(path, "rb") as f:
+            # Drop the cached pages so the check reads what reached the drive
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            sha256 = hashlib.sha256()
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        if sha256.hexdigest() != expected:
+            raise IOError(f"Checksum mismatch after writing {path}")
+
+    @staticmethod
+    def _fsync_dir(directory):
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,68 @@
+import numpy as np
+
+
+def minmax_downsample(x, y, n_buckets):
+    """
+    Reduces a sorted series to the minimum and maximum point of each of
+    n_buckets equal-width x buckets (typically one per horizontal pixel).
+    Keeps the visual envelope of the trace, including single-sample spikes.
+    NaN values never win a bucket; buckets of only NaNs keep one NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= 2 * n_buckets or n_buckets < 1 or x[-1] <= x[0]:
+        return x, y
+
+    bucket = ((x - x[0]) * (n_buckets / (x[-1] - x[0]))).astype(np.int64)
+    np.minimum(bucket, n_buckets - 1, out=bucket)
+
+    # Sorting by (bucket, y) puts each bucket's minimum first and maximum last
+    finite = np.isfinite(y)
+    by_min = np.lexsort((np.where(finite, y, np.inf), bucket))
+    by_max = np.lexsort((np.where(finite, y, -np.inf), bucket))
+
+    starts = np.flatnonzero(np.r_[True, bucket[by_min][1:] != bucket[by_min][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    keep = np.unique(np.concatenate((by_min[starts], by_max[ends])))
+    return x[keep], y[keep]
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling to n_out points. Picks, per
+    bucket, the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket. The first and last points are kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    next_mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    next_mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    next_mean_x = np.r_[next_mean_x[1:], x[-1]]
+    next_mean_y = np.r_[next_mean_y[1:], y[-1]]
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_mean_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_mean_y[i] - y[a])
+        )
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def downsample(x, y, n_pixels, method="minmax"):
+    if method == "lttb":
+        return lttb_downsample(x, y, n_pixels)
+    return minmax_downsample(x, y, n_pixels)
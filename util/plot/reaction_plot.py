@@ -0,0 +1,164 @@
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+
+from util.plot.downsample import downsample
+
+
+class ReactionPlot:
+    """
+    Live OD-vs-time plot that keeps one Line2D per selected channel.
+
+    Lines are updated in place with set_data and drawn with blitting on top
+    of a cached background (axes, grid, legend). A full redraw only happens
+    when the channel selection or the axis limits change. The time window
+    advances in WINDOW_STEP increments so the limits stay put between steps.
+    Each line is reduced to about one point pair per horizontal pixel.
+    """
+
+    WINDOW = np.timedelta64(30, "m")
+    WINDOW_STEP = np.timedelta64(5, "m")
+    Y_MARGIN = 0.1
+    MIN_Y_SPAN = 0.05
+    DOWNSAMPLE_METHOD = "minmax"  # or "lttb"
+    SERIES = "filtered_od"  # ReactionData column to plot, or "optical_density"
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.lines = {}
+        self._reduced = {}
+
+        self._selection = []
+        self._background = None
+        self._window_end = None
+
+        self.ax.set_title("Optical Density vs Time")
+        self.ax.set_xlabel("Time")
+        self.ax.set_ylabel("OD")
+        self.ax.grid(True)
+        self.ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        self.ax.tick_params(axis="x", labelrotation=30)
+
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def set_selection(self, channels):
+        """
+        Shows lines for the given 1-based channel numbers.
+        Returns True if the selection changed.
+        """
+        channels = list(channels)
+        if channels == self._selection:
+            return False
+
+        for channel in set(self.lines) - set(channels):
+            self.lines.pop(channel).remove()
+            self._reduced.pop(channel, None)
+
+        colors = plt.get_cmap("tab10").colors
+        for i, channel in enumerate(channels):
+            line = self.lines.get(channel)
+            if line is None:
+                (line,) = self.ax.plot([], [], linewidth=2, animated=True)
+                self.lines[channel] = line
+            line.set_color(colors[i % len(colors)])
+            line.set_label(f"Channel {channel}")
+
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        if channels:
+            self.ax.legend(handles=[self.lines[c] for c in channels])
+
+        self._selection = channels
+        self._request_full_draw()
+        return True
+
+    def update(self, data):
+        """Refreshes the selected lines from a list of ReactionData, indexed by channel - 1."""
+        latest = None
+        for channel in self._selection:
+            sample = data[channel - 1].get_latest()
+            if sample is not None:
+                t = sample["time"]
+                latest = t if latest is None else max(latest, t)
+
+        if latest is not None and (self._window_end is None or latest > self._window_end):
+            # Snap the right edge forward so the x limits change only once per step
+            step = self.WINDOW_STEP.astype("timedelta64[ms]").astype(np.int64)
+            end_ms = (latest.astype(np.int64) // step + 1) * step
+            self._window_end = np.datetime64(int(end_ms), "ms")
+            start = self._window_end - self.WINDOW
+            self.ax.set_xlim(mdates.date2num(start), mdates.date2num(self._window_end))
+            self._background = None
+
+        y_min, y_max = np.inf, -np.inf
+        window_start = None if self._window_end is None else self._window_end - self.WINDOW
+        n_pixels = max(int(self.ax.bbox.width), 1)
+        for channel in self._selection:
+            line = self.lines[channel]
+            if window_start is None:
+                line.set_data([], [])
+                continue
+            x, y = self._reduced_series(data[channel - 1], channel, window_start, n_pixels)
+            line.set_data(x, y)
+            finite = y[np.isfinite(y)]
+            if finite.size:
+                y_min = min(y_min, finite.min())
+                y_max = max(y_max, finite.max())
+
+        if np.isfinite(y_min):
+            self._fit_y(y_min, y_max)
+
+        self.draw()
+
+    def _reduced_series(self, reaction_data, channel, window_start, n_pixels):
+        # The reduced series only changes when the window moves, the channel
+        # receives samples or the axes are resized, so reuse it otherwise.
+        key = (window_start, self._window_end, len(reaction_data), n_pixels)
+        cached = self._reduced.get(channel)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        times, ods = reaction_data.get_range(window_start, self.SERIES)
+        # Join the line across missing samples, e.g. excluded outliers
+        present = np.isfinite(ods)
+        if not present.all():
+            times, ods = times[present], ods[present]
+        x, y = downsample(mdates.date2num(times), ods, n_pixels, self.DOWNSAMPLE_METHOD)
+        self._reduced[channel] = (key, x, y)
+        return x, y
+
+    def _fit_y(self, y_min, y_max):
+        low, high = self.ax.get_ylim()
+        span = y_max - y_min
+        if span < self.MIN_Y_SPAN:
+            middle = (y_max + y_min) / 2
+            y_min, y_max = middle - self.MIN_Y_SPAN / 2, middle + self.MIN_Y_SPAN / 2
+            span = self.MIN_Y_SPAN
+        # Only rescale when the data leaves the current limits or occupies a
+        # small fraction of them, otherwise keep the cached background valid.
+        if y_min < low or y_max > high or (high - low) > 4 * span:
+            margin = span * self.Y_MARGIN
+            self.ax.set_ylim(y_min - margin, y_max + margin)
+            self._background = None
+
+    def draw(self):
+        if self._background is None:
+            self._request_full_draw()
+            return
+        self.canvas.restore_region(self._background)
+        for channel in self._selection:
+            self.ax.draw_artist(self.lines[channel])
+        self.canvas.blit(self.ax.bbox)
+
+    def _request_full_draw(self):
+        self._background = None
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event):
+        # Cache everything except the data lines, then paint the lines on top
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for channel in self._selection:
+            self.ax.draw_artist(self.lines[channel])
@@ -0,0 +1,45 @@
+import time
+
+
+class RenderScheduler:
+    """
+    Coalesces redraw requests for a Tk-hosted plot.
+
+    mark_dirty() is cheap and can be called for every incoming sample; the
+    render callback then runs at most max_fps times per second on the Tk
+    loop. render_now() bypasses the cap for user-driven changes.
+    """
+
+    def __init__(self, widget, render, max_fps=2.0):
+        self.widget = widget
+        self.render = render
+        self.interval = 1.0 / max_fps
+
+        self._dirty = False
+        self._pending = None
+        self._last_render = float("-inf")
+
+    def mark_dirty(self):
+        self._dirty = True
+        if self._pending is None:
+            delay = max(0.0, self._last_render + self.interval - time.monotonic())
+            self._pending = self.widget.after(int(delay * 1000), self._on_timer)
+
+    def render_now(self):
+        self.cancel()
+        self._render()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def _on_timer(self):
+        self._pending = None
+        if self._dirty:
+            self._render()
+
+    def _render(self):
+        self._dirty = False
+        self._last_render = time.monotonic()
+        self.render()
@@ -0,0 +1,244 @@
+import csv
+
+import numpy as np
+
+from util.reaction.smoothing import channel_rounds
+
+
+class GrowthAnalytics:
+    """
+    Live growth-curve metrics for every channel, updated as samples arrive.
+
+    Each channel keeps its last WINDOW samples of (hours since its first
+    sample, ln OD) in one row of a channels x WINDOW ring buffer, together
+    with the running sums of a least-squares line through them. A new
+    sample replaces the oldest one and adjusts the sums, so each update is
+    O(1) per channel and is done for all channels at once with NumPy
+    fancy indexing. The slope of the window fit is the specific growth rate.
+
+    From the steepest well-fitting window seen so far it derives:
+
+        max_growth_rate  1/h, slope of ln OD
+        doubling_time    h, ln 2 / max_growth_rate
+        lag_time         h, where the tangent at the steepest window meets
+                         the initial ln OD (the first window's fit at the
+                         channel's first sample)
+        max_od           highest OD seen
+
+    Non-positive or missing OD readings have no logarithm and are skipped.
+    """
+
+    WINDOW = 20  # Samples per sliding fit
+    MIN_POINTS = 5  # Samples before a growth rate is reported
+    MIN_R_SQUARED = 0.95  # Fit quality needed for the max growth rate
+    METRICS = (
+        "growth_rate", "max_growth_rate", "doubling_time", "lag_time", "max_od", "samples",
+    )
+
+    def __init__(self, channels=50, window=None):
+        self.channels = channels
+        self.window = window or self.WINDOW
+        self.reset()
+
+    def reset(self):
+        c, w = self.channels, self.window
+        self._t = np.zeros((c, w))
+        self._y = np.zeros((c, w))
+        self._pos = np.zeros(c, dtype=np.int64)
+        self._n = np.zeros(c, dtype=np.int64)
+        self.samples = np.zeros(c, dtype=np.int64)
+        # Running sums over the window, with t taken relative to _origin so
+        # they keep their precision on long runs
+        self._origin = np.zeros(c)
+        self._st = np.zeros(c)
+        self._sy = np.zeros(c)
+        self._stt = np.zeros(c)
+        self._sty = np.zeros(c)
+        self._syy = np.zeros(c)
+
+        self._start = np.full(c, np.nan)
+        self._y0 = np.full(c, np.nan)
+        self._max_t = np.full(c, np.nan)
+        self._max_y = np.full(c, np.nan)
+        self.growth_rate = np.full(c, np.nan)
+        self.max_growth_rate = np.full(c, np.nan)
+        self.max_od = np.full(c, np.nan)
+
+    def update(self, timestamps, channels, optical_densities):
+        """
+        Adds a batch of samples: timestamps (datetime64), 1-based channel
+        numbers and OD values, in arrival order.
+        """
+        hours = np.asarray(timestamps, dtype="datetime64[ms]").astype(np.int64) / 3.6e6
+        channels = np.asarray(channels, dtype=np.int64) - 1
+        ods = np.asarray(optical_densities, dtype=np.float64)
+
+        valid = (ods > 0) & np.isfinite(ods)
+        if not valid.all():
+            hours, channels, ods = hours[valid], channels[valid], ods[valid]
+        if len(channels) == 0:
+            return
+
+        # Apply the batch in rounds holding at most one sample per channel,
+        # so each round is a single vectorized step over distinct channels
+        if np.bincount(channels).max() <= self.window:
+            for step in channel_rounds(channels):
+                self._step(channels[step], hours[step], ods[step])
+            return
+
+        # A replayed run: fit every window of each channel in one pass
+        order = np.argsort(channels, kind="stable")
+        bounds = np.flatnonzero(np.diff(channels[order])) + 1
+        for group in np.split(order, bounds):
+            self._extend(int(channels[group[0]]), hours[group], ods[group])
+
+    def _step(self, c, hours, ods):
+        new = np.isnan(self._start[c])
+        self._start[c[new]] = hours[new]
+        t = hours - self._start[c]
+        y = np.log(ods)
+
+        # Drop the sample being overwritten from the sums once the window is full
+        pos = self._pos[c]
+        full = self._n[c] == self.window
+        old_t = np.where(full, self._t[c, pos] - self._origin[c], 0.0)
+        old_y = np.where(full, self._y[c, pos], 0.0)
+        rel = t - self._origin[c]
+        self._st[c] += rel - old_t
+        self._sy[c] += y - old_y
+        self._stt[c] += rel * rel - old_t * old_t
+        self._sty[c] += rel * y - old_t * old_y
+        self._syy[c] += y * y - old_y * old_y
+
+        self._t[c, pos] = t
+        self._y[c, pos] = y
+        self._n[c] = np.minimum(self._n[c] + 1, self.window)
+        self._pos[c] = (pos + 1) % self.window
+        self.samples[c] += 1
+        self.max_od[c] = np.fmax(self.max_od[c], ods)
+
+        # Once per lap of the ring, rebase and recompute the sums exactly
+        wrapped = c[self._pos[c] == 0]
+        if len(wrapped):
+            self._recompute(wrapped)
+
+        self._fit(c)
+
+    def _extend(self, c, hours, ods):
+        if self._n[c] + len(ods) < self.window:
+            for i in range(len(ods)):
+                self._step(np.array([c]), hours[i:i + 1], ods[i:i + 1])
+            return
+        if np.isnan(self._start[c]):
+            self._start[c] = hours[0]
+        n_old = self._n[c]
+        # The current window in time order, followed by the new samples
+        ring = np.roll(np.arange(self.window), -self._pos[c])[self.window - n_old:]
+        t = np.concatenate((self._t[c, ring], hours - self._start[c]))
+        y = np.concatenate((self._y[c, ring], np.log(ods)))
+
+        # Every full window that ends on a new sample, centred for precision
+        first = max(n_old - self.window + 1, 0)
+        windows_t = np.lib.stride_tricks.sliding_window_view(t, self.window)[first:]
+        windows_y = np.lib.stride_tricks.sliding_window_view(y, self.window)[first:]
+        mean_t = windows_t.mean(axis=1)
+        mean_y = windows_y.mean(axis=1)
+        dt = windows_t - mean_t[:, None]
+        dy = windows_y - mean_y[:, None]
+        sxx = (dt * dt).sum(axis=1)
+        sxy = (dt * dy).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = sxy / sxx
+            r_squared = np.where(syy > 0, sxy * sxy / (sxx * syy), 0.0)
+
+        if np.isnan(self._y0[c]):
+            self._y0[c] = mean_y[0] - np.nan_to_num(slope[0]) * mean_t[0]
+        candidates = np.flatnonzero(
+            (sxx > 0) & (r_squared >= self.MIN_R_SQUARED) & (slope > 0)
+        )
+        if len(candidates):
+            best = candidates[np.argmax(slope[candidates])]
+            if not slope[best] <= self.max_growth_rate[c]:
+                self.max_growth_rate[c] = slope[best]
+                self._max_t[c] = mean_t[best]
+                self._max_y[c] = mean_y[best]
+
+        self._t[c] = t[-self.window:]
+        self._y[c] = y[-self.window:]
+        self._n[c] = self.window
+        self._pos[c] = 0
+        self.samples[c] += len(ods)
+        self.max_od[c] = np.fmax(self.max_od[c], ods.max())
+        self._recompute(np.array([c]))
+        self._fit(np.array([c]))
+
+    def _recompute(self, c):
+        self._origin[c] = self._t[c, 0]
+        rel = self._t[c] - self._origin[c, None]
+        y = self._y[c]
+        self._st[c] = rel.sum(axis=1)
+        self._sy[c] = y.sum(axis=1)
+        self._stt[c] = (rel * rel).sum(axis=1)
+        self._sty[c] = (rel * y).sum(axis=1)
+        self._syy[c] = (y * y).sum(axis=1)
+
+    def _fit(self, c):
+        n = self._n[c].astype(np.float64)
+        sxx = n * self._stt[c] - self._st[c] ** 2
+        sxy = n * self._sty[c] - self._st[c] * self._sy[c]
+        syy = n * self._syy[c] - self._sy[c] ** 2
+        enough = (n >= self.MIN_POINTS) & (sxx > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(enough, sxy / sxx, np.nan)
+            r_squared = np.where(enough & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+        self.growth_rate[c] = slope
+
+        full = self._n[c] == self.window
+        mean_t = self._origin[c] + self._st[c] / np.maximum(n, 1)
+        mean_y = self._sy[c] / np.maximum(n, 1)
+
+        first_full = full & np.isnan(self._y0[c])
+        initial = mean_y - np.nan_to_num(slope) * mean_t
+        self._y0[c[first_full]] = initial[first_full]
+
+        steeper = (
+            full
+            & (r_squared >= self.MIN_R_SQUARED)
+            & (slope > 0)
+            & ~(slope <= self.max_growth_rate[c])
+        )
+        best = c[steeper]
+        self.max_growth_rate[best] = slope[steeper]
+        self._max_t[best] = mean_t[steeper]
+        self._max_y[best] = mean_y[steeper]
+
+    def metrics(self):
+        """Returns {metric: array indexed by channel - 1}; NaN where unknown."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            doubling_time = np.log(2) / self.max_growth_rate
+            lag_time = np.maximum(
+                self._max_t - (self._max_y - self._y0) / self.max_growth_rate, 0.0
+            )
+        return {
+            "growth_rate": self.growth_rate.copy(),
+            "max_growth_rate": self.max_growth_rate.copy(),
+            "doubling_time": doubling_time,
+            "lag_time": lag_time,
+            "max_od": self.max_od.copy(),
+            "samples": self.samples.copy(),
+        }
+
+    def export_csv(self, filepath):
+        """Writes one row of metrics per channel that has samples."""
+        metrics = self.metrics()
+        with open(filepath, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("channel",) + self.METRICS)
+            for i in np.flatnonzero(metrics["samples"]):
+                values = [metrics[m][i] for m in self.METRICS[:-1]]
+                writer.writerow(
+                    [i + 1]
+                    + ["" if np.isnan(v) else f"{v:.6g}" for v in values]
+                    + [int(metrics["samples"][i])]
+                )
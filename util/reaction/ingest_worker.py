@@ -0,0 +1,69 @@
+import queue
+import threading
+
+
+class IngestWorker(threading.Thread):
+    """
+    Runs a ReactionIngest's per-batch processing on its own thread:
+    conversion, outlier flags, smoothing and the journal and CSV writes
+    (ReactionIngest.process_batch). Each device has one, next to its
+    UARTReader, so the Tk loop only parses lines and stores finished
+    batches.
+
+    submit() queues raw readings and drain() returns the finished batches,
+    which the thread that owns the data passes to append_processed. That
+    thread holds `lock` whenever it touches the ingest's files itself
+    (start, resume, stop, metadata and snapshots).
+    """
+
+    FLUSH_INTERVAL = 0.1  # Seconds between checks for due CSV/journal flushes when idle
+
+    def __init__(self, ingest, name=None):
+        super().__init__(name=name, daemon=True)
+        self.ingest = ingest
+        self.lock = threading.Lock()
+        self._inbox = queue.Queue()
+        self._finished = queue.Queue()
+
+    def submit(self, timestamps, channels, raw_values):
+        self._inbox.put((timestamps, channels, raw_values))
+
+    def run(self):
+        while True:
+            try:
+                batch = self._inbox.get(timeout=self.FLUSH_INTERVAL)
+            except queue.Empty:
+                with self.lock:
+                    self.ingest.flush_if_due()
+                continue
+            try:
+                if batch is None:
+                    return
+                with self.lock:
+                    processed = self.ingest.process_batch(*batch)
+                    self.ingest.flush_if_due()
+                if processed is not None:
+                    self._finished.put(processed)
+            except Exception as e:
+                # A failed write must not stop the device's acquisition
+                print(f"{self.name}: dropped a batch of {len(batch[1])} readings: {e}")
+            finally:
+                self._inbox.task_done()
+
+    def drain(self):
+        """Returns the batches finished since the last call, oldest first."""
+        batches = []
+        while True:
+            try:
+                batches.append(self._finished.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def wait(self):
+        """Blocks until every submitted batch has been processed."""
+        self._inbox.join()
+
+    def stop(self, timeout=2.0):
+        self._inbox.put(None)
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,142 @@
+import bisect
+from collections import deque
+
+import numpy as np
+
+
+class RollingMadDetector:
+    """
+    Flags single-sample spikes, such as bubbles or condensation, against a
+    rolling median and median absolute deviation (MAD) per channel.
+
+    A sample is an outlier if it lies more than THRESHOLD scaled MADs from
+    the median of the channel's previous WINDOW samples. Each channel keeps
+    its window twice: in arrival order, to know which sample leaves next,
+    and sorted, maintained with bisect. The median is read off the sorted
+    window and the MAD is found by a binary search over the distances to
+    the median on either side of it, so a sample costs O(log WINDOW) plus a
+    short list shift, independent of the length of the run.
+
+    Outliers stay in the window, so a genuine step in OD is only flagged
+    until it makes up half the window. Missing (NaN) samples are ignored.
+    """
+
+    WINDOW = 15
+    THRESHOLD = 5.0
+    MIN_SAMPLES = 5  # Samples in the window before anything is flagged
+    MIN_MAD = 0.002  # OD; keeps flat, quantized signals from flagging noise
+    REPLAY_SAMPLES = 64  # Per-channel batch size that takes the bulk path
+    MAD_SCALE = 1.4826  # MAD of a normal distribution, in standard deviations
+
+    def __init__(self, channels=50, window=None, threshold=None):
+        self.channels = channels
+        self.window = window or self.WINDOW
+        self.threshold = self.THRESHOLD if threshold is None else threshold
+        self.reset()
+
+    def reset(self):
+        self._arrivals = [deque() for _ in range(self.channels)]
+        self._sorted = [[] for _ in range(self.channels)]
+
+    def update(self, channels, values):
+        """
+        Checks a batch of samples given as 1-based channel numbers and values
+        in arrival order. Returns a boolean array, True for outliers.
+        """
+        channels = np.asarray(channels, dtype=np.int64) - 1
+        values = np.asarray(values, dtype=np.float64)
+        flags = np.zeros(len(values), dtype=bool)
+
+        valid = np.flatnonzero(np.isfinite(values))
+        if len(valid) == 0:
+            return flags
+        if np.bincount(channels[valid]).max() <= self.REPLAY_SAMPLES:
+            for i, c, value in zip(valid, channels[valid].tolist(), values[valid].tolist()):
+                flags[i] = self._step(c, value)
+            return flags
+
+        # A replayed run: check each channel's samples in one pass
+        order = valid[np.argsort(channels[valid], kind="stable")]
+        bounds = np.flatnonzero(np.diff(channels[order])) + 1
+        for index in np.split(order, bounds):
+            flags[index] = self._extend(int(channels[index[0]]), values[index])
+        return flags
+
+    def _is_outlier(self, value, median, mad):
+        return abs(value - median) > self.threshold * self.MAD_SCALE * max(mad, self.MIN_MAD)
+
+    def _step(self, c, value):
+        arrivals = self._arrivals[c]
+        window = self._sorted[c]
+        outlier = False
+        if len(window) >= self.MIN_SAMPLES:
+            median, mad = self._median_mad(window)
+            outlier = self._is_outlier(value, median, mad)
+
+        if len(arrivals) == self.window:
+            del window[bisect.bisect_left(window, arrivals.popleft())]
+        arrivals.append(value)
+        bisect.insort(window, value)
+        return outlier
+
+    def _extend(self, c, values):
+        # Fill the window sample by sample, then check the rest against
+        # every full window at once
+        head = min(self.window - len(self._arrivals[c]), len(values))
+        flags = np.zeros(len(values), dtype=bool)
+        for i in range(head):
+            flags[i] = self._step(c, float(values[i]))
+        rest = values[head:]
+        if len(rest):
+            series = np.concatenate((np.fromiter(self._arrivals[c], float), rest))
+            windows = np.lib.stride_tricks.sliding_window_view(series, self.window)[:len(rest)]
+            median = np.median(windows, axis=1)
+            mad = np.median(np.abs(windows - median[:, None]), axis=1)
+            flags[head:] = np.abs(rest - median) > (
+                self.threshold * self.MAD_SCALE * np.maximum(mad, self.MIN_MAD)
+            )
+            last = series[-self.window:].tolist()
+            self._arrivals[c] = deque(last)
+            self._sorted[c] = sorted(last)
+        return flags
+
+    @staticmethod
+    def _median_mad(window):
+        n = len(window)
+        half = n // 2
+        if n % 2:
+            median = window[half]
+        else:
+            median = (window[half - 1] + window[half]) / 2
+
+        # Distances to the median, each side sorted ascending
+        split = bisect.bisect_left(window, median)
+        below, above = split, n - split
+
+        def near_below(i):
+            return median - window[split - 1 - i]
+
+        def near_above(j):
+            return window[split + j] - median
+
+        def kth(k):
+            # k-th smallest distance (0-based): binary search for how many
+            # come from below the median
+            lo, hi = max(0, k + 1 - above), min(k + 1, below)
+            while lo < hi:
+                i = (lo + hi) // 2
+                if near_above(k - i) > near_below(i):
+                    lo = i + 1
+                else:
+                    hi = i
+            j = k + 1 - lo
+            return max(
+                near_below(lo - 1) if lo > 0 else -np.inf,
+                near_above(j - 1) if j > 0 else -np.inf,
+            )
+
+        if n % 2:
+            mad = kth(half)
+        else:
+            mad = (kth(half - 1) + kth(half)) / 2
+        return median, mad
@@ -0,0 +1,136 @@
+import os
+import time as _time
+
+import numpy as np
+
+
+class ReactionCSVLog:
+    """
+    Append-only per-channel CSV persistence for a running reaction.
+
+    Rows are buffered in memory and written to channel_N_data.csv in batches,
+    either every `flush_interval` seconds or once `flush_rows` rows are pending.
+    Each flush writes whole lines and fsyncs, so after a power cut the files
+    hold every flushed sample in the same layout as ReactionData.export_csv.
+    """
+
+    HEADER = "time,optical_density,temperature,filtered_od,outlier\n"
+    READ_BLOCK = 4096
+
+    def __init__(self, directory, flush_interval=5.0, flush_rows=50):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.bytes_written = 0
+
+        self._files = {}
+        self._pending = {}
+        self._pending_rows = 0
+        self._last_flush = _time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, channel_number):
+        return os.path.join(self.directory, f"channel_{channel_number}_data.csv")
+
+    @staticmethod
+    def format_row(time, optical_density, temperature, filtered_od=None, outlier=False):
+        # Match the pandas to_csv layout: space-separated timestamp, empty NaN
+        stamp = np.datetime_as_string(np.datetime64(time, "ms"), unit="ms").replace("T", " ")
+        od, temp, filtered = (
+            "" if value is None or np.isnan(value) else repr(float(value))
+            for value in (optical_density, temperature, filtered_od)
+        )
+        return f"{stamp},{od},{temp},{filtered},{bool(outlier)}\n"
+
+    def repair(self, channel_number):
+        """
+        Cuts a torn last line, as left by a power cut mid-flush, off the
+        channel's file. Returns (last_time, dropped): the time of its last
+        row as datetime64, or None if the file has no rows, and the number
+        of bytes cut.
+        """
+        path = self.path_for(channel_number)
+        if not os.path.isfile(path):
+            return None, 0
+        with open(path, "r+b") as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            # Step back until the last complete line is in view
+            while position > 0 and tail.count(b"\n") < 2:
+                step = min(self.READ_BLOCK, position)
+                position -= step
+                f.seek(position)
+                tail = f.read(step) + tail
+            end = tail.rfind(b"\n") + 1
+            dropped = f.seek(0, os.SEEK_END) - (position + end)
+            if dropped:
+                f.truncate(position + end)
+                os.fsync(f.fileno())
+        lines = tail[:end].splitlines()
+        if not lines or lines[-1] + b"\n" == self.HEADER.encode():
+            return None, dropped
+        stamp = lines[-1].split(b",", 1)[0].decode()
+        return np.datetime64(stamp.replace(" ", "T"), "ms"), dropped
+
+    def append(
+        self, channel_number, time, optical_density, temperature, filtered_od=None, outlier=False
+    ):
+        self._pending.setdefault(channel_number, []).append(
+            self.format_row(time, optical_density, temperature, filtered_od, outlier)
+        )
+        self._pending_rows += 1
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush_if_due(self):
+        if self._pending_rows and _time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _open(self, channel_number):
+        f = self._files.get(channel_number)
+        if f is None:
+            f = open(self.path_for(channel_number), "a", newline="")
+            if f.tell() == 0:
+                f.write(self.HEADER)
+                self.bytes_written += len(self.HEADER)
+            self._files[channel_number] = f
+        return f
+
+    def flush(self):
+        """Writes all pending rows and makes them durable."""
+        touched = []
+        for channel_number, rows in self._pending.items():
+            if not rows:
+                continue
+            f = self._open(channel_number)
+            chunk = "".join(rows)
+            f.write(chunk)
+            self.bytes_written += len(chunk)
+            touched.append(f)
+            rows.clear()
+
+        for f in touched:
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._pending_rows = 0
+        self._last_flush = _time.monotonic()
+
+    def snapshot(self):
+        """
+        Flushes pending rows and returns {path: length in bytes} for every
+        channel file. Each length ends on a row boundary, so reading a file
+        up to it gives a consistent view while appends carry on behind it.
+        """
+        self.flush()
+        return {
+            os.path.abspath(f.name): os.fstat(f.fileno()).st_size
+            for f in self._files.values()
+        }
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
@@ -1,31 +1,256 @@
-import pandas as pd
+import numpy as np
+
 
 class ReactionData:
-    def __init__(self, channelNumber):
-        
+    # Samples are stored column-wise in fixed-size NumPy chunks so an append
+    # never copies the history. A full chunk is sealed and a new one started.
+    # With a ColumnarRunFile attached, a sealed chunk is written to the file
+    # instead and the whole history becomes one read-only memmap chunk, so
+    # memory stays bounded on multi-day runs.
+    # filtered_od is the optical density after the ingest path's smoothing
+    # filter (missing for excluded outliers); without one it equals
+    # optical_density. outlier flags samples the outlier detector rejected.
+    CHUNK_SIZE = 4096
+    COLUMNS = ['time', 'optical_density', 'temperature', 'filtered_od', 'outlier']
+
+    def __init__(self, channelNumber, run_file=None):
+
         self.channelNumber = channelNumber
-        self.data = pd.DataFrame(columns=['time', 'optical_density', 'temperature'])
-
-    def add_entry(self, time, optical_density, temperature):
-        if not isinstance(time, pd.Timestamp):
-            time = pd.to_datetime(time)
-        new_entry = pd.DataFrame([{
-            'time': time,
-            'optical_density': optical_density,
-            'temperature': temperature
-        }])
-        self.data = pd.concat([self.data, new_entry], ignore_index=True)
+        self.run_file = run_file
+        self.clear()
+
+    @classmethod
+    def open(cls, run_file, channelNumber):
+        """
+        Opens the samples stored in a ColumnarRunFile without reading them
+        into memory. New samples are appended after them.
+        """
+        rd = cls(channelNumber)
+        rd.run_file = run_file
+        times, ods, temps, filtered, outliers = run_file.columns()
+        if len(times):
+            rd._time_chunks.insert(0, times)
+            rd._od_chunks.insert(0, ods)
+            rd._temp_chunks.insert(0, temps)
+            rd._filtered_chunks.insert(0, filtered)
+            rd._outlier_chunks.insert(0, outliers)
+            rd._count = len(times)
+        return rd
+
+    def _new_chunk(self):
+        if self.run_file is not None and self._time_chunks:
+            self._spill()
+        self._time_chunks.append(np.empty(self.CHUNK_SIZE, dtype='datetime64[ms]'))
+        self._od_chunks.append(np.empty(self.CHUNK_SIZE, dtype=np.float64))
+        self._temp_chunks.append(np.empty(self.CHUNK_SIZE, dtype=np.float64))
+        self._filtered_chunks.append(np.empty(self.CHUNK_SIZE, dtype=np.float64))
+        self._outlier_chunks.append(np.zeros(self.CHUNK_SIZE, dtype=bool))
+        self._fill = 0
+        self._synced = 0
+
+    def _spill(self):
+        # Write the rows of the full chunk the file does not have yet, then
+        # replace everything sealed so far with the file's memmap
+        self.sync_run_file()
+        (
+            self._time_chunks,
+            self._od_chunks,
+            self._temp_chunks,
+            self._filtered_chunks,
+            self._outlier_chunks,
+        ) = ([column] for column in self.run_file.columns())
+
+    def sync_run_file(self):
+        """Writes the in-memory rows that are not in the run file yet."""
+        if self.run_file is None or self._synced == self._fill:
+            return
+        rows = slice(self._synced, self._fill)
+        self.run_file.append(
+            self._time_chunks[-1][rows],
+            self._od_chunks[-1][rows],
+            self._temp_chunks[-1][rows],
+            self._filtered_chunks[-1][rows],
+            self._outlier_chunks[-1][rows],
+        )
+        self._synced = self._fill
+
+    def add_entry(
+        self, time, optical_density, temperature, filtered_od=None, outlier=False
+    ):
+        if self._fill == self.CHUNK_SIZE:
+            self._new_chunk()
+
+        i = self._fill
+        self._time_chunks[-1][i] = np.datetime64(time, 'ms')
+        self._od_chunks[-1][i] = np.nan if optical_density is None else optical_density
+        self._temp_chunks[-1][i] = np.nan if temperature is None else temperature
+        self._filtered_chunks[-1][i] = (
+            self._od_chunks[-1][i] if filtered_od is None else filtered_od
+        )
+        self._outlier_chunks[-1][i] = outlier
+        self._fill += 1
+        self._count += 1
+        self._frame = None
+
+    def extend(
+        self, times, optical_densities, temperatures=None, filtered_ods=None, outliers=None
+    ):
+        """
+        Appends a batch of samples, copying whole slices into the chunks.
+        temperatures may be None when the batch has no temperature readings,
+        filtered_ods when it was not smoothed and outliers when it was not
+        checked.
+        """
+        times = np.asarray(times, dtype='datetime64[ms]')
+        ods = np.asarray(optical_densities, dtype=np.float64)
+        if temperatures is None:
+            temps = np.full(len(times), np.nan)
+        else:
+            temps = np.asarray(temperatures, dtype=np.float64)
+        if filtered_ods is None:
+            filtered = ods
+        else:
+            filtered = np.asarray(filtered_ods, dtype=np.float64)
+        if outliers is None:
+            flags = np.zeros(len(times), dtype=bool)
+        else:
+            flags = np.asarray(outliers, dtype=bool)
+
+        done = 0
+        while done < len(times):
+            if self._fill == self.CHUNK_SIZE:
+                self._new_chunk()
+            n = min(self.CHUNK_SIZE - self._fill, len(times) - done)
+            i = self._fill
+            self._time_chunks[-1][i:i + n] = times[done:done + n]
+            self._od_chunks[-1][i:i + n] = ods[done:done + n]
+            self._temp_chunks[-1][i:i + n] = temps[done:done + n]
+            self._filtered_chunks[-1][i:i + n] = filtered[done:done + n]
+            self._outlier_chunks[-1][i:i + n] = flags[done:done + n]
+            self._fill += n
+            self._count += n
+            done += n
+        self._frame = None
+
+    def __len__(self):
+        return self._count
+
+    def get_arrays(self):
+        """
+        Returns (time, optical_density, temperature, filtered_od, outlier) as
+        contiguous NumPy arrays.
+        The result is cached until the next add_entry/clear.
+        """
+        if self._arrays is None or len(self._arrays[0]) != self._count:
+            columns = []
+            for chunks in (
+                self._time_chunks,
+                self._od_chunks,
+                self._temp_chunks,
+                self._filtered_chunks,
+                self._outlier_chunks,
+            ):
+                parts = chunks[:-1] + [chunks[-1][:self._fill]]
+                columns.append(np.concatenate(parts) if len(parts) > 1 else parts[0].copy())
+            self._arrays = tuple(columns)
+        return self._arrays
+
+    def get_range(self, start, column='optical_density'):
+        """
+        Returns (time, values) arrays for samples at or after `start`, values
+        from `column` ('optical_density' or 'filtered_od'). Only the chunks
+        that overlap the range are touched, so the cost follows the size of
+        the range rather than the length of the run.
+        """
+        start = np.datetime64(start, 'ms')
+        value_chunks = self._filtered_chunks if column == 'filtered_od' else self._od_chunks
+        times, ods = [], []
+        for i in range(len(self._time_chunks) - 1, -1, -1):
+            n = self._fill if i == len(self._time_chunks) - 1 else len(self._time_chunks[i])
+            chunk_times = self._time_chunks[i][:n]
+            first = np.searchsorted(chunk_times, start)
+            times.append(chunk_times[first:])
+            ods.append(value_chunks[i][first:n])
+            if first > 0:
+                break
+        times.reverse()
+        ods.reverse()
+        return np.concatenate(times), np.concatenate(ods)
+
+    def get_slice(self, start, stop):
+        """
+        Returns (time, optical_density, temperature, filtered_od, outlier)
+        for the samples with indices start..stop-1, like slicing the arrays
+        from get_arrays(). Only the chunks that overlap the slice are
+        copied, so paging through a long run costs O(page) per call.
+        """
+        start, stop, _ = slice(start, stop).indices(self._count)
+        all_chunks = (
+            self._time_chunks,
+            self._od_chunks,
+            self._temp_chunks,
+            self._filtered_chunks,
+            self._outlier_chunks,
+        )
+        columns = tuple([] for _ in all_chunks)
+        offset = 0
+        for i in range(len(self._time_chunks)):
+            n = self._fill if i == len(self._time_chunks) - 1 else len(self._time_chunks[i])
+            first, last = max(start - offset, 0), min(stop - offset, n)
+            if first < last:
+                for parts, chunks in zip(columns, all_chunks):
+                    parts.append(chunks[i][first:last])
+            offset += n
+            if offset >= stop:
+                break
+        return tuple(
+            np.concatenate(parts) if parts else chunks[-1][:0].copy()
+            for parts, chunks in zip(columns, all_chunks)
+        )
 
     def get_all(self):
-        return self.data.copy()
+        # Materialize the DataFrame lazily and only once per batch of appends
+        if self._frame is None:
+            # pandas is only needed for exports, so keep it off the startup path
+            import pandas as pd
+
+            times, ods, temps, filtered, outliers = self.get_arrays()
+            self._frame = pd.DataFrame({
+                'time': times,
+                'optical_density': ods,
+                'temperature': temps,
+                'filtered_od': filtered,
+                'outlier': outliers,
+            }, columns=self.COLUMNS)
+        return self._frame.copy()
 
     def get_latest(self):
-        if not self.data.empty:
-            return self.data.iloc[-1].to_dict()
-        return None
+        if self._count == 0:
+            return None
+        # The newest sample is in the previous chunk while the current one is empty
+        chunk = -1 if self._fill else -2
+        i = self._fill - 1
+        temperature = self._temp_chunks[chunk][i]
+        return {
+            'time': self._time_chunks[chunk][i],
+            'optical_density': float(self._od_chunks[chunk][i]),
+            'temperature': None if np.isnan(temperature) else float(temperature),
+            'filtered_od': float(self._filtered_chunks[chunk][i]),
+            'outlier': bool(self._outlier_chunks[chunk][i]),
+        }
 
     def clear(self):
-        self.data = pd.DataFrame(columns=['time', 'optical_density', 'temperature'])
+        if self.run_file is not None:
+            self.run_file.remove()
+        self._time_chunks = []
+        self._od_chunks = []
+        self._temp_chunks = []
+        self._filtered_chunks = []
+        self._outlier_chunks = []
+        self._count = 0
+        self._arrays = None
+        self._frame = None
+        self._new_chunk()
 
     def export_csv(self, filepath):
-        self.data.to_csv(filepath, index=False)
\ No newline at end of file
+        self.get_all().to_csv(filepath, index=False)
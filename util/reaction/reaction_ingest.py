@@ -0,0 +1,291 @@
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from util.calibration.calibration_table import CalibrationTable
+from util.reaction.growth_analytics import GrowthAnalytics
+from util.reaction.reaction_csv_log import ReactionCSVLog
+from util.reaction.reaction_data import ReactionData
+from util.reaction.run_file import ColumnarRunFile
+
+
+class ReactionIngest:
+    """
+    Host-side ingestion path for reaction readings: parse, convert the raw
+    value to OD with the calibration curve, flag outliers and smooth it with
+    the optional detector and streaming filter, store both series in the
+    channel's ReactionData and append it to the channel's CSV log. Growth
+    analytics follow the smoothed series.
+
+    Holds no Tk state, so RunView, the benchmarks and tools all drive the
+    same code.
+    """
+
+    def __init__(self, channels=50):
+        self.data = [ReactionData(i) for i in range(channels)]
+        self.analytics = GrowthAnalytics(channels)
+        self.filter = None
+        self.outliers = None
+        self.exclude_outliers = False
+        # Called as on_store(timestamps, channels, ods, filtered, outliers)
+        # after each batch is stored, e.g. to stream it to clients
+        self.on_store = None
+        self.csv_log = None
+        self.journal = None
+        self.calibration = None
+
+    def set_calibration(self, a, b):
+        """Applies one global curve (a, b) to every channel; None clears it."""
+        if a is None or b is None:
+            self.calibration = None
+        else:
+            self.calibration = CalibrationTable(a, b, len(self.data))
+
+    def set_calibration_table(self, table):
+        self.calibration = table
+
+    def set_filter(self, stream_filter):
+        """Smooths OD with a StreamFilter from util.reaction.smoothing; None disables it."""
+        self.filter = stream_filter
+
+    def set_outlier_detector(self, detector, exclude=False):
+        """
+        Flags outliers with a RollingMadDetector; None disables it. With
+        exclude, flagged samples are kept out of the smoothed series, and so
+        out of the plot and the growth analytics.
+        """
+        self.outliers = detector
+        self.exclude_outliers = exclude
+
+    def start(self, csv_dir, journal=None, column_dir=None, **log_options):
+        """
+        Starts a run with empty data. Readings are appended to per-channel
+        CSV files in csv_dir and, if given, to a RunJournal. With column_dir,
+        each channel's history is kept in a ColumnarRunFile there instead of
+        in memory.
+        """
+        for i, rd in enumerate(self.data):
+            if rd.run_file is not None:
+                rd.run_file.close()
+            rd.run_file = (
+                ColumnarRunFile(column_dir, i + 1) if column_dir is not None else None
+            )
+            rd.clear()
+        self.analytics.reset()
+        if self.filter is not None:
+            self.filter.reset()
+        if self.outliers is not None:
+            self.outliers.reset()
+        self.csv_log = ReactionCSVLog(csv_dir, **log_options)
+        self.journal = journal
+
+    def resume(self, csv_dir, journal, samples, column_dir=None, **log_options):
+        """
+        Continues a run after a restart: rebuilds the data from the samples
+        recovered from its journal and keeps appending to the same files.
+        The journal is synced more often than the CSV logs, so each log is
+        cut back to its last whole row and given the journal's newer rows.
+        Returns (torn_lines, backfilled): the number of logs that had a torn
+        last line cut off and the number of rows restored from the journal.
+        """
+        self.start(csv_dir, journal, column_dir, **log_options)
+        timestamps = samples["time"].astype("datetime64[ms]")
+        channels = samples["channel"].astype(np.int64)
+        optical_densities = samples["optical_density"]
+        filtered, flags = self._store(timestamps, channels, optical_densities)
+
+        torn_lines = backfilled = 0
+        for channel_number in np.unique(channels).tolist():
+            rows = channels == channel_number
+            last_time, dropped = self.csv_log.repair(channel_number)
+            torn_lines += dropped > 0
+            if last_time is not None:
+                rows &= timestamps > last_time
+            for timestamp, od, filtered_od, outlier in zip(
+                timestamps[rows],
+                optical_densities[rows].tolist(),
+                filtered[rows].tolist(),
+                flags[rows].tolist(),
+            ):
+                self.csv_log.append(channel_number, timestamp, od, None, filtered_od, outlier)
+            backfilled += int(rows.sum())
+        self.csv_log.flush()
+        return torn_lines, backfilled
+
+    def stop(self):
+        for rd in self.data:
+            if rd.run_file is not None:
+                rd.sync_run_file()
+                rd.run_file.flush(durable=True)
+                rd.run_file.close()
+        if self.csv_log is not None:
+            self.csv_log.close()
+            self.csv_log = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def write_archive(self, archive_path, calibration_json=None):
+        """
+        Zips every channel with data (channel_N.csv), the growth metrics and,
+        if given, the calibration record the run used. Returns False, and
+        writes nothing, when no channel has data.
+        """
+        temp_dir = tempfile.mkdtemp(prefix="reaction_data_")
+        try:
+            for i, rd in enumerate(self.data):
+                if len(rd):
+                    rd.export_csv(os.path.join(temp_dir, f"channel_{i+1}.csv"))
+            if not os.listdir(temp_dir):
+                return False
+            self.analytics.export_csv(os.path.join(temp_dir, "growth_metrics.csv"))
+            if calibration_json is not None:
+                with open(os.path.join(temp_dir, "calibration.json"), "w") as f:
+                    f.write(calibration_json)
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                for root, _, files in os.walk(temp_dir):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        zipf.write(file_path, os.path.relpath(file_path, temp_dir))
+            return True
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @staticmethod
+    def parse_line(line):
+        """
+        Parses an "OD:<raw>CH:<channel>" line into (channel_number, raw_value).
+        Raises ValueError if the line is malformed.
+        """
+        # Split the line into parts based on the delimiters "OD:" and "CH:"
+        # Example line: "OD:1.234CH:5"
+        od_part, ch_part = line.split("CH:")
+
+        # Extract the raw float value for Optical Density
+        raw_value = float(od_part[3:])  # Slice to remove "OD:"
+
+        # Extract the integer value for the Channel number
+        channel_number = int(ch_part)
+        return channel_number, raw_value
+
+    def convert(self, channels, raw_values):
+        """
+        Converts a batch of raw sensor values to Optical Density with each
+        channel's calibration curve: OD = a[c] * log10(raw_value) + b[c].
+        Non-positive readings become NaN.
+        """
+        if self.calibration is None:
+            print("Warning: Calibration parameters not loaded. Returning raw value.")
+            return np.asarray(raw_values, dtype=np.float64)
+        return self.calibration.convert(channels, raw_values)
+
+    def record(self, timestamp, channel_number, raw_value):
+        """
+        Stores one reading taken at `timestamp` (datetime64). Returns False if
+        the channel number is out of range.
+        """
+        return self.record_batch([timestamp], [channel_number], [raw_value]) == 1
+
+    def record_batch(self, timestamps, channel_numbers, raw_values):
+        """
+        Stores a batch of readings: converts them in one call, appends each
+        channel's share to its ReactionData, CSV log and journal. Readings for channels
+        out of range are dropped. Returns the number of readings stored.
+        """
+        processed = self.process_batch(timestamps, channel_numbers, raw_values)
+        if processed is None:
+            return 0
+        self.append_processed(*processed)
+        return len(processed[1])
+
+    def process_batch(self, timestamps, channel_numbers, raw_values):
+        """
+        The part of record_batch that leaves the stored data alone: converts,
+        flags and smooths the readings and appends them to the journal and
+        CSV logs. Returns (timestamps, channels, ods, filtered, outliers) for
+        append_processed, or None when no reading was in range. An
+        IngestWorker runs it off the thread that owns the data.
+        """
+        timestamps = np.asarray(timestamps, dtype="datetime64[ms]")
+        channels = np.asarray(channel_numbers, dtype=np.int64)
+        raw_values = np.asarray(raw_values, dtype=np.float64)
+
+        # Channel numbers are 1-based, self.data is indexed from 0
+        in_range = (channels >= 1) & (channels <= len(self.data))
+        if not in_range.all():
+            timestamps = timestamps[in_range]
+            channels = channels[in_range]
+            raw_values = raw_values[in_range]
+        if len(channels) == 0:
+            return None
+
+        # Convert the raw values to calibrated OD
+        processed_od = self.convert(channels, raw_values)
+
+        filtered, flags = self._smooth(channels, processed_od)
+        if self.journal is not None:
+            self.journal.append_samples(timestamps, channels, raw_values, processed_od)
+
+        # Append only the new rows to the channels' CSV files
+        for timestamp, channel_number, od, filtered_od, outlier in zip(
+            timestamps,
+            channels.tolist(),
+            processed_od.tolist(),
+            filtered.tolist(),
+            flags.tolist(),
+        ):
+            self.csv_log.append(channel_number, timestamp, od, None, filtered_od, outlier)
+        return timestamps, channels, processed_od, filtered, flags
+
+    def _store(self, timestamps, channels, optical_densities):
+        filtered, flags = self._smooth(channels, optical_densities)
+        self.append_processed(timestamps, channels, optical_densities, filtered, flags)
+        return filtered, flags
+
+    def _smooth(self, channels, optical_densities):
+        if self.outliers is not None:
+            flags = self.outliers.update(channels, optical_densities)
+        else:
+            flags = np.zeros(len(channels), dtype=bool)
+        clean = optical_densities
+        if self.exclude_outliers and flags.any():
+            clean = np.where(flags, np.nan, optical_densities)
+        if self.filter is not None:
+            filtered = self.filter.update(channels, clean)
+        else:
+            filtered = clean
+        return filtered, flags
+
+    def append_processed(self, timestamps, channels, optical_densities, filtered, outliers):
+        """
+        Stores samples that were already filtered and checked for outliers,
+        such as a copy of another ingest's data; 1-based channel numbers.
+        """
+        self.analytics.update(timestamps, channels, filtered)
+        # Group by channel, keeping arrival order within each channel
+        order = np.argsort(channels, kind="stable")
+        sorted_channels = channels[order]
+        bounds = np.flatnonzero(np.diff(sorted_channels)) + 1
+        for group in np.split(order, bounds):
+            if len(group) == 0:
+                continue
+            channel_number = int(channels[group[0]])
+            self.data[channel_number - 1].extend(
+                timestamps[group],
+                optical_densities[group],
+                None,
+                filtered[group],
+                outliers[group],
+            )
+        if self.on_store is not None:
+            self.on_store(timestamps, channels, optical_densities, filtered, outliers)
+
+    def flush_if_due(self):
+        if self.csv_log is not None:
+            self.csv_log.flush_if_due()
+        if self.journal is not None:
+            self.journal.flush_if_due()
@@ -0,0 +1,166 @@
+import os
+import struct
+
+import numpy as np
+
+
+class ColumnarRunFile:
+    """
+    Binary columnar storage for one channel of a run.
+
+    Each column is its own file in `directory`, a 32-byte header followed by
+    fixed-width little-endian values:
+
+        channel_N.time   int64 milliseconds since the epoch
+        channel_N.od     float64 optical density
+        channel_N.temp   float64 temperature (NaN when not measured)
+        channel_N.filt   float64 smoothed optical density
+        channel_N.flag   uint8 1 for samples flagged as outliers
+
+    The header holds MAGIC, the column's dtype string and the channel number.
+    Appending only ever extends the files; columns() maps them read-only
+    with numpy.memmap, so range reads are zero-copy slices of the page cache
+    rather than re-parsed CSV. A column left short by a crash is ignored
+    past the length of the shortest column.
+    """
+
+    MAGIC = b"INCCOL01"
+    HEADER = struct.Struct("<8s8sH14x")
+    COLUMNS = (
+        ("time", "<i8"), ("od", "<f8"), ("temp", "<f8"), ("filt", "<f8"), ("flag", "|u1"),
+    )
+
+    def __init__(self, directory, channel_number):
+        self.directory = directory
+        self.channel_number = channel_number
+        self.paths = [
+            os.path.join(directory, f"channel_{channel_number}.{suffix}")
+            for suffix, _ in self.COLUMNS
+        ]
+        self._files = None
+        self._columns = None
+
+    def __len__(self):
+        counts = []
+        for path, (_, dtype) in zip(self.paths, self.COLUMNS):
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                return 0
+            counts.append(max(size - self.HEADER.size, 0) // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def _open(self):
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._files = []
+            for path, (_, dtype) in zip(self.paths, self.COLUMNS):
+                f = open(path, "ab")
+                if f.tell() == 0:
+                    f.write(
+                        self.HEADER.pack(self.MAGIC, dtype.encode(), self.channel_number)
+                    )
+                self._files.append(f)
+        return self._files
+
+    def append(
+        self, times, optical_densities, temperatures, filtered_ods=None, outliers=None
+    ):
+        """
+        Appends rows; times are datetime64 or int64 milliseconds. Without
+        filtered_ods the smoothed column repeats the optical density; without
+        outliers no sample is flagged.
+        """
+        values = (
+            np.asarray(times).astype("datetime64[ms]").astype(np.int64),
+            optical_densities,
+            temperatures,
+            optical_densities if filtered_ods is None else filtered_ods,
+            np.zeros(len(times), dtype=bool) if outliers is None else outliers,
+        )
+        for f, column, (_, dtype) in zip(self._open(), values, self.COLUMNS):
+            f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+        self._columns = None
+
+    def flush(self, durable=False):
+        if self._files is not None:
+            for f in self._files:
+                f.flush()
+                if durable:
+                    os.fsync(f.fileno())
+
+    def columns(self):
+        """
+        Returns (time, optical_density, temperature, filtered_od, outlier) as
+        read-only memmaps, time viewed as datetime64[ms] and outlier as bool.
+        Cached until the next append.
+        """
+        if self._columns is None:
+            self.flush()
+            n = len(self)
+            columns = []
+            for path, (_, dtype) in zip(self.paths, self.COLUMNS):
+                if n == 0:
+                    columns.append(np.empty(0, dtype=dtype))
+                    continue
+                self._check_header(path, dtype)
+                columns.append(
+                    np.memmap(path, dtype=dtype, mode="r", offset=self.HEADER.size, shape=(n,))
+                )
+            columns[0] = columns[0].view("datetime64[ms]")
+            columns[4] = columns[4].view(bool)
+            self._columns = tuple(columns)
+        return self._columns
+
+    def get_range(self, start):
+        """Returns zero-copy (time, optical_density) slices for samples at or after `start`."""
+        times, ods = self.columns()[:2]
+        first = np.searchsorted(times, np.datetime64(start, "ms"))
+        return times[first:], ods[first:]
+
+    def _check_header(self, path, dtype):
+        with open(path, "rb") as f:
+            magic, stored_dtype, _ = self.HEADER.unpack(f.read(self.HEADER.size))
+        if magic != self.MAGIC or stored_dtype.rstrip(b"\0").decode() != dtype:
+            raise ValueError(f"{path} is not a {dtype} run column")
+
+    def remove(self):
+        """Deletes the files. Existing memmaps keep the old data readable."""
+        self.close()
+        self._columns = None
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+
+def run_file_to_csv(run_file, csv_path):
+    """Writes a run file in the CSV layout of ReactionData.export_csv."""
+    from util.reaction.reaction_data import ReactionData
+
+    ReactionData.open(run_file, run_file.channel_number - 1).export_csv(csv_path)
+
+
+def csv_to_run_file(csv_path, run_file):
+    """
+    Appends the rows of an export_csv / ReactionCSVLog CSV to a run file.
+    CSVs without a filtered_od column get the optical density there, and
+    without an outlier column no sample is flagged.
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(csv_path, parse_dates=["time"])
+    filtered = frame["filtered_od"] if "filtered_od" in frame else frame["optical_density"]
+    run_file.append(
+        frame["time"].to_numpy(dtype="datetime64[ms]"),
+        frame["optical_density"].to_numpy(dtype=np.float64),
+        frame["temperature"].to_numpy(dtype=np.float64),
+        filtered.to_numpy(dtype=np.float64),
+        frame["outlier"].to_numpy(dtype=bool) if "outlier" in frame else None,
+    )
+    run_file.flush(durable=True)
@@ -0,0 +1,164 @@
+import json
+import os
+import struct
+import time as _time
+import zlib
+
+import numpy as np
+
+
+class RunJournal:
+    """
+    Append-only write-ahead journal of a running reaction, used to resume
+    the run after a power cut.
+
+    The file starts with MAGIC and holds a sequence of records, each a
+    5-byte header (type, payload length), the payload and its CRC-32:
+
+        M  JSON object of run metadata; later keys override earlier ones
+        S  packed SAMPLE_DTYPE rows
+
+    Samples are buffered and written as one record per group commit, which
+    is fsynced at most every `sync_interval` seconds; metadata is synced
+    immediately. A torn or corrupt tail, as left by a power cut mid-write,
+    fails its length or CRC check and is cut off by recover(); read() only
+    reports where it starts.
+    """
+
+    MAGIC = b"INCJRNL1"
+    HEADER = struct.Struct("<cI")
+    CRC = struct.Struct("<I")
+    SAMPLE_DTYPE = np.dtype(
+        [("time", "<i8"), ("channel", "<u2"), ("raw", "<f4"), ("optical_density", "<f8")]
+    )
+
+    def __init__(self, path, sync_interval=1.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.bytes_written = 0
+
+        self._pending = []
+        self._last_sync = _time.monotonic()
+
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(self.MAGIC)
+            self.sync()
+
+    def _write_record(self, kind, payload):
+        record = self.HEADER.pack(kind, len(payload)) + payload + self.CRC.pack(
+            zlib.crc32(payload)
+        )
+        self._file.write(record)
+        self.bytes_written += len(record)
+
+    def write_metadata(self, metadata):
+        """Records run metadata (a JSON-serialisable dict) and syncs it."""
+        self._commit_samples()
+        self._write_record(b"M", json.dumps(metadata).encode("utf-8"))
+        self.sync()
+
+    def append_samples(self, times, channels, raw_values, optical_densities):
+        rows = np.empty(len(channels), dtype=self.SAMPLE_DTYPE)
+        rows["time"] = np.asarray(times, dtype="datetime64[ms]").astype(np.int64)
+        rows["channel"] = channels
+        rows["raw"] = raw_values
+        rows["optical_density"] = optical_densities
+        self._pending.append(rows)
+
+    def flush_if_due(self):
+        if self._pending and _time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def _commit_samples(self):
+        if self._pending:
+            rows = np.concatenate(self._pending)
+            self._pending = []
+            self._write_record(b"S", rows.tobytes())
+
+    def sync(self):
+        """Writes the pending samples as one record and makes everything durable."""
+        self._commit_samples()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = _time.monotonic()
+
+    def snapshot(self):
+        """
+        Syncs pending samples and returns {path: length in bytes}; the
+        length ends on a record boundary (see ReactionCSVLog.snapshot).
+        """
+        self.sync()
+        return {os.path.abspath(self.path): self._file.tell()}
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    @classmethod
+    def recover(cls, path):
+        """
+        Reads a journal back and returns (metadata, samples): the merged
+        metadata dict and every committed sample as a SAMPLE_DTYPE array.
+        Anything after the last intact record is truncated so the journal
+        can be appended to again. Returns (None, None) for a missing or
+        foreign file.
+        """
+        metadata, samples, length = cls.read(path)
+        if metadata is not None:
+            cls.truncate(path, length)
+        return metadata, samples
+
+    @classmethod
+    def read(cls, path):
+        """
+        Like recover(), but leaves the file as it is and also returns the
+        length of its intact records: (metadata, samples, length). Returns
+        (None, None, 0) for a missing or foreign file.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None, None, 0
+        if not data.startswith(cls.MAGIC):
+            return None, None, 0
+
+        metadata = {}
+        chunks = []
+        position = len(cls.MAGIC)
+        while position + cls.HEADER.size <= len(data):
+            kind, length = cls.HEADER.unpack_from(data, position)
+            start = position + cls.HEADER.size
+            end = start + length
+            if end + cls.CRC.size > len(data):
+                break
+            payload = data[start:end]
+            (crc,) = cls.CRC.unpack_from(data, end)
+            if crc != zlib.crc32(payload):
+                break
+            if kind == b"M":
+                metadata.update(json.loads(payload))
+            elif kind == b"S":
+                chunks.append(np.frombuffer(payload, dtype=cls.SAMPLE_DTYPE))
+            position = end + cls.CRC.size
+
+        if chunks:
+            samples = np.concatenate(chunks)
+        else:
+            samples = np.empty(0, dtype=cls.SAMPLE_DTYPE)
+        return metadata, samples, position
+
+    @staticmethod
+    def truncate(path, length):
+        """
+        Cuts the journal back to `length` bytes, the end of its intact
+        records (see read()). Returns the number of bytes of torn tail
+        dropped.
+        """
+        dropped = os.path.getsize(path) - length
+        if dropped > 0:
+            with open(path, "r+b") as f:
+                f.truncate(length)
+                os.fsync(f.fileno())
+        return max(dropped, 0)
@@ -0,0 +1,182 @@
+import numpy as np
+
+
+def channel_rounds(channels):
+    """
+    Splits a batch into rounds: round r holds the indices of the r-th
+    sample of every channel in the batch, so a round never repeats a
+    channel and per-channel state can be updated with one fancy-indexed
+    step. Rounds are returned in order.
+    """
+    channels = np.asarray(channels)
+    order = np.argsort(channels, kind="stable")
+    sorted_channels = channels[order]
+    first = np.r_[True, sorted_channels[1:] != sorted_channels[:-1]]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - group_start
+    by_rank = np.lexsort((np.arange(len(order)), rank))
+    bounds = np.flatnonzero(np.diff(rank[by_rank])) + 1
+    return np.split(by_rank, bounds)
+
+
+class StreamFilter:
+    """
+    Base class of the per-channel smoothing filters on the ingestion path.
+
+    A filter holds a small fixed-size state per channel in preallocated
+    arrays and smooths a batch of samples with one vectorized step per
+    round of channel_rounds, so the cost per sample does not depend on the
+    length of the run. A batch with more than REPLAY_ROUNDS samples for a
+    channel, as when a run is rebuilt from its journal, is instead filtered
+    one channel at a time by _extend(). Missing (NaN) samples come out as
+    NaN and leave the state untouched. Subclasses implement reset() and
+    _step(), and may override _extend() with a faster equivalent.
+    """
+
+    REPLAY_ROUNDS = 64
+
+    def __init__(self, channels=50):
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        raise NotImplementedError
+
+    def update(self, channels, values):
+        """
+        Smooths a batch of samples given as 1-based channel numbers and
+        values in arrival order. Returns the filtered values in that order.
+        """
+        channels = np.asarray(channels, dtype=np.int64) - 1
+        values = np.asarray(values, dtype=np.float64)
+        filtered = np.full(len(values), np.nan)
+
+        valid = np.flatnonzero(np.isfinite(values))
+        if len(valid) == 0:
+            return filtered
+        if np.bincount(channels[valid]).max() <= self.REPLAY_ROUNDS:
+            for step in channel_rounds(channels[valid]):
+                index = valid[step]
+                filtered[index] = self._step(channels[index], values[index])
+            return filtered
+
+        order = valid[np.argsort(channels[valid], kind="stable")]
+        bounds = np.flatnonzero(np.diff(channels[order])) + 1
+        for index in np.split(order, bounds):
+            filtered[index] = self._extend(int(channels[index[0]]), values[index])
+        return filtered
+
+    def _step(self, c, values):
+        """Adds one sample to each of the distinct channels c; returns their outputs."""
+        raise NotImplementedError
+
+    def _extend(self, c, values):
+        """Adds a run of samples to channel c; returns their outputs."""
+        channel = np.array([c])
+        return np.concatenate(
+            [self._step(channel, values[i:i + 1]) for i in range(len(values))]
+        )
+
+
+class EwmaFilter(StreamFilter):
+    """
+    Exponentially weighted moving average:
+    y[n] = alpha * x[n] + (1 - alpha) * y[n-1], starting from the first sample.
+    """
+
+    ALPHA = 0.3
+    BLOCK = 64  # Samples per matrix step when replaying
+
+    def __init__(self, channels=50, alpha=None):
+        self.alpha = self.ALPHA if alpha is None else alpha
+        # Within a block, y[j] = decay[j] * y[-1] + sum_i weights[j, i] * x[i]
+        lags = np.subtract.outer(np.arange(self.BLOCK), np.arange(self.BLOCK))
+        self._weights = np.where(
+            lags >= 0, self.alpha * (1 - self.alpha) ** np.maximum(lags, 0), 0.0
+        )
+        self._decay = (1 - self.alpha) ** np.arange(1, self.BLOCK + 1)
+        super().__init__(channels)
+
+    def reset(self):
+        self._value = np.full(self.channels, np.nan)
+
+    def _step(self, c, values):
+        previous = self._value[c]
+        smoothed = np.where(
+            np.isnan(previous), values, self.alpha * values + (1 - self.alpha) * previous
+        )
+        self._value[c] = smoothed
+        return smoothed
+
+    def _extend(self, c, values):
+        previous = self._value[c]
+        if np.isnan(previous):
+            previous = values[0]
+        smoothed = np.empty(len(values))
+        for start in range(0, len(values), self.BLOCK):
+            block = values[start:start + self.BLOCK]
+            n = len(block)
+            smoothed[start:start + n] = (
+                self._weights[:n, :n] @ block + self._decay[:n] * previous
+            )
+            previous = smoothed[start + n - 1]
+        self._value[c] = previous
+        return smoothed
+
+
+class SavitzkyGolayFilter(StreamFilter):
+    """
+    Causal Savitzky-Golay filter: a polynomial of degree `order` is fitted by
+    least squares to each channel's last `window` samples and evaluated at
+    the newest one. The fit reduces to a fixed dot product, so each channel
+    only keeps a ring buffer of its last `window` values. Samples are
+    assumed evenly spaced, as a channel is read once per measurement cycle.
+    Until the window fills, the fit uses the samples available.
+    """
+
+    WINDOW = 11
+    ORDER = 2
+
+    def __init__(self, channels=50, window=None, order=None):
+        self.window = window or self.WINDOW
+        self.order = self.ORDER if order is None else order
+        # Row n holds the weights for a window of n samples, right-aligned
+        # with the oldest-to-newest buffer order
+        self._coefficients = np.zeros((self.window + 1, self.window))
+        for n in range(1, self.window + 1):
+            degree = min(self.order, n - 1)
+            positions = np.vander(np.arange(n), degree + 1, increasing=True)
+            newest = np.vander([n - 1], degree + 1, increasing=True)
+            self._coefficients[n, self.window - n:] = (newest @ np.linalg.pinv(positions))[0]
+        self._offsets = np.arange(self.window)
+        super().__init__(channels)
+
+    def reset(self):
+        self._buffer = np.zeros((self.channels, self.window))
+        self._pos = np.zeros(self.channels, dtype=np.int64)
+        self._n = np.zeros(self.channels, dtype=np.int64)
+
+    def _step(self, c, values):
+        self._buffer[c, self._pos[c]] = values
+        self._pos[c] = (self._pos[c] + 1) % self.window
+        self._n[c] = np.minimum(self._n[c] + 1, self.window)
+
+        # Each channel's buffer from oldest to newest sample
+        ordered = self._buffer[c[:, None], (self._pos[c, None] + self._offsets) % self.window]
+        return np.einsum("ij,ij->i", ordered, self._coefficients[self._n[c]])
+
+    def _extend(self, c, values):
+        # Fill the window sample by sample, then filter the rest as one
+        # correlation over the buffered and new samples
+        head = max(min(self.window - self._n[c], len(values)), 0)
+        smoothed = [super()._extend(c, values[:head])] if head else []
+        rest = values[head:]
+        if len(rest):
+            ordered = np.roll(self._buffer[c], -self._pos[c])
+            series = np.concatenate((ordered[1:], rest))
+            windows = np.lib.stride_tricks.sliding_window_view(series, self.window)
+            smoothed.append(windows @ self._coefficients[self.window])
+            self._buffer[c] = series[-self.window:]
+            self._pos[c] = 0
+        return np.concatenate(smoothed)
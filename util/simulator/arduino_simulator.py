@@ -0,0 +1,336 @@
+import argparse
+import math
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+
+from util.binary_telemetry import encode_sample
+
+
+class ArduinoSimulator:
+    """
+    Pseudo-terminal stand-in for the incubator firmware (arduino/arduino.ino,
+    ArduinoFSM.dot).
+
+    Opens a pty and answers on its slave side exactly like the board does:
+    CMD:TESTCONNECTION -> "ping", CMD:CALIBRATE + CHANNELS:n -> one OD:<raw>
+    per channel then CMD:CALIBRATION_FINISHED, and CMD:RUNREACTION -> an
+    "odone" homing report followed by OD:<raw>CH:<n> readings cycling over
+    every channel, with pause/resume/cancel and binary telemetry. Like the
+    firmware, every complete line waiting at the start of a tick is parsed
+    by the current state's parser, even if one of them changes the state.
+
+    Optical density follows a per-channel logistic growth curve, is mapped
+    to a raw reading through the inverse of OD = a*log10(raw) + b, and gets
+    Gaussian noise. time_scale compresses every delay and the growth clock,
+    so a value of 100 runs the experiment 100 times faster than real time.
+    """
+
+    def __init__(
+        self,
+        channels=50,
+        sample_interval=5.0,
+        agitation_time=1.5,
+        noise=2.0,
+        time_scale=1.0,
+        growth_rate=0.8,
+        lag_time=2.0,
+        initial_od=0.05,
+        max_od=1.8,
+        calibration_a=-1.5,
+        calibration_b=4.5,
+        seed=None,
+    ):
+        self.channels = channels
+        self.sample_interval = sample_interval
+        self.agitation_time = agitation_time
+        self.noise = noise
+        self.time_scale = time_scale
+        self.lag_time = lag_time
+        self.initial_od = initial_od
+        self.max_od = max_od
+        self.calibration_a = calibration_a
+        self.calibration_b = calibration_b
+
+        self._random = random.Random(seed)
+        # Spread growth rates (per hour) so channels are distinguishable
+        self.growth_rates = [
+            growth_rate * self._random.uniform(0.7, 1.3) for _ in range(channels)
+        ]
+
+        self.master_fd = None
+        self._slave_fd = None
+        self.port = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._input = b""
+
+        self.state = "IDLE"
+        self.paused = False
+        self._previous_paused = False
+        self.binary_telemetry = False
+        self.target_agitations = 0
+        self.calibration_channels = 0
+        self.samples_sent = 0
+
+        self._sequence = 0
+        self._channel = 1
+        self._next_event = None
+        self._homed = False
+        self._report_homing = False
+        self._reaction_start = None
+
+    # --- pty plumbing -----------------------------------------------------
+
+    def open(self):
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        tty.setraw(self.master_fd)
+        self.port = os.ttyname(slave_fd)
+        # Keep the slave open so the pty survives clients reconnecting
+        self._slave_fd = slave_fd
+        return self.port
+
+    def start(self):
+        if self.master_fd is None:
+            self.open()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        if self._slave_fd is not None:
+            os.close(self._slave_fd)
+            self._slave_fd = None
+
+    def _write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        os.write(self.master_fd, data)
+
+    def _println(self, text):
+        # Serial.println terminates with CR LF
+        self._write(text + "\r\n")
+
+    def _delay(self, seconds):
+        return time.monotonic() + seconds / self.time_scale
+
+    # --- main loop --------------------------------------------------------
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            timeout = 0.05
+            if self._next_event is not None:
+                timeout = min(timeout, max(0.0, self._next_event - now))
+            readable, _, _ = select.select([self.master_fd], [], [], timeout)
+            if readable:
+                try:
+                    self._input += os.read(self.master_fd, 4096)
+                except OSError:
+                    break
+            self._tick()
+
+    def _take_lines(self):
+        *lines, self._input = self._input.split(b"\n")
+        return [line.decode("utf-8", errors="ignore").strip() for line in lines]
+
+    def _tick(self):
+        if self.state == "IDLE":
+            for line in self._take_lines():
+                self._handle_super_state(line)
+            if self.paused and not self._previous_paused:
+                self._println("PAUSE SUCCESSFUL")
+            self._previous_paused = self.paused
+        elif self.state == "TEST_CONNECTION":
+            self._write("ping\n")
+            self.state = "IDLE"
+        elif self.state == "CALIBRATE":
+            self._run_calibration()
+        elif self.state == "RUN_REACTION":
+            self._run_reaction()
+
+    def _handle_super_state(self, line):
+        if line == "CMD:TESTCONNECTION":
+            self.state = "TEST_CONNECTION"
+        elif line == "CMD:CALIBRATE":
+            self.state = "CALIBRATE"
+            self.calibration_channels = 0
+            self._channel = 1
+            self._next_event = None
+        elif line.startswith("AGITATIONS:"):
+            self.target_agitations = _to_int(line[11:])
+        elif line == "CMD:RUNREACTION":
+            self.state = "RUN_REACTION"
+        elif line == "CMD:IDLE":
+            self.state = "IDLE"
+        elif line == "CMD:TELEMETRY_BINARY":
+            self.binary_telemetry = True
+            self._println("TELEMETRY:BINARY")
+        elif line in ("CMD:PLAY_REACTION", "CMD:RESUME_REACTION"):
+            self.state = "RUN_REACTION"
+            self._println("RESUME SUCCESSFUL")
+            self.paused = False
+            # Resume the reading that was interrupted
+            self._next_event = self._delay(self.sample_interval)
+        elif line:
+            self._println("ERR:UNKNOWN_COMMAND")
+
+    # --- calibration ------------------------------------------------------
+
+    def _run_calibration(self):
+        for line in self._take_lines():
+            if line == "CMD:CANCEL_CALIBRATION":
+                self.state = "IDLE"
+                self._next_event = None
+                return
+            if line.startswith("CHANNELS:"):
+                self.calibration_channels = _to_int(line[9:])
+                # Homing, then a move and a 1 s averaged read per channel
+                self._next_event = self._delay(self.sample_interval + 3.0)
+
+        if not self.calibration_channels or time.monotonic() < self._next_event:
+            return
+
+        # Calibration standards span the usable OD range across the wheel
+        od = self.initial_od + (self.max_od - self.initial_od) * (self._channel - 1) / max(
+            self.calibration_channels - 1, 1
+        )
+        self._println(f"OD:{self._raw_reading(od)}")
+        self._channel += 1
+        if self._channel > self.calibration_channels:
+            self._println("CMD:CALIBRATION_FINISHED")
+            self.state = "IDLE"
+            self._next_event = None
+        else:
+            self._next_event = self._delay(3.0)
+
+    # --- reaction ---------------------------------------------------------
+
+    def _run_reaction(self):
+        for line in self._take_lines():
+            if line == "CMD:CANCEL_REACTION":
+                self.state = "IDLE"
+                self._homed = False
+                self._reaction_start = None
+                self._next_event = None
+                return
+            if line == "CMD:PAUSE_REACTION":
+                self.state = "IDLE"
+                self.paused = True
+                return
+            if line.startswith("AGITATIONS:"):
+                self.target_agitations = _to_int(line[11:])
+
+        if self.paused:
+            return
+
+        if not self._homed:
+            # Initial homing and the two direction-finding reads at channel 25
+            self._homed = True
+            self._report_homing = True
+            self._channel = 1
+            self._reaction_start = time.monotonic()
+            self._next_event = self._delay(4 * self.sample_interval)
+            return
+
+        if time.monotonic() < self._next_event:
+            return
+
+        if self._report_homing:
+            self._report_homing = False
+            odone = self._raw_reading(self.initial_od)
+            self._println(f"odone: {odone} odtwo: {odone + 1}")
+
+        hours = (time.monotonic() - self._reaction_start) * self.time_scale / 3600.0
+        raw = self._raw_reading(self._od_at(self._channel, hours))
+        if self.binary_telemetry:
+            self._write(encode_sample(self._channel, self._sequence, float(raw)))
+            self._sequence = (self._sequence + 1) & 0xFFFF
+        else:
+            self._println(f"OD:{raw}CH:{self._channel}")
+        self.samples_sent += 1
+
+        self._channel = self._channel % self.channels + 1
+        interval = self.sample_interval
+        if self.target_agitations and self._channel != 1:
+            interval += self.agitation_time * self.target_agitations
+        self._next_event = self._delay(interval)
+
+    # --- signal model -----------------------------------------------------
+
+    def _od_at(self, channel, hours):
+        rate = self.growth_rates[channel - 1]
+        t = max(hours - self.lag_time, 0.0)
+        ratio = self.max_od / self.initial_od - 1.0
+        return self.max_od / (1.0 + ratio * math.exp(-rate * t))
+
+    def _raw_reading(self, od):
+        raw = 10 ** ((od - self.calibration_b) / self.calibration_a)
+        raw += self._random.gauss(0.0, self.noise)
+        # analogRead is 10-bit and the firmware averages into an unsigned long
+        return int(min(max(round(raw), 1), 1023))
+
+
+def _to_int(text):
+    # Mirrors Arduino String.toInt(): leading digits only, 0 if none
+    digits = ""
+    for c in text.strip():
+        if not c.isdigit():
+            break
+        digits += c
+    return int(digits) if digits else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated incubator on a pseudo-terminal.")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--sample-interval", type=float, default=5.0,
+                        help="seconds between readings at time scale 1")
+    parser.add_argument("--agitation-time", type=float, default=1.5,
+                        help="seconds per agitation between readings")
+    parser.add_argument("--noise", type=float, default=2.0,
+                        help="standard deviation of the raw reading")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="speed-up factor for delays and growth")
+    parser.add_argument("--growth-rate", type=float, default=0.8,
+                        help="mean specific growth rate per hour")
+    parser.add_argument("--lag-time", type=float, default=2.0, help="lag phase in hours")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = ArduinoSimulator(
+        channels=args.channels,
+        sample_interval=args.sample_interval,
+        agitation_time=args.agitation_time,
+        noise=args.noise,
+        time_scale=args.time_scale,
+        growth_rate=args.growth_rate,
+        lag_time=args.lag_time,
+        seed=args.seed,
+    )
+    port = simulator.start()
+    print(f"Simulated incubator listening on {port}")
+    print(f"Run the app against it with: INCUBATOR_SERIAL_PORT={port} python main.py")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Sent {simulator.samples_sent} samples.")
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
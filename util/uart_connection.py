@@ -0,0 +1,230 @@
+import collections
+import threading
+import time
+
+from util.binary_telemetry import TelemetryDecoder
+from util.uart_reader import UARTReader
+from util.uart_util import UARTUtil
+
+
+class _PendingCommand:
+    def __init__(self, command, reply, timeout, retries, retry_rejected, on_complete, on_error):
+        self.command = command
+        self.reply = reply
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_rejected = retry_rejected
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.attempts = 0
+        self.deadline = None
+
+
+class UARTConnection:
+    """
+    The application's single serial connection to the incubator firmware.
+
+    Owns the port and its UARTReader. Inbound lines are routed, by message
+    prefix, to whichever views have subscribed. Outbound commands are queued
+    and sent one at a time: a command completes as soon as its reply arrives
+    (see COMMAND_REPLIES) or fails on ERR:UNKNOWN_COMMAND, is retried on
+    timeout, and only then is the next command written. Commands the firmware never
+    answers complete once they have had time to reach it. poll() must be
+    called periodically from the Tk loop, which keeps every callback on the
+    UI thread.
+
+    Reaction samples may also arrive as binary telemetry frames. Binary mode
+    is requested when the port opens; firmware that does not know the
+    command rejects it and keeps sending text. Frames are decoded whenever
+    they arrive and delivered to telemetry subscribers as sample arrays.
+    """
+
+    # Replies that acknowledge a command. Commands without an entry get no
+    # reply from the firmware and settle after SETTLE_TIME instead.
+    COMMAND_REPLIES = {
+        "CMD:PAUSE_REACTION": "PAUSE SUCCESSFUL",
+        "CMD:RESUME_REACTION": "RESUME SUCCESSFUL",
+        "CMD:PLAY_REACTION": "RESUME SUCCESSFUL",
+        "CMD:TESTCONNECTION": "ping",
+        "CMD:TELEMETRY_BINARY": "TELEMETRY:BINARY",
+    }
+    ERROR_REPLY = "ERR:UNKNOWN_COMMAND"
+    SETTLE_TIME = 0.05  # Seconds for the firmware loop to act on an unanswered command
+
+    def __init__(self, port=None, baudrate=9600, timeout=1, binary_telemetry=True):
+        self.ser = UARTUtil.open_port(port, baudrate, timeout)
+        self.reader = UARTReader(self.ser)
+        self.reader.start()
+
+        self._subscribers = []
+        self._telemetry_subscribers = []
+        self._commands = collections.deque()
+        self._write_lock = threading.Lock()
+
+        self.telemetry = TelemetryDecoder()
+        self.binary_telemetry = False
+        if binary_telemetry:
+            self.negotiate_binary_telemetry()
+
+    def negotiate_binary_telemetry(self):
+        """Asks the firmware for binary telemetry, falling back to text if it refuses."""
+
+        def on_complete(reply):
+            self.binary_telemetry = True
+            print("Binary telemetry enabled.")
+
+        def on_error(command, reason):
+            self.binary_telemetry = False
+            print(f"Binary telemetry unavailable ({reason}); using text protocol.")
+
+        # The board resets when the port opens, so allow it time to boot
+        self.send_command(
+            "CMD:TELEMETRY_BINARY",
+            timeout=1.0,
+            retries=3,
+            on_complete=on_complete,
+            on_error=on_error,
+        )
+
+    def subscribe(self, prefixes, callback):
+        """
+        Calls callback(arrival, line) for each inbound line that starts with
+        one of the given prefixes. A callback may be subscribed only once.
+        """
+        self.unsubscribe(callback)
+        self._subscribers.append((tuple(prefixes), callback))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [s for s in self._subscribers if s[1] != callback]
+        self._telemetry_subscribers = [c for c in self._telemetry_subscribers if c != callback]
+
+    def subscribe_telemetry(self, callback):
+        """
+        Calls callback(arrival, samples) for every batch of binary telemetry,
+        where samples is a util.binary_telemetry.SAMPLE_DTYPE array.
+        """
+        self.unsubscribe(callback)
+        self._telemetry_subscribers.append(callback)
+
+    def send(self, data):
+        """Queues a command without waiting for the outcome."""
+        self.send_command(data)
+
+    def send_command(
+        self,
+        command,
+        timeout=1.0,
+        retries=2,
+        retry_rejected=False,
+        on_complete=None,
+        on_error=None,
+    ):
+        """
+        Queues a command. on_complete(reply) runs when it is acknowledged
+        (reply is None for commands the firmware does not answer), and
+        on_error(command, reason) runs once all retries are used up, or at
+        the first ERR:UNKNOWN_COMMAND unless retry_rejected is set.
+
+        The firmware's ERR does not name the command it rejects, so it is
+        attributed to the head of the queue, the command awaiting a reply.
+        A rejected command fails the same way every time, hence no retry
+        by default.
+        """
+        reply = self.COMMAND_REPLIES.get(command)
+        self._commands.append(
+            _PendingCommand(
+                command, reply, timeout, retries, retry_rejected, on_complete, on_error
+            )
+        )
+        if len(self._commands) == 1:
+            self._write_head()
+
+    def cancel(self, command):
+        """Drops every queued `command` without running its callbacks."""
+        head = self._commands[0] if self._commands else None
+        self._commands = collections.deque(
+            pending for pending in self._commands if pending.command != command
+        )
+        if self._commands and self._commands[0] is not head:
+            self._write_head()
+
+    def _write_head(self):
+        pending = self._commands[0]
+        pending.attempts += 1
+        with self._write_lock:
+            # send_data flushes, so the wait starts once the bytes are on the wire
+            UARTUtil.send_data(self.ser, pending.command, settle=0)
+
+        wait = pending.timeout if pending.reply is not None else self.SETTLE_TIME
+        pending.deadline = time.monotonic() + wait
+
+    def _finish_head(self, reply=None, error=None):
+        pending = self._commands.popleft()
+        if self._commands:
+            self._write_head()
+
+        if error is None:
+            if pending.on_complete is not None:
+                pending.on_complete(reply)
+        else:
+            print(f"Command '{pending.command}' failed: {error}")
+            if pending.on_error is not None:
+                pending.on_error(pending.command, error)
+
+    def _retry_or_fail(self, reason, retryable=True):
+        pending = self._commands[0]
+        if retryable and pending.attempts <= pending.retries:
+            print(f"Retrying '{pending.command}' after {reason}")
+            self._write_head()
+        else:
+            self._finish_head(error=reason)
+
+    def poll(self, max_lines=500):
+        """Dispatches inbound lines and advances the command queue. Call from the Tk loop."""
+        for arrival, line in self.reader.drain(max_lines):
+            if isinstance(line, list):
+                self._dispatch_telemetry(arrival, line)
+                continue
+
+            handled = False
+            if self._commands:
+                pending = self._commands[0]
+                if pending.reply is not None and line.startswith(pending.reply):
+                    self._finish_head(reply=line)
+                    handled = True
+                elif line.startswith(self.ERROR_REPLY):
+                    self._retry_or_fail("rejected by firmware", pending.retry_rejected)
+                    handled = True
+
+            # Iterate over a copy: callbacks may subscribe or unsubscribe
+            for prefixes, callback in list(self._subscribers):
+                if line.startswith(prefixes):
+                    callback(arrival, line)
+                    handled = True
+            if not handled:
+                print(f"Unhandled UART line: '{line}'")
+
+        if self._commands and time.monotonic() >= self._commands[0].deadline:
+            if self._commands[0].reply is None:
+                self._finish_head()
+            else:
+                self._retry_or_fail("timed out")
+
+    def _dispatch_telemetry(self, arrival, frames):
+        corrupt, dropped = self.telemetry.corrupt, self.telemetry.dropped
+        samples = self.telemetry.decode(frames)
+        if self.telemetry.corrupt != corrupt or self.telemetry.dropped != dropped:
+            print(
+                f"Telemetry: {self.telemetry.corrupt} corrupt and "
+                f"{self.telemetry.dropped} dropped frames so far"
+            )
+        if len(samples):
+            for callback in list(self._telemetry_subscribers):
+                callback(arrival, samples)
+
+    def wall_time(self, arrival):
+        return self.reader.wall_time(arrival)
+
+    def close(self):
+        self.reader.stop()
+        self.ser.close()
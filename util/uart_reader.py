@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+
+import serial
+
+from util.binary_telemetry import FRAME_SIZE, cobs_decode
+
+
+class UARTReader(threading.Thread):
+    """
+    Background thread that owns reads from a serial port.
+
+    Bytes are read in bulk, split on newlines and every complete line is
+    queued as (arrival_time, line), where arrival_time comes from
+    time.monotonic(). Partial lines are held until their newline arrives.
+    Zero-delimited binary telemetry frames (see util.binary_telemetry) found
+    in the same read are queued together as (arrival_time, [frame, ...]).
+    The Tk loop pulls items off the queue in batches with drain().
+    """
+
+    def __init__(self, ser, read_size=4096):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.read_size = read_size
+        self.lines = queue.Queue()
+
+        self._stop_event = threading.Event()
+        self._buffer = b""
+        self._in_frame = False
+
+        # Anchor pair used to translate monotonic arrival times to wall time
+        self._wall_anchor = time.time()
+        self._monotonic_anchor = time.monotonic()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                # Block for the first byte (up to the port timeout), then take
+                # everything that is already waiting in one read.
+                chunk = self.ser.read(min(max(self.ser.in_waiting, 1), self.read_size))
+            except (serial.SerialException, OSError) as e:
+                print(f"UART reader stopped: {e}")
+                break
+            if not chunk:
+                continue
+
+            arrival = time.monotonic()
+            self._buffer += chunk
+            frames = self._split_buffer(arrival)
+            if frames:
+                self.lines.put((arrival, frames))
+
+    def _split_buffer(self, arrival):
+        """
+        Queues complete text lines and returns complete binary frames.
+
+        Text lines end in a newline. Binary frames are wrapped in zero bytes,
+        which text never contains, so a zero always switches between the two.
+        """
+        frames = []
+        buffer = self._buffer
+        while buffer:
+            if self._in_frame:
+                end = buffer.find(b"\x00")
+                if end < 0:
+                    break
+                # An empty frame means we joined mid-stream: the zero we took
+                # as an opening delimiter was a closing one, so stay in frame.
+                if end == 0:
+                    buffer = buffer[1:]
+                    continue
+                self._in_frame = False
+                frame = buffer[:end]
+                if b"\n" in frame and not self._is_frame(frame):
+                    # Same mistake, with text between the two zeros: read it
+                    # as text again, up to the zero that opens the next frame
+                    continue
+                frames.append(frame)
+                buffer = buffer[end + 1:]
+                continue
+
+            newline = buffer.find(b"\n")
+            zero = buffer.find(b"\x00", 0, newline if newline >= 0 else len(buffer))
+            if zero >= 0:
+                # Anything before the opening delimiter is a fragment; drop it
+                buffer = buffer[zero + 1:]
+                self._in_frame = True
+            elif newline >= 0:
+                line = buffer[:newline].decode("utf-8", errors="ignore").strip()
+                if line:
+                    self.lines.put((arrival, line))
+                buffer = buffer[newline + 1:]
+            else:
+                break
+        self._buffer = buffer
+        return frames
+
+    @staticmethod
+    def _is_frame(data):
+        payload = cobs_decode(data)
+        return payload is not None and len(payload) == FRAME_SIZE
+
+    def drain(self, max_lines=None):
+        """Returns up to max_lines queued (arrival_time, line or frames) pairs without blocking."""
+        batch = []
+        while max_lines is None or len(batch) < max_lines:
+            try:
+                batch.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def wall_time(self, arrival):
+        """Converts a monotonic arrival time into seconds since the epoch."""
+        return self._wall_anchor + (arrival - self._monotonic_anchor)
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        # Wake a read that is blocked waiting for the port timeout
+        cancel_read = getattr(self.ser, "cancel_read", None)
+        if cancel_read is not None:
+            try:
+                cancel_read()
+            except (serial.SerialException, OSError):
+                pass
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -1,27 +1,51 @@
+import glob
+import os
 import serial
 import time
 
 class UARTUtil:
+    PORT_PATTERNS = ('/dev/ttyACM*', '/dev/ttyUSB*')
+
+    @staticmethod
+    def list_ports():
+        """
+        Returns the serial ports that may have an incubator attached.
+        INCUBATOR_SERIAL_PORTS (comma-separated) or INCUBATOR_SERIAL_PORT
+        override the search, e.g. with ptys printed by
+        util/simulator/arduino_simulator.py.
+        """
+        ports = os.environ.get("INCUBATOR_SERIAL_PORTS")
+        if ports:
+            return [p.strip() for p in ports.split(",") if p.strip()]
+        port = os.environ.get("INCUBATOR_SERIAL_PORT")
+        if port:
+            return [port]
+        found = []
+        for pattern in UARTUtil.PORT_PATTERNS:
+            found.extend(sorted(glob.glob(pattern)))
+        return found
+
     @staticmethod
     def open_port(port=None, baudrate=9600, timeout=1):
         if port is None:
-            # Try common ACM ports
-            for p in ['/dev/ttyACM0', '/dev/ttyACM1']:
+            # Use the first port that opens
+            for p in UARTUtil.list_ports():
                 try:
                     return serial.Serial(p, baudrate, timeout=timeout)
                 except serial.SerialException:
                     continue
-            raise serial.SerialException("No available /dev/ttyACM0 or /dev/ttyACM1 port found.")
+            raise serial.SerialException("No available /dev/ttyACM* or /dev/ttyUSB* port found.")
         return serial.Serial(port, baudrate, timeout=timeout)
 
     @staticmethod
-    def send_data(ser, data):
+    def send_data(ser, data, settle=0.2):
         if isinstance(data, str):
             data += '\n'
             data = data.encode('utf-8')
         ser.write(data)
         ser.flush()
-        time.sleep(0.2)
+        if settle:
+            time.sleep(settle)
 
     @staticmethod
     def receive_data(ser, size=64):
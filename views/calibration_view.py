@@ -4,25 +4,21 @@ from tkinter import ttk, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import numpy as np
-from util.calibration.calibration_curve import LogarithmicCalibrationCurve
-from util.calibration.calibration_session import CalibrationSession
-from util.uart_util import UARTUtil
+from util.calibration.calibration_job import CalibrationJob
 import matplotlib
 
 matplotlib.use("TkAgg")
 import re
 from collections import defaultdict
-import os
-import csv
-from datetime import datetime
 
 
 class CalibrationView(tk.Frame):
+    DEFAULT_RUNS = 10  # Initial value of the number-of-runs field
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.canvas = None
-        self.ser = UARTUtil.open_port()
 
         label = tk.Label(self, text="Calibration", font=("Arial", 18))
         label.pack(side="top", anchor="n", pady=10)
@@ -57,15 +53,40 @@ class CalibrationView(tk.Frame):
         button_frame = tk.Frame(self)
         button_frame.pack(side="top", anchor="e", pady=10)
 
-        run_10_button = tk.Button(
+        runs_frame = tk.Frame(button_frame)
+        runs_frame.pack(side="left", padx=5)
+
+        tk.Label(runs_frame, text="Runs:", font=("Arial", 10)).pack()
+        self.runs_var = tk.IntVar(value=self.DEFAULT_RUNS)
+        tk.Entry(runs_frame, textvariable=self.runs_var, width=5).pack()
+
+        self.run_button = tk.Button(
             button_frame,
             text="Run Calibration",
-            command=self.run_10_calibrations,
+            command=self.start_calibration,
             font=("Arial", 12),
             width=16,
             height=2,
         )
-        run_10_button.pack(side="left", padx=5)
+        self.run_button.pack(side="left", padx=5)
+
+        self.cancel_button = tk.Button(
+            button_frame,
+            text="Cancel",
+            command=self.cancel_calibration,
+            font=("Arial", 12),
+            width=10,
+            height=2,
+            state="disabled",
+        )
+        self.cancel_button.pack(side="left", padx=5)
+
+        self.status_label = tk.Label(self, text="", font=("Arial", 12))
+        self.status_label.pack(side="top", anchor="e", padx=10)
+
+        self.job = None
+        self.fig = None
+        self.ax = None
 
         right_frame = tk.Frame(self)
         right_frame.pack(side="left", fill="both", expand=True)
@@ -149,123 +170,108 @@ class CalibrationView(tk.Frame):
         except ValueError:
             return False
 
-    def run_10_calibrations(self):
-        results = []
-        for _ in range(10):
-            modal = tk.Toplevel(self)
-            modal.title("Calibration Running")
-            modal.geometry("350x200")
-            modal.resizable(False, False)
-
-            run_label = tk.Label(
-                modal, text=f"Run {_ + 1} of 10", font=("Arial", 12, "bold")
-            )
-            run_label.pack(pady=(10, 0))
+    def _read_standards(self):
+        """
+        Returns the (channel, OD) standards entered in the table. The firmware
+        reads the first n positions, so the filled rows must be contiguous
+        from the top.
+        """
+        standards = []
+        for item in self.tree.get_children():
+            channel, od = self.tree.item(item, "values")[:2]
+            if str(od).strip() == "":
+                break
+            standards.append((int(channel), float(od)))
+        filled = sum(
+            1
+            for item in self.tree.get_children()
+            if str(self.tree.item(item, "values")[1]).strip() != ""
+        )
+        if filled != len(standards):
+            raise ValueError("Fill in the OD values from the first row down without gaps.")
+        if len(standards) < 2:
+            raise ValueError("Enter the OD of at least two calibration standards.")
+        return standards
+
+    def start_calibration(self):
+        if self.job is not None and self.job.state == CalibrationJob.RUNNING:
+            return
+        try:
+            standards = self._read_standards()
+            runs = int(self.runs_var.get())
+            if runs < 1:
+                raise ValueError("The number of runs must be at least 1.")
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Invalid Calibration", str(e))
+            return
+        # The view opens without a board so the history stays browsable
+        connection = self.controller.connection
+        if connection is None:
+            messagebox.showerror("No Incubator Found", "Calibration needs a connected incubator.")
+            return
 
-            label = tk.Label(
-                modal,
-                text="Calibration is running...\nPlease wait or cancel.",
-                font=("Arial", 12),
+        self.job = CalibrationJob(
+            connection,
+            standards,
+            runs=runs,
+            on_run=self._on_calibration_run,
+            on_done=self._on_calibration_done,
+        )
+        self.run_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.status_label.config(text=f"Calibration run 1 of {runs}...")
+        self.job.start()
+
+    def cancel_calibration(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def _on_calibration_run(self, job):
+        # Refresh the fit and plot as every run comes in
+        if job.count < job.runs:
+            self.status_label.config(
+                text=f"Calibration run {job.count + 1} of {job.runs}..."
             )
-            label.pack(pady=10)
+        self._plot_calibration(job)
 
-            received_numbers = []
+    def _on_calibration_done(self, job):
+        self.run_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
 
-            def on_cancel():
-                UARTUtil.send_data(self.ser, "CMD:CANCEL_CALIBRATION")
-                modal.grab_release()
-                modal.destroy()
+        if job.state == CalibrationJob.CANCELLED:
+            self.status_label.config(text="Calibration cancelled.")
+            return
+        if job.state == CalibrationJob.FAILED:
+            self.status_label.config(text="Calibration failed.")
+            messagebox.showerror("Calibration Failed", job.error)
+            return
 
-            cancel_btn = tk.Button(
-                modal, text="Cancel", command=on_cancel, font=("Arial", 12), width=10
+        if job.state == CalibrationJob.CONVERGED:
+            self.status_label.config(
+                text=f"Calibration converged after {job.count} of {job.runs} runs."
             )
-            cancel_btn.pack(pady=10)
-
-            modal.protocol("WM_DELETE_WINDOW", lambda: None)
-            modal.transient(self)
-            modal.grab_set()
-            modal.focus_set()
-
-            UARTUtil.send_data(self.ser, "CMD:CALIBRATE")
-            data = []
-            for item in self.tree.get_children():
-                od = self.tree.item(item, "values")[1]
-                data.append([od])
-
-            populated_count = sum(1 for row in data if row[0].strip() != "")
-            UARTUtil.send_data(self.ser, "CHANNELS:" + str(populated_count))
-
-            def poll_uart():
-                line = UARTUtil.receive_data(self.ser)
-                if "OD:" in line:
-                    try:
-                        number_str = line[3:].split('\r')[0].split('\n')[0]
-                        number = float(number_str)
-                        received_numbers.append(number)
-                        print("number: " + line)
-                    except ValueError as ve:
-                        print(f"ValueError: {ve}")
-
-                
-                    if "CMD:CALIBRATION_FINISHED" in line:
-                        modal.grab_release()
-                        modal.destroy()
-                        result_array = []
-                        tree_items = list(self.tree.get_children())
-                        for idx, number in enumerate(received_numbers):
-                            if idx < len(tree_items):
-                                channel_index = int(
-                                    self.tree.item(tree_items[idx], "values")[0]
-                                )
-                                od = float(self.tree.item(tree_items[idx], "values")[1])
-                                result_array.append([channel_index, float(number), od])
-                        print(f"Calibration results for run {_ + 1}: {result_array}")
-                        results.append(result_array)
-                        return
-                elif "CMD:CALIBRATION_FINISHED" in line:
-                        modal.grab_release()
-                        modal.destroy()
-                        result_array = []
-                        tree_items = list(self.tree.get_children())
-                        for idx, number in enumerate(received_numbers):
-                            if idx < len(tree_items):
-                                channel_index = int(
-                                    self.tree.item(tree_items[idx], "values")[0]
-                                )
-                                od = float(self.tree.item(tree_items[idx], "values")[1])
-                                result_array.append([channel_index, float(number), od])
-                        print(f"Calibration results for run {_ + 1}: {result_array}")
-                        results.append(result_array)
-                        return
-
-                modal.after(100, poll_uart)
-
-            poll_uart()
-            self.wait_window(modal)
-
-        # After all calibrations, results is a list of 10 runs, each with [channel_index, voltage, od]
-        # You can process or save results here as needed
-        # Calculate variance per channel for voltage
-
-        self.calibration_session = CalibrationSession(results)
-
-        graph_channels, graph_V, graph_OD, log, r_squared, error_bars = (
-            self.calibration_session.run_10_calibrations(results)
-        )
+        else:
+            self.status_label.config(text=f"Calibration finished ({job.count} runs).")
 
         # Get the calculated parameters and save them
-        a, b = log.a, log.b
-        self.save_calibration_to_csv(a, b, r_squared)
-
-        fig, ax = plt.subplots(figsize=(5, 4))
-
-        # Plot original data points without error bars
-        ax.plot(graph_V, graph_OD, "o", color="blue", label="Measured OD")
-
-        # Plot horizontal error bars centered on the fit line
-        a, b = log.a, log.b
-        graph_OD_fit = a * np.log10(graph_V) + b
-
+        self.save_calibration(job.fit.a, job.fit.b, job.fit.r_squared, job.table)
+
+    def _plot_calibration(self, job):
+        graph_channels = job.channels.tolist()
+        graph_V = job.mean.tolist()
+        graph_OD = job.ods.tolist()
+        a, b, r_squared = job.fit.a, job.fit.b, job.fit.r_squared
+        # Error bars need a spread, which needs at least two runs
+        error_bars = np.nan_to_num(job.std).tolist()
+
+        if self.canvas is None:
+            self.fig, self.ax = plt.subplots(figsize=(5, 4))
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+            self.canvas.get_tk_widget().pack(side="right", fill="both", expand=True)
+        ax = self.ax
+        ax.clear()
+
+        # Plot horizontal error bars centered on the measured points
         ax.errorbar(
             graph_V,
             graph_OD,
@@ -285,12 +291,15 @@ class CalibrationView(tk.Frame):
         ax.legend()
 
         # Annotate with equation and R²
-        equation_text = f"y = {a:.3f}log(x) + {b:.3f}\n$R^2$ = {r_squared:.4f}"
-        plt.text(
+        equation_text = (
+            f"y = {a:.3f}log(x) + {b:.3f}\n$R^2$ = {r_squared:.4f}\n"
+            f"Runs: {job.count}"
+        )
+        ax.text(
             0.10,
             0.10,
             equation_text,
-            transform=plt.gca().transAxes,
+            transform=ax.transAxes,
             fontsize=10,
             verticalalignment="bottom",
             bbox=dict(facecolor="white", alpha=0.7),
@@ -310,61 +319,26 @@ class CalibrationView(tk.Frame):
                 bbox=dict(boxstyle="round,pad=0.2", fc="yellow", alpha=0.3),
             )
 
-        for i, label in enumerate(graph_channels):
-            ax.annotate(
-                str(label),
-                (graph_V[i], graph_OD[i]),
-                textcoords="offset points",
-                xytext=(5, 5),
-                ha="left",
-                fontsize=10,
-            )
-
         ax.set_xlabel("Voltage")
         ax.set_ylabel("Optical Density")
         ax.set_title("Calibration: Voltage vs Optical Density")
         ax.grid(True)
 
-        if self.canvas is not None:
-            self.canvas.get_tk_widget().destroy()
-
-        self.canvas = FigureCanvasTkAgg(fig, master=self)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side="right", fill="both", expand=True)
-        LogarithmicCalibrationCurve.init(a, b)  # Initialize the curve with log base 10
-        return
+        self.canvas.draw_idle()
 
-    def save_calibration_to_csv(self, a, b, r_squared):
+    def save_calibration(self, a, b, r_squared, table=None):
         """
-        Saves the calibration parameters to a CSV file with a timestamp.
-        Deletes the old calibration file if it exists.
+        Appends the calibration to the versioned calibration registry as its
+        newest version. Earlier calibrations stay in the history.
         """
-        filepath = "/var/tmp/incubator/calibrations.csv"
+        registry = self.controller.calibrations
         try:
-            # Ensure the parent directory exists
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-
-            # Delete the old calibration file if it exists
-            if os.path.isfile(filepath):
-                os.remove(filepath)
-
-            # Get the current timestamp in a standard format
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Define the header and the data row
-            header = ["timestamp", "a", "b", "r_squared"]
-            data_row = [timestamp, f"{a:.4f}", f"{b:.4f}", f"{r_squared:.4f}"]
-
-            # Write the header and data row to the new file
-            with open(filepath, "w", newline="") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(header)
-                writer.writerow(data_row)
-
-        except IOError as e:
+            record = registry.add(a, b, r_squared, table)
+            print(f"Saved calibration version {record.version} to {registry.path}")
+        except (IOError, OSError) as e:
             messagebox.showerror(
                 "File Save Error",
-                f"Could not save calibration data to {filepath}\n\nError: {e}",
+                f"Could not save calibration data to {registry.path}\n\nError: {e}",
             )
         except Exception as e:
             messagebox.showerror(
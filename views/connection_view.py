@@ -1,15 +1,13 @@
-import time
 import tkinter as tk
-from util.uart_util import UARTUtil
 
 
 class ConnectionView(tk.Frame):
+    PING_TIMEOUT = 1.0  # Seconds to wait for the firmware's "ping" reply
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
 
-        self.ser = UARTUtil.open_port()
-
         label = tk.Label(self, text="Connection")
         label.pack(pady=10)
 
@@ -32,29 +30,25 @@ class ConnectionView(tk.Frame):
         self.Gazoscan_status_label = tk.Label(self, text="Gazoscan")
         self.Gazoscan_status_label.pack()
 
-    def send_arduino_state_transition(self):
-        # Send state transition command to Arduino
-        try:
-            UARTUtil.send_data(self.ser, data="CMD:TESTCONNECTION")
-            print("State transition command sent to Arduino.")
-        except Exception as e:
-            print(f"Failed to send state transition command: {e}")
-
     def ping_UART(self):
-        # Ping UART device
-        try:
-            response = UARTUtil.receive_data(ser=self.ser)
-            UART_CONNECTED = "ping" in response.lower()
-        except Exception as e:
-            print(f"UART ping failed: {e}")
-            UART_CONNECTED = False
-        return UART_CONNECTED
+        # The firmware answers CMD:TESTCONNECTION with a "ping" line
+        connection = self.controller.connection
+        if connection is None:
+            # Still probing, or no board was found
+            self.update_status(False, False)
+            return
+        connection.send_command(
+            "CMD:TESTCONNECTION",
+            timeout=self.PING_TIMEOUT,
+            retries=0,
+            on_complete=lambda reply: self.update_status(True, False),
+            on_error=lambda command, reason: self.update_status(False, False),
+        )
 
     def ping_devices(self):
         # Ping UART and Gazoscan
-        GAZOSCAN_CONNECTED = False
-        self.send_arduino_state_transition()
-        self.update_status(self.ping_UART(), GAZOSCAN_CONNECTED)
+        self.update_status(False, False)
+        self.ping_UART()
 
     def update_status(self, uart_connected, Gazoscan_connected):
         self.uart_status.config(fg="green" if uart_connected else "gray")
@@ -0,0 +1,273 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from util.export.usb_export import UsbExport, find_usb_drives
+
+
+class DashboardView(tk.Frame):
+    """
+    Combined view of every attached incubator: one row per device with its
+    run state, throughput and best-growing channel. Devices other than the
+    primary one (which the Run screen drives) are started and stopped here.
+    A run a device left unstopped is offered for resume or recovery before
+    a new one replaces it.
+    """
+
+    REFRESH_MS = 1000
+    EXPORT_POLL_MS = 200
+    COLUMNS = (
+        ("Device", 120),
+        ("Port", 160),
+        ("Status", 100),
+        ("Samples", 100),
+        ("Samples/s", 90),
+        ("Channels", 80),
+        ("Max OD", 80),
+        ("Best µ (1/h)", 110),
+        ("Best channel", 130),
+    )
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.devices = controller.devices
+
+        label = tk.Label(self, text="Dashboard", font=("Arial", 18))
+        label.pack(side="top", anchor="n", pady=10)
+
+        button = tk.Button(
+            self,
+            text="Home",
+            command=lambda: controller.show_frame("MenuView"),
+            font=("Arial", 12),
+            width=10,
+            height=2,
+        )
+        button.pack(side="top", anchor="e")
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=tuple(name for name, _ in self.COLUMNS),
+            show="headings",
+            height=len(self.devices.devices),
+            selectmode="browse",
+        )
+        for name, width in self.COLUMNS:
+            self.tree.heading(name, text=name)
+            self.tree.column(name, width=width, anchor="center", stretch=False)
+        self.tree.pack(side="top", fill="x", padx=10, pady=10)
+        for device in self.devices.devices:
+            self.tree.insert("", "end", iid=device.name, values=(device.name, device.port))
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(side="top", pady=10)
+
+        tk.Label(button_frame, text="Agitations:", font=("Arial", 10)).pack(side="left")
+        self.agitation_var = tk.IntVar(value=5)
+        tk.Entry(button_frame, textvariable=self.agitation_var, width=5).pack(
+            side="left", padx=5
+        )
+
+        tk.Button(
+            button_frame,
+            text="Start",
+            bg="green",
+            fg="white",
+            font=("Arial", 12, "bold"),
+            width=10,
+            height=2,
+            command=self.start_selected,
+        ).pack(side="left", padx=10)
+        tk.Button(
+            button_frame,
+            text="Stop",
+            bg="red",
+            fg="white",
+            font=("Arial", 12, "bold"),
+            width=10,
+            height=2,
+            command=self.stop_selected,
+        ).pack(side="left", padx=10)
+
+        self.export_job = None
+        self.export_label = tk.Label(button_frame, text="", font=("Arial", 10))
+        self.export_label.pack(side="left", padx=10)
+
+        self._last_counts = {}
+        self.refresh()
+
+    def _selected_device(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showinfo("No Incubator Selected", "Select an incubator first.")
+            return None
+        device = self.devices.find(selection[0])
+        if device is self.devices.primary:
+            messagebox.showinfo(
+                "Primary Incubator",
+                f"{device.name} is run from the Run screen.",
+            )
+            return None
+        return device
+
+    def start_selected(self):
+        device = self._selected_device()
+        if device is None or device.running:
+            return
+        if self.export_job is not None:
+            messagebox.showwarning(
+                "Export In Progress", "Please wait for the current export to finish."
+            )
+            return
+        interrupted = device.interrupted()
+        if interrupted is not None and not self._settle_interrupted(device, interrupted):
+            return
+        calibration = self.controller.calibrations.latest()
+        if calibration is None:
+            messagebox.showerror(
+                "Calibration Missing",
+                "No calibration found.\nPlease go to the Calibration screen and run a new calibration before starting a reaction.",
+            )
+            return
+        try:
+            device.start(calibration, self.agitation_var.get())
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Start Failed", f"Could not start {device.name}: {e}")
+        self._update_rows()
+
+    def _settle_interrupted(self, device, metadata):
+        """
+        Offers to resume a run the device left unstopped, or to save its
+        data to USB, before a new run deletes it. Returns True once the
+        user agreed to discard it.
+        """
+        if messagebox.askyesno(
+            "Resume Reaction",
+            f"A reaction on {device.name} was interrupted, likely by a power failure.\n\n"
+            f"Started: {metadata.get('started', 'unknown')}\n"
+            f"Samples recorded: {metadata['samples']}\n\n"
+            "Do you want to resume it?",
+        ):
+            version = metadata.get("calibration_version")
+            record = self.controller.calibrations.get(version) if version else None
+            if record is None:
+                messagebox.showerror(
+                    "Resume Failed",
+                    f"Calibration version {version} used by the interrupted run was not found.",
+                )
+                return False
+            device.resume_interrupted(record)
+            self._update_rows()
+            return False
+
+        if messagebox.askyesno(
+            "Recover Data",
+            "Do you want to save the interrupted reaction's data to a USB drive?\n\n"
+            "(If you choose 'No', it will be deleted when the new reaction starts.)",
+        ):
+            self._recover_to_usb(device)
+            return False
+        device.discard_interrupted()
+        return True
+
+    def _recover_to_usb(self, device):
+        mounted_drives = find_usb_drives()
+        if not mounted_drives:
+            messagebox.showerror(
+                "USB Not Found",
+                "No USB drive was detected. The recovered data could not be saved.",
+            )
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dst_path = os.path.join(
+            mounted_drives[0],
+            "Incubator_Data_Recovered",
+            f"recovered_data_{device.name}_{timestamp}.zip",
+        )
+        job = UsbExport()
+        job.add_archive(device.data_dir, dst_path)
+        self.export_job = job
+        job.start()
+        self._poll_export(job, device)
+
+    def _poll_export(self, job, device):
+        if not job.done:
+            self.export_label.config(text=f"Recovering {device.name}... {job.progress():.0%}")
+            self.after(self.EXPORT_POLL_MS, self._poll_export, job, device)
+            return
+        self.export_job = None
+        if job.error is not None:
+            self.export_label.config(text=f"Recovering {device.name}: failed")
+            messagebox.showerror(
+                "Recovery Error",
+                f"An error occurred during the recovery process: {job.error}",
+            )
+            return
+        self.export_label.config(text=f"Recovering {device.name}: done")
+        # Saved, so the next start may delete it
+        device.discard_interrupted()
+        messagebox.showinfo(
+            "Recovery Successful",
+            f"Recovered data successfully saved to:\n{os.path.dirname(job.outputs[0])}",
+        )
+
+    def stop_selected(self):
+        device = self._selected_device()
+        if device is None or not device.running:
+            return
+        try:
+            archive_path = device.stop()
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Stop Failed", f"Could not stop {device.name}: {e}")
+            return
+        if archive_path is not None:
+            messagebox.showinfo(
+                "Reaction Stopped", f"{device.name} data saved to {archive_path}."
+            )
+        self._update_rows()
+
+    def refresh(self):
+        self._update_rows()
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def _update_rows(self):
+        now = time.monotonic()
+        for device in self.devices.devices:
+            data = device.ingest.data
+            samples = sum(len(rd) for rd in data)
+            last_count, last_time = self._last_counts.get(device.name, (samples, now))
+            elapsed = now - last_time
+            rate = max(samples - last_count, 0) / elapsed if elapsed > 0 else 0.0
+            self._last_counts[device.name] = (samples, now)
+
+            metrics = device.ingest.analytics.metrics()
+            # Channels whose samples are all outliers or missing have no max OD
+            max_ods = metrics["max_od"]
+            max_od = np.nanmax(max_ods) if np.isfinite(max_ods).any() else np.nan
+            rates = metrics["max_growth_rate"]
+            if np.isfinite(rates).any():
+                best = int(np.nanargmax(rates))
+                best_rate = f"{rates[best]:.3f}"
+                best_channel = device.channel_id(best + 1)
+            else:
+                best_rate = best_channel = "-"
+
+            self.tree.item(
+                device.name,
+                values=(
+                    device.name,
+                    device.port,
+                    "Running" if device.running else "Idle",
+                    samples,
+                    f"{rate:.1f}",
+                    int(np.count_nonzero(metrics["samples"])),
+                    "-" if np.isnan(max_od) else f"{max_od:.3f}",
+                    best_rate,
+                    best_channel,
+                ),
+            )
@@ -6,7 +6,7 @@ class MenuView(tk.Frame):
         super().__init__(parent)
         self.controller = controller
 
-        self.grid_rowconfigure((0, 1), weight=1)
+        self.grid_rowconfigure((0, 1, 2), weight=1)
         self.grid_columnconfigure((0, 1), weight=1)
 
         label = tk.Label(self, text="Menu", font=("Arial", 56))
@@ -35,3 +35,11 @@ class MenuView(tk.Frame):
             command=lambda: controller.show_frame("RunView"),
         )
         button3.grid(row=1, column=1, sticky="nsew")
+
+        button4 = tk.Button(
+            self,
+            text="Dashboard",
+            font=("Arial", 56),
+            command=lambda: controller.show_frame("DashboardView"),
+        )
+        button4.grid(row=2, column=0, columnspan=2, sticky="nsew")
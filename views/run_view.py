@@ -3,40 +3,47 @@ from tkinter import ttk, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import numpy as np
-from util.calibration.calibration_session import CalibrationSession
-from util.uart_util import UARTUtil
 import matplotlib
 
 matplotlib.use("TkAgg")
 import re
 from collections import defaultdict
-from util.reaction.reaction_data import ReactionData
+from util.plot.reaction_plot import ReactionPlot
+from util.plot.render_scheduler import RenderScheduler
+from util.export.usb_export import UsbExport, find_usb_drives
 import time
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
 import os
 import shutil
-import tempfile
 from datetime import datetime
-import zipfile
 
 
 class RunView(tk.Frame):
     _first_check_done = False  # Class attribute to ensure check runs only once
+    PLOT_MAX_FPS = 2.0  # Live plot redraws at most this many times per second
+    EXPORT_POLL_MS = 200  # How often export progress is refreshed
+    DEVICE_POLL_MS = 100  # How often the buttons follow the device's run state
+    # Growth metrics shown next to each channel: (metric, heading, format)
+    METRIC_COLUMNS = (
+        ("max_growth_rate", "µ (1/h)", "{:.3f}"),
+        ("doubling_time", "Td (h)", "{:.2f}"),
+        ("lag_time", "Lag (h)", "{:.2f}"),
+        ("max_od", "Max OD", "{:.3f}"),
+    )
 
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.canvas = None
-        self.ser = UARTUtil.open_port()
 
-        self.data = [ReactionData(i) for i in range(50)]
-        self.data_iterator = 0
+        # This view runs the primary incubator; the dashboard runs the others.
+        # The device does the acquisition and storage, the view shows it.
+        # Attached to the acquisition daemon it is a RemoteDevice, which
+        # forwards the same calls over the daemon's socket.
+        self.device = controller.devices.primary
+        self.ingest = self.device.ingest
+        self.data = self.ingest.data
 
         self._running = False
-        self._paused = False
-        self.arduino_paused_ack = False
 
         label = tk.Label(self, text="Reaction", font=("Arial", 18))
         label.pack(side="top", anchor="n", pady=10)
@@ -54,8 +61,12 @@ class RunView(tk.Frame):
         left_frame = tk.Frame(self)
         left_frame.pack(side="left", fill="both", expand=True)
 
+        metric_names = tuple(metric for metric, _, _ in self.METRIC_COLUMNS)
         self.tree = ttk.Treeview(
-            left_frame, columns=("Selected", "Index"), show="headings", height=15
+            left_frame,
+            columns=("Selected", "Index") + metric_names,
+            show="headings",
+            height=15,
         )
         self.tree.heading("Selected", text="✓")
         self.tree.heading("Index", text="Idx")
@@ -63,6 +74,9 @@ class RunView(tk.Frame):
             "Selected", width=50, minwidth=20, anchor="center", stretch=False
         )
         self.tree.column("Index", width=50, minwidth=30, anchor="center", stretch=False)
+        for metric, heading, _ in self.METRIC_COLUMNS:
+            self.tree.heading(metric, text=heading)
+            self.tree.column(metric, width=60, minwidth=40, anchor="center", stretch=False)
         self.tree.pack(side="left", fill="y", expand=False)
 
         self.update_idletasks()
@@ -70,8 +84,9 @@ class RunView(tk.Frame):
         left_frame.config(width=int(total_width * 0.25))
         left_frame.pack_propagate(False)
 
+        self._metric_text = {}
         for i in range(50):
-            self.tree.insert("", "end", values=("[ ]", i + 1))
+            self.tree.insert("", "end", values=("[ ]", i + 1) + ("",) * len(metric_names))
 
         self.tree.bind("<Button-1>", self.on_click)
 
@@ -81,14 +96,18 @@ class RunView(tk.Frame):
         right_frame = tk.Frame(self)
         right_frame.pack(side="left", fill="both", expand=True)
 
-        from matplotlib.animation import FuncAnimation
-
         plot_frame = tk.Frame(right_frame)
         plot_frame.pack(fill="both", expand=True)
 
         self.fig, self.ax = plt.subplots()
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.plot = ReactionPlot(self.ax)
+        self.render_scheduler = RenderScheduler(
+            self, self.update_plot, max_fps=self.PLOT_MAX_FPS
+        )
+        # Redraw on the scheduler's next frame rather than per stored batch
+        self.ingest.on_store = lambda *samples: self.render_scheduler.mark_dirty()
 
         agitation_frame = tk.Frame(button_frame)
         agitation_frame.pack(side="left", padx=10)
@@ -133,16 +152,36 @@ class RunView(tk.Frame):
         )
         self.action_button.pack(side="left", padx=10)
 
-        # Trigger the one-time check for recovered data
+        self.export_job = None
+        self.export_label = tk.Label(button_frame, text="", font=("Arial", 10))
+        self.export_label.pack(side="left", padx=10)
+
+        # Trigger the one-time check for recovered data. The daemon resumes
+        # interrupted runs itself, and may be running one now.
+        if controller.attached:
+            RunView._first_check_done = True
         if not RunView._first_check_done:
             self.after(100, self._check_for_recovered_data)
+        self._poll_device()
 
     def _check_for_recovered_data(self):
         """Checks for leftover data from a failed run, runs only once."""
         RunView._first_check_done = True  # Mark as done immediately
-        temp_dir = "/var/tmp/incubator/tmp_data"
+        temp_dir = self.device.data_dir
 
         try:
+            metadata = self.device.interrupted()
+            if metadata is not None:
+                response = messagebox.askyesno(
+                    "Resume Reaction",
+                    "A reaction was interrupted, likely by a power failure.\n\n"
+                    f"Started: {metadata.get('started', 'unknown')}\n"
+                    f"Samples recorded: {metadata['samples']}\n\n"
+                    "Do you want to resume it?",
+                )
+                if response and self._resume_run(metadata):
+                    return
+
             if os.path.exists(temp_dir) and os.listdir(temp_dir):
                 response = messagebox.askyesno(
                     "Recover Data",
@@ -171,15 +210,8 @@ class RunView(tk.Frame):
             "Please insert a USB drive, then click OK to recover the data.",
         )
 
-        usb_mount_base = "/media/incubator"
-        mounted_drives = []
         try:
-            if os.path.exists(usb_mount_base):
-                mounted_drives = [
-                    os.path.join(usb_mount_base, d)
-                    for d in os.listdir(usb_mount_base)
-                    if os.path.ismount(os.path.join(usb_mount_base, d))
-                ]
+            mounted_drives = find_usb_drives()
         except Exception as e:
             messagebox.showerror(
                 "USB Error", f"An error occurred while searching for USB drives: {e}"
@@ -196,36 +228,71 @@ class RunView(tk.Frame):
         mount_point = mounted_drives[0]
 
         try:
-            temp_dir = "/var/tmp/incubator/tmp_data"
+            temp_dir = self.device.data_dir
             dst_dir = os.path.join(mount_point, "Incubator_Data_Recovered")
-            os.makedirs(dst_dir, exist_ok=True)
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             archive_name = f"recovered_data_{timestamp}.zip"
-            local_archive_path = os.path.join(tempfile.gettempdir(), archive_name)
 
-            with zipfile.ZipFile(local_archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zipf.write(file_path, os.path.relpath(file_path, temp_dir))
-
-            shutil.copy2(local_archive_path, dst_dir)
-            os.remove(local_archive_path)
-
-            messagebox.showinfo(
-                "Recovery Successful",
-                f"Recovered data successfully saved to:\n{dst_dir}",
-            )
-            self._clear_temp_data()
+            job = UsbExport()
+            job.add_archive(temp_dir, os.path.join(dst_dir, archive_name))
         except Exception as e:
             messagebox.showerror(
                 "Recovery Error", f"An error occurred during the recovery process: {e}"
             )
+            return
+        self._run_export(job, "Recovering data", self._on_recovery_exported)
+
+    def _on_recovery_exported(self, job):
+        if job.error is not None:
+            messagebox.showerror(
+                "Recovery Error",
+                f"An error occurred during the recovery process: {job.error}",
+            )
+            return
+        messagebox.showinfo(
+            "Recovery Successful",
+            f"Recovered data successfully saved to:\n{os.path.dirname(job.outputs[0])}",
+        )
+        self._clear_temp_data()
+
+    def _run_export(self, job, description, on_finished):
+        """
+        Runs a UsbExport in the background and reports its progress in the
+        view. Serial polling and plotting carry on while it runs;
+        on_finished(job) is called on the Tk thread once it is done.
+        """
+        self.export_job = job
+        self.export_label.config(text=f"{description}... 0%")
+        job.start()
+        self.after(self.EXPORT_POLL_MS, self._poll_export, job, description, on_finished)
+
+    def _poll_export(self, job, description, on_finished):
+        if not job.done:
+            self.export_label.config(text=f"{description}... {job.progress():.0%}")
+            self.after(
+                self.EXPORT_POLL_MS, self._poll_export, job, description, on_finished
+            )
+            return
+        self.export_job = None
+        if job.error is None:
+            self.export_label.config(text=f"{description}: done")
+        else:
+            self.export_label.config(text=f"{description}: failed")
+        on_finished(job)
+
+    def _export_in_progress(self):
+        if self.export_job is not None:
+            messagebox.showwarning(
+                "Export In Progress",
+                "Please wait for the current export to finish.",
+            )
+            return True
+        return False
 
     def _clear_temp_data(self):
         """Safely removes and recreates the temporary data directory."""
-        temp_dir = "/var/tmp/incubator/tmp_data"
+        temp_dir = self.device.data_dir
         try:
             if os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir)
@@ -236,128 +303,120 @@ class RunView(tk.Frame):
 
     def toggle_reaction(self):
         if not self._running:
-            self._running = True
-            self._paused = False
-            self.arduino_paused_ack = False
-            self.run_stop_button.config(text="Stop", bg="red")
-            self.play_pause_button.config(state="normal", text="Pause")
-            self.action_button.config(
-                text="Export Partial Data", command=self.start_partial_export
-            )
-            self._start_sequence()
+            # Starting a run clears tmp_data, which an export may be reading
+            if self._export_in_progress():
+                return
+            if self._start_sequence():
+                self._show_running()
         else:
-            self._running = False
-            self._paused = False
-            self.run_stop_button.config(text="Run", bg="green")
-            self.play_pause_button.config(state="disabled", text="Pause")
-            self.action_button.config(
-                text="Export Final Data", command=self.export_final_data
-            )
+            self._show_idle()
             self._stop_sequence()
 
+    def _show_running(self):
+        self._running = True
+        self.run_stop_button.config(text="Stop", bg="red")
+        self.play_pause_button.config(state="normal", text="Pause")
+        self.action_button.config(
+            text="Export Partial Data", command=self.start_partial_export
+        )
+
+    def _show_idle(self):
+        self._running = False
+        self.run_stop_button.config(text="Run", bg="green")
+        self.play_pause_button.config(state="disabled", text="Pause")
+        self.action_button.config(
+            text="Export Final Data", command=self.export_final_data
+        )
+
     def toggle_pause(self):
         if not self._running:
             return
-        self._paused = not self._paused
-        if self._paused:
-            UARTUtil.send_data(self.ser, "CMD:PAUSE_REACTION")
-        else:
-            UARTUtil.send_data(self.ser, "CMD:RESUME_REACTION")
+        # The button follows the firmware's acknowledgement (see _poll_device)
+        try:
+            self.device.set_paused(not self.device.paused, on_error=self._on_command_error)
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Pause Failed", f"Could not pause the reaction: {e}")
+
+    def _on_command_error(self, command, reason):
+        messagebox.showwarning(
+            "Incubator Not Responding",
+            f"The incubator did not acknowledge {command} ({reason}).",
+        )
 
     def start_partial_export(self):
+        # Sampling carries on: the export reads a snapshot of the data files
+        if self._export_in_progress():
+            return
         self.action_button.config(state="disabled")
-        self.play_pause_button.config(state="disabled")
+        if not self._do_partial_export_files():
+            self.action_button.config(state="normal")
+
+    def _on_partial_data_exported(self, job):
+        self.action_button.config(state="normal")
+        if job.error is not None:
+            messagebox.showerror(
+                "Export Error", f"An error occurred during partial export: {job.error}"
+            )
+            return
+        print("Partial export complete.")
         messagebox.showinfo(
-            "Exporting",
-            "Pausing reaction to export partial data. The process will resume automatically.",
+            "Export Complete",
+            "Partial data exported. The reaction kept running during the export.",
         )
-        UARTUtil.send_data(self.ser, "CMD:PAUSE_REACTION")
-        print("Sent PAUSE command for partial export.")
-        self._poll_partial_export_status("waiting_for_pause")
-
-    def _poll_partial_export_status(self, current_state):
-        if current_state == "waiting_for_pause":
-            if self.arduino_paused_ack:
-                print("Pause acknowledged. Starting file operations.")
-                self._do_partial_export_files()
-                self._poll_partial_export_status("resuming_reaction")
-            else:
-                self.after(200, self._poll_partial_export_status, "waiting_for_pause")
-        elif current_state == "resuming_reaction":
-            UARTUtil.send_data(self.ser, "CMD:RESUME_REACTION")
-            print("Sent RESUME command after partial export.")
-            self._poll_partial_export_status("waiting_for_resume")
-        elif current_state == "waiting_for_resume":
-            if not self.arduino_paused_ack:
-                print("Resume acknowledged. Partial export complete.")
-                self.action_button.config(state="normal")
-                self.play_pause_button.config(state="normal")
-                messagebox.showinfo(
-                    "Export Complete", "Partial data exported. Reaction has resumed."
-                )
-            else:
-                self.after(200, self._poll_partial_export_status, "waiting_for_resume")
 
     def _do_partial_export_files(self):
+        """
+        Starts the partial export in the background. Returns False if it
+        could not be started.
+        """
         try:
-            src_dir = "/var/tmp/incubator/tmp_data"
+            # Write every buffered row and note how long each file is now;
+            # only those bytes are exported, whatever arrives meanwhile
+            snapshot = self.device.snapshot()
+
+            src_dir = self.device.data_dir
             if not os.path.exists(src_dir) or not os.listdir(src_dir):
                 messagebox.showwarning("No Data", "No temporary data found to export.")
-                return
+                return False
 
-            usb_mount_base = "/media/incubator"
-            mounted_drives = [
-                os.path.join(usb_mount_base, d)
-                for d in os.listdir(usb_mount_base)
-                if os.path.ismount(os.path.join(usb_mount_base, d))
-            ]
+            mounted_drives = find_usb_drives()
             if not mounted_drives:
                 messagebox.showerror(
                     "USB Not Found", "No USB drive detected. Export failed."
                 )
-                return
+                return False
 
             mount_point = mounted_drives[0]
             dst_dir = os.path.join(mount_point, "Incubator_Data_Recovered")
-            os.makedirs(dst_dir, exist_ok=True)
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             archive_name = f"reaction_data_PARTIAL_{timestamp}.zip"
-            local_archive_path = os.path.join(tempfile.gettempdir(), archive_name)
-
-            with zipfile.ZipFile(local_archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(src_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zipf.write(file_path, os.path.relpath(file_path, src_dir))
 
-            shutil.copy2(local_archive_path, dst_dir)
-            print(f"Copied partial data to {os.path.join(dst_dir, archive_name)}")
-            os.remove(local_archive_path)
-            print(f"Deleted local temporary zip file: {local_archive_path}")
+            job = UsbExport()
+            job.add_archive(src_dir, os.path.join(dst_dir, archive_name), snapshot)
 
         except Exception as e:
             messagebox.showerror(
                 "Export Error", f"An error occurred during partial export: {e}"
             )
+            return False
+
+        self._run_export(job, "Exporting partial data", self._on_partial_data_exported)
+        return True
 
     def export_final_data(self):
-        src_dir = "/var/tmp/incubator/processedcsvs"
+        src_dir = self.device.archive_dir
         if not os.path.exists(src_dir) or not os.listdir(src_dir):
             messagebox.showinfo(
                 "No Data", "There is no processed data available to export."
             )
             return
 
-        usb_mount_base = "/media/incubator"
-        mounted_drives = []
+        if self._export_in_progress():
+            return
+
         try:
-            if os.path.exists(usb_mount_base):
-                mounted_drives = [
-                    os.path.join(usb_mount_base, d)
-                    for d in os.listdir(usb_mount_base)
-                    if os.path.ismount(os.path.join(usb_mount_base, d))
-                ]
+            mounted_drives = find_usb_drives()
         except Exception as e:
             messagebox.showerror(
                 "Error", f"An error occurred while searching for USB drives: {e}"
@@ -374,18 +433,42 @@ class RunView(tk.Frame):
         mount_point = mounted_drives[0]
         try:
             dst_dir = os.path.join(mount_point, "Incubator_Data")
-            os.makedirs(dst_dir, exist_ok=True)
+            job = UsbExport()
             for filename in os.listdir(src_dir):
-                shutil.copy2(os.path.join(src_dir, filename), dst_dir)
+                job.add_copy(
+                    os.path.join(src_dir, filename), os.path.join(dst_dir, filename)
+                )
+        except Exception as e:
+            messagebox.showerror(
+                "Export Error", f"An error occurred during the export process: {e}"
+            )
+            return
 
+        self.action_button.config(state="disabled")
+        self._run_export(job, "Exporting final data", self._on_final_data_exported)
+
+    def _on_final_data_exported(self, job):
+        self.action_button.config(state="normal")
+        if job.error is not None:
+            messagebox.showerror(
+                "Export Error", f"An error occurred during the export process: {job.error}"
+            )
+            return
+
+        src_dir = self.device.archive_dir
+        dst_dir = os.path.dirname(job.outputs[0])
+        try:
             print(f"Successfully copied final data to {dst_dir}.")
 
+            # Only the files that were verified on the drive are removed
             print(f"Cleaning processed data directory: {src_dir}")
-            shutil.rmtree(src_dir)
-            os.makedirs(src_dir, exist_ok=True)
+            for path in job.outputs:
+                src_path = os.path.join(src_dir, os.path.basename(path))
+                if os.path.exists(src_path):
+                    os.remove(src_path)
 
-            temp_data_dir = "/var/tmp/incubator/tmp_data"
-            if os.path.exists(temp_data_dir):
+            temp_data_dir = self.device.data_dir
+            if os.path.exists(temp_data_dir) and not self._running:
                 print(f"Cleaning temporary data directory: {temp_data_dir}")
                 shutil.rmtree(temp_data_dir)
                 os.makedirs(temp_data_dir, exist_ok=True)
@@ -407,6 +490,8 @@ class RunView(tk.Frame):
             return
         current = self.tree.set(row_id, "Selected")
         self.tree.set(row_id, "Selected", "[x]" if current.strip() == "[ ]" else "[ ]")
+        self.device.write_metadata(selected=self.get_selected_indices())
+        self.render_scheduler.render_now()
 
     def get_selected_indices(self):
         return [
@@ -416,212 +501,135 @@ class RunView(tk.Frame):
         ]
 
     def _start_sequence(self):
+        """Starts a reaction on the device; returns False if it did not start."""
         # Load calibration parameters. If it fails, abort the run.
-        if not self._load_latest_calibration():
-            # Revert the UI state because the run failed to start
-            self._running = False
-            self.run_stop_button.config(text="Run", bg="green")
-            self.play_pause_button.config(state="disabled", text="Pause")
-            self.action_button.config(
-                text="Export Final Data", command=self.export_final_data
+        record = self._load_latest_calibration()
+        if record is None:
+            return False
+
+        # Starting clears the device's temporary data, including a run that
+        # was interrupted and never recovered
+        if self.device.interrupted() is not None:
+            if not messagebox.askyesno(
+                "Discard Interrupted Reaction",
+                "The data of an interrupted reaction has not been recovered.\n\n"
+                "Delete it and start a new reaction?",
+            ):
+                return False
+            self.device.discard_interrupted()
+        try:
+            self.device.start(
+                record, self.agitation_var.get(), selected=self.get_selected_indices()
             )
-            return
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Start Failed", f"Could not start the reaction: {e}")
+            return False
+        return True
 
-        # Before starting, ensure temp data is clear
-        self._clear_temp_data()
-        for rd in self.data:
-            rd.clear()
-        self.data_iterator = 0
-        UARTUtil.send_data(self.ser, "AGITATIONS:" + str(self.agitation_var.get()))
-        UARTUtil.send_data(self.ser, "CMD:RUNREACTION")
-        self.poll_uart()
-
-    def poll_uart(self):
-        if not self._running:
-            return
-        line = UARTUtil.receive_data(self.ser)
-        if line:
-            if "PAUSE SUCCESSFUL" in line:
-                self.arduino_paused_ack = True
-                self.play_pause_button.config(text="Play")
-            elif "RESUME SUCCESSFUL" in line:
-                self.arduino_paused_ack = False
-                self.play_pause_button.config(text="Pause")
-            elif "odone" in line:
-                print(line)
-            elif "OD:" in line and "CH:" in line and not self.arduino_paused_ack:
-                try:
-                    # Split the line into parts based on the delimiters "OD:" and "CH:"
-                    # Example line: "OD:1.234CH:5"
-                    parts = line.split("CH:")
-                    od_part = parts[0]  # "OD:1.234"
-                    ch_part = parts[1]  # "5"
-
-                    # Extract the raw float value for Optical Density
-                    raw_value = float(od_part[3:])  # Slice to remove "OD:"
-
-                    # Extract the integer value for the Channel number
-                    channel_number = int(ch_part)
-
-                    # Convert the raw value to calibrated OD
-                    processed_od = self._convert_raw_to_od(raw_value)
-
-                    # Use the channel_number (adjusting for 0-based index if self.data is a list)
-                    # to access the correct data container. Assuming channel numbers are 1-based.
-                    data_index = channel_number - 1
-
-                    # Ensure the data_index is within the bounds of our data structure
-                    if 0 <= data_index < len(self.data):
-                        # Add the new data entry to the corresponding channel's data object
-                        self.data[data_index].add_entry(
-                            time=np.datetime64("now", "ms"),
-                            optical_density=processed_od,  # Use the processed value
-                            temperature=None,  # Assuming temperature is not in this message
-                        )
-
-                        # Create the directory for CSV files if it doesn't exist
-                        csv_dir = "/var/tmp/incubator/tmp_data"
-                        os.makedirs(csv_dir, exist_ok=True)
-
-                        # Export the data to a CSV file named with the correct channel number
-                        self.data[data_index].export_csv(
-                            f"{csv_dir}/channel_{channel_number}_data.csv"
-                        )
-
-                        # Update the plot with the new data
-                        self.update_plot()
-
-                except (ValueError, IndexError) as e:
-                    # This block will catch errors if the line format is unexpected
-                    # or if the number conversions fail.
-                    print(f"Error parsing UART line: '{line}'. Error: {e}")
-                    pass
-
-        self.after(100, self.poll_uart)
+    def _resume_run(self, metadata):
+        """
+        Restarts the reaction recorded in the run journal: same calibration
+        version, channel selection and agitations, with the data rebuilt
+        from the journal. Returns False if the run cannot be resumed.
+        """
+        version = metadata.get("calibration_version")
+        record = self.controller.calibrations.get(version) if version else None
+        if record is None:
+            messagebox.showerror(
+                "Resume Failed",
+                f"Calibration version {version} used by the interrupted run was not found.",
+            )
+            return False
+
+        started = time.perf_counter()
+        self.agitation_var.set(metadata.get("agitations", self.agitation_var.get()))
+        selected = set(str(idx) for idx in metadata.get("selected", []))
+        for item in self.tree.get_children():
+            mark = "[x]" if self.tree.set(item, "Index") in selected else "[ ]"
+            self.tree.set(item, "Selected", mark)
+
+        self.device.resume_interrupted(record)
+        print(
+            f"Resumed run with {metadata['samples']} samples in "
+            f"{time.perf_counter() - started:.2f} s"
+        )
+
+        self._show_running()
+        self.controller.show_frame("RunView")
+        self.render_scheduler.render_now()
+        return True
+
+    def _poll_device(self):
+        # Another client of the acquisition daemon may start or stop the run
+        if self.device.running != self._running:
+            if self.device.running:
+                self._show_running()
+            else:
+                self._show_idle()
+        if self._running:
+            self.play_pause_button.config(text="Play" if self.device.paused else "Pause")
+        self.after(self.DEVICE_POLL_MS, self._poll_device)
 
     def _stop_sequence(self):
-        UARTUtil.send_data(self.ser, "CMD:CANCEL_REACTION")
-        temp_dir = tempfile.mkdtemp(prefix="reaction_data_")
-        for i, rd in enumerate(self.data):
-            if not rd.get_all().empty:
-                rd.export_csv(os.path.join(temp_dir, f"channel_{i+1}.csv"))
-        output_dir = "/var/tmp/incubator/processedcsvs"
-        os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        archive_path = os.path.join(output_dir, f"reaction_data_{timestamp}.zip")
-        if os.listdir(temp_dir):
-            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zipf.write(file_path, os.path.relpath(file_path, temp_dir))
+        # The device ships the exact calibration the run was converted with
+        try:
+            archive_path = self.device.stop()
+        except (OSError, RuntimeError) as e:
+            messagebox.showerror("Stop Failed", f"Could not stop the reaction: {e}")
+            return
+        if archive_path is not None:
             messagebox.showinfo(
                 "Reaction Stopped", f"Reaction data processed and ready for export."
             )
-        shutil.rmtree(temp_dir)
 
     def update_plot(self, frame=None):
-        if not hasattr(self, "ax") or self.arduino_paused_ack:
+        if not hasattr(self, "plot") or self.device.paused:
             return
-        self.ax.clear()
-        selected_indices = self.get_selected_indices()
-        latest_time = None
-        colors = plt.cm.get_cmap("tab10").colors
-        for i, idx_str in enumerate(selected_indices):
-            try:
-                df = self.data[int(idx_str) - 1].get_all()
-                if not df.empty and "time" in df and "optical_density" in df:
-                    times = pd.to_datetime(df["time"])
-                    self.ax.plot(
-                        times,
-                        df["optical_density"],
-                        color=colors[i % len(colors)],
-                        linewidth=2,
-                        label=f"Channel {idx_str}",
-                    )
-                    if not times.empty:
-                        latest_time = (
-                            max(latest_time, times.iloc[-1])
-                            if latest_time
-                            else times.iloc[-1]
-                        )
-            except (IndexError, ValueError):
-                continue
-        if latest_time:
-            self.ax.set_xlim(
-                pd.to_datetime(latest_time) - pd.Timedelta(minutes=30),
-                pd.to_datetime(latest_time),
-            )
-        self.ax.set_title("Optical Density vs Time")
-        self.ax.set_xlabel("Time")
-        self.ax.set_ylabel("OD")
-        self.ax.legend()
-        self.ax.grid(True)
-        self.fig.autofmt_xdate()
-        self.fig.canvas.draw_idle()
+        self.plot.set_selection(int(idx) for idx in self.get_selected_indices())
+        self.plot.update(self.data)
+        self._update_metrics()
+
+    def _update_metrics(self):
+        metrics = self.ingest.analytics.metrics()
+        for i, item in enumerate(self.tree.get_children()):
+            for metric, _, fmt in self.METRIC_COLUMNS:
+                value = metrics[metric][i]
+                if not metrics["samples"][i]:
+                    text = ""
+                elif np.isnan(value):
+                    text = "-"
+                else:
+                    text = fmt.format(value)
+                # Only touch the cells whose text changed
+                if self._metric_text.get((item, metric)) != text:
+                    self._metric_text[(item, metric)] = text
+                    self.tree.set(item, metric, text)
 
     def _load_latest_calibration(self):
         """
-        Loads 'a' and 'b' parameters from the LAST line of the calibrations CSV.
-        Returns True on success, False on failure.
+        Returns the newest calibration in the calibration registry, for the
+        run to pin, or None after telling the user why there is none.
         """
-        self.cal_a = None
-        self.cal_b = None
-        filepath = "/var/tmp/incubator/calibrations.csv"
+        registry = self.controller.calibrations
 
         try:
-            if not os.path.isfile(filepath):
+            record = registry.latest()
+            if record is None:
                 messagebox.showerror(
                     "Calibration Missing",
-                    "Calibration file not found.\nPlease go to the Calibration screen and run a new calibration before starting a reaction.",
+                    "No calibration found.\nPlease go to the Calibration screen and run a new calibration before starting a reaction.",
                 )
-                return False
-
-            with open(filepath, "r", newline="") as f:
-                # Read all lines to easily access the last one
-                lines = f.readlines()
-                if len(lines) < 2:  # Must have a header row and at least one data row
-                    messagebox.showerror(
-                        "Invalid Calibration",
-                        "Calibration file is empty or invalid.\nPlease run a new calibration.",
-                    )
-                    return False
+                return None
 
-                # The last line contains the latest calibration data
-                last_line = lines[-1].strip()
-                parts = last_line.split(",")
-
-                # CSV format is: timestamp, a, b, r_squared
-                self.cal_a = float(parts[1])
-                self.cal_b = float(parts[2])
-                print(
-                    f"Successfully loaded calibration parameters: a={self.cal_a}, b={self.cal_b}"
-                )
-                return True
+            print(
+                f"Successfully loaded calibration version {record.version}: "
+                f"a={record.a}, b={record.b}"
+            )
+            return record
 
-        except (IOError, IndexError, ValueError) as e:
+        except (IOError, KeyError, ValueError) as e:
             messagebox.showerror(
                 "Calibration Error",
                 f"Failed to load or parse calibration data: {e}\nPlease check the calibration file or run a new one.",
             )
-            return False
-
-    def _convert_raw_to_od(self, raw_value):
-        """
-        Converts a raw value from the sensor to Optical Density using the loaded
-        calibration curve: OD = a * log10(raw_value) + b.
-        """
-        if self.cal_a is None or self.cal_b is None:
-            print("Warning: Calibration parameters not loaded. Returning raw value.")
-            return raw_value
-
-        try:
-            # The log function is undefined for non-positive numbers
-            if raw_value <= 0:
-                return np.nan  # Return 'Not a Number' for invalid readings
-
-            # Apply the logarithmic calibration formula
-            return self.cal_a * np.log10(raw_value) + self.cal_b
-        except (ValueError, TypeError) as e:
-            print(f"Error converting raw value '{raw_value}': {e}")
-            return np.nan
+            return None